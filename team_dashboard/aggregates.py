@@ -0,0 +1,164 @@
+"""
+Materialized dashboard aggregates for Team Management Dashboard
+
+The counters shown on /dashboard are kept in memory and updated from the
+storage change feed (one delta per add/edit/delete) instead of being
+recomputed from every collection on each request. Date-dependent figures are
+kept in per-date buckets, so they roll over at midnight simply by looking up
+a different date. A collection is recounted in full only when its version
+moved on without us seeing the change (e.g. a write from another worker).
+"""
+import threading
+from collections import Counter
+
+from storage import get_storage
+
+
+ACTIVE_BUILD_STATUSES = ('testing', 'release')
+
+
+class DashboardAggregates:
+    """Counters and per-date buckets behind get_dashboard_stats()"""
+
+    COLLECTIONS = (
+        'users.json', 'leaves.json', 'accomplishments.json',
+        'inventory.json', 'servers.json', 'builds.json',
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.versions = {}  # filename -> last version folded in
+        self.counts = Counter()
+        self.approved_leaves_by_date = {}  # date -> {id: name}
+        self.accomplishments_by_date = {}  # date -> {id: record}
+
+    def _apply(self, filename, record_id, record, sign):
+        """Add (sign=1) or remove (sign=-1) one record's contribution"""
+        if filename == 'users.json':
+            if record.get('role') != 'admin':
+                self.counts['total_team_members'] += sign
+        elif filename == 'leaves.json':
+            if record.get('approval_status') == 'pending':
+                self.counts['pending_approvals'] += sign
+            if record.get('approval_status') == 'approved':
+                self._bucket(self.approved_leaves_by_date, record.get('date'), record_id,
+                             record.get('name'), sign)
+        elif filename == 'accomplishments.json':
+            self._bucket(self.accomplishments_by_date, record.get('date'), record_id,
+                         dict(record), sign)
+        elif filename == 'inventory.json':
+            self.counts['total_devices'] += sign
+        elif filename == 'servers.json':
+            if record.get('status') == 'available':
+                self.counts['available_servers'] += sign
+        elif filename == 'builds.json':
+            if record.get('status') in ACTIVE_BUILD_STATUSES:
+                self.counts['active_builds'] += sign
+
+    @staticmethod
+    def _bucket(buckets, day, record_id, value, sign):
+        if sign > 0:
+            buckets.setdefault(day, {})[record_id] = value
+        else:
+            bucket = buckets.get(day)
+            if bucket is not None:
+                bucket.pop(record_id, None)
+                if not bucket:
+                    del buckets[day]
+
+    def _reset(self, filename):
+        keys = {
+            'users.json': ('total_team_members',),
+            'leaves.json': ('pending_approvals',),
+            'inventory.json': ('total_devices',),
+            'servers.json': ('available_servers',),
+            'builds.json': ('active_builds',),
+        }.get(filename, ())
+        for key in keys:
+            self.counts[key] = 0
+        if filename == 'leaves.json':
+            self.approved_leaves_by_date = {}
+        elif filename == 'accomplishments.json':
+            self.accomplishments_by_date = {}
+
+    def rebuild(self, storage, filename, attempts=5):
+        """Recount one collection from scratch
+
+        The records and their version are read separately, so a write that
+        commits in between would be counted again when its change arrives;
+        the read is repeated until the version is the same on both sides.
+        """
+        with self._lock:
+            for _ in range(attempts):
+                version = storage.version(filename)
+                records = storage.load(filename)
+                if storage.version(filename) == version:
+                    break
+            else:
+                # Still changing: count what was read and recount on the next refresh()
+                version = None
+            self._reset(filename)
+            for record in records:
+                self._apply(filename, record.get('id'), record, 1)
+            if version is None:
+                self.versions.pop(filename, None)
+            else:
+                self.versions[filename] = version
+
+    def apply(self, filename, version, changes):
+        """Fold one committed write from the storage change feed"""
+        if filename not in self.COLLECTIONS:
+            return
+        with self._lock:
+            known = self.versions.get(filename)
+            if known is not None and version <= known:
+                return  # already counted by rebuild()
+            if changes is None or known != version - 1:
+                self.versions.pop(filename, None)
+                return
+            for record_id, old, new in changes:
+                if old is not None:
+                    self._apply(filename, record_id, old, -1)
+                if new is not None:
+                    self._apply(filename, record_id, new, 1)
+            self.versions[filename] = version
+
+    def refresh(self, storage):
+        """Recount any collection that changed behind our back"""
+        for filename in self.COLLECTIONS:
+            if self.versions.get(filename) != storage.version(filename):
+                self.rebuild(storage, filename)
+
+    def snapshot(self, today):
+        """Return the dashboard stats for the given date"""
+        with self._lock:
+            # Buckets are small (one day); list them in id order like the data file
+            on_leave = [name for _, name in sorted(self.approved_leaves_by_date.get(today, {}).items())]
+            accomplishments = [acc for _, acc in sorted(self.accomplishments_by_date.get(today, {}).items())]
+            return {
+                'total_team_members': self.counts['total_team_members'],
+                'on_leave_today': len(on_leave),
+                'pending_approvals': self.counts['pending_approvals'],
+                'total_devices': self.counts['total_devices'],
+                'available_servers': self.counts['available_servers'],
+                'active_builds': self.counts['active_builds'],
+                'today_accomplishments': len(accomplishments),
+                'on_leave_names': on_leave,
+                'recent_accomplishments_list': [dict(acc) for acc in accomplishments[:5]]
+            }
+
+
+_aggregates = None
+_aggregates_lock = threading.Lock()
+
+
+def get_dashboard_aggregates():
+    """Return the process-wide aggregates, up to date with storage"""
+    global _aggregates
+    storage = get_storage()
+    with _aggregates_lock:
+        if _aggregates is None:
+            _aggregates = DashboardAggregates()
+            storage.subscribe(lambda filename, version, changes: _aggregates.apply(filename, version, changes))
+    _aggregates.refresh(storage)
+    return _aggregates
@@ -1,54 +1,127 @@
 """
 Team Management Dashboard - Flask Application
 Main application file with all routes
+
+The app is built by create_app(). Importing this module only defines the
+views; the Jira, email and scheduler subsystems are imported when they are
+first needed, so tests and CLI commands start quickly. Run it with
+`python app.py`, `flask --app app run` or `gunicorn 'app:create_app()'`.
 """
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-from datetime import datetime
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask import Flask, Response, render_template, request, redirect, url_for, session, flash, jsonify, abort, g
 import atexit
+import hmac
+import time
+
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import Config
 from utils import (
-    login_required, admin_required, hash_password,
-    load_json_file, save_json_file, get_next_id,
-    format_date, get_today, send_email,
-    generate_daily_summary, fetch_jira_issues,
-    get_dashboard_stats
+    login_required, admin_required, current_username,
+    load_json_file, iter_records, get_record, add_record, update_record, delete_record,
+    paginate, format_date, get_today, send_email,
+    send_daily_summary, get_dashboard_stats,
+    collection_validators, is_not_modified, set_validators
 )
-
-app = Flask(__name__)
-app.config.from_object(Config)
-
-# Initialize scheduler for daily emails
-scheduler = BackgroundScheduler()
-scheduler.start()
-
-# Schedule daily email at configured time
-def send_daily_summary():
-    """Send daily summary email"""
-    summary_html = generate_daily_summary()
-    send_email(
-        subject=f"Daily Team Summary - {format_date(get_today())}",
-        body=summary_html
-    )
-
-# Add job to scheduler
-scheduler.add_job(
-    func=send_daily_summary,
-    trigger="cron",
-    hour=Config.EMAIL_SCHEDULE_HOUR,
-    minute=Config.EMAIL_SCHEDULE_MINUTE
+from auth import authenticate, login_allowed, login_succeeded
+from bulk import (
+    IMPORT_FIELDS, IMPORT_DEFAULTS, FORMATS, BulkImportError,
+    detect_format, import_records, stream_export, validate_row, validate_update
 )
-
-# Shut down the scheduler when exiting the app
-atexit.register(lambda: scheduler.shutdown())
+from events import open_stream, stream_slots
+from fragments import render_cached_page
+from metrics import CONTENT_TYPE, REQUEST_SECONDS, render_metrics
+from profiler import profiled, get_profile_store, collapsed_download
+from search import FILTER_FIELDS
+from storage import get_date_field
+
+
+# Views are collected here and registered on the app by create_app()
+_routes = []
+
+
+def route(rule, profile=True, **options):
+    """Record a view to be registered by create_app()
+
+    profile=False keeps the request profiler off a view (long-lived streams).
+    """
+    def decorator(f):
+        _routes.append((rule, f, profile, options))
+        return f
+    return decorator
+
+
+def create_app(config=Config, start_services=True, preload=None):
+    """Build the Flask app
+
+    start_services starts the embedded scheduler and the email outbox worker
+    (when configured); pass False for tests and scripts. preload (default:
+    Config.PRELOAD_CACHES) warms the data caches before the first request.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config)
+    if config.PROXY_FIX_HOPS:
+        # Take the client address (and scheme) from the trusted proxies' headers
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config.PROXY_FIX_HOPS,
+                                x_proto=config.PROXY_FIX_HOPS)
+
+    for rule, view, profile, options in _routes:
+        if profile and config.PROFILER_ENABLED:
+            view = profiled(view)
+        app.add_url_rule(rule, view_func=view, **options)
+    app.add_template_filter(format_date_filter, 'format_date')
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, internal_error)
+    if config.METRICS_ENABLED:
+        app.before_request(start_request_timer)
+        app.teardown_request(record_request_time)
+
+    # Record who made each change in the JSON journal
+    from storage import get_storage
+    get_storage().set_user_provider(current_username)
+
+    if preload is None:
+        preload = config.PRELOAD_CACHES
+    if preload:
+        preload_caches()
+
+    if start_services:
+        start_background_services()
+
+    return app
+
+
+def preload_caches():
+    """Load every collection and build the dashboard and search indexes"""
+    from search import get_search_index
+    from storage import get_storage
+
+    storage = get_storage()
+    for filename in FILTER_FIELDS:
+        storage.load(filename)
+        get_search_index(filename)
+    storage.load('users.json')
+    get_dashboard_stats()
+
+
+def start_background_services():
+    """Start the scheduler (in one process only) and the email outbox worker"""
+    # Run scheduled jobs in exactly one process (see scheduler.py)
+    if Config.SCHEDULER_MODE == 'embedded':
+        from scheduler import start_embedded_scheduler, shutdown_scheduler
+        if start_embedded_scheduler():
+            atexit.register(shutdown_scheduler)
+
+    # Deliver queued emails (including any left over from a previous run)
+    if Config.EMAIL_ENABLED:
+        from mailer import start_outbox_worker
+        start_outbox_worker()
 
 
 # ============================================================================
 # Authentication Routes
 # ============================================================================
 
-@app.route('/')
+@route('/')
 def index():
     """Redirect to dashboard or login"""
     if 'user' in session:
@@ -56,21 +129,23 @@ def index():
     return redirect(url_for('login'))
 
 
-@app.route('/login', methods=['GET', 'POST'])
+@route('/login', methods=['GET', 'POST'])
 def login():
     """Login page"""
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
         
-        # Load users
-        users = load_json_file('users.json')
+        # Cap how many password hashes an attacker can make us compute
+        if not login_allowed(request.remote_addr, username):
+            flash('Too many login attempts. Please wait a few minutes and try again.', 'danger')
+            return render_template('login.html'), 429
         
         # Authenticate
-        hashed_password = hash_password(password)
-        user = next((u for u in users if u['username'] == username and u['password'] == hashed_password), None)
+        user = authenticate(username, password)
         
         if user:
+            login_succeeded(request.remote_addr, username)
             session['user'] = username
             session['role'] = user['role']
             session['name'] = user['name']
@@ -82,7 +157,7 @@ def login():
     return render_template('login.html')
 
 
-@app.route('/logout')
+@route('/logout')
 def logout():
     """Logout user"""
     session.clear()
@@ -94,41 +169,42 @@ def logout():
 # Dashboard
 # ============================================================================
 
-@app.route('/dashboard')
+@route('/dashboard')
 @login_required
 def dashboard():
     """Main dashboard"""
     stats = get_dashboard_stats()
     
-    # Get Jira issues if enabled
+    # Get cached Jira issues if enabled (never blocks on Jira)
     jira_issues = []
     if Config.JIRA_ENABLED:
-        jira_issues = fetch_jira_issues()[:5]  # Get top 5
+        from jira_client import get_jira_issues
+        jira_issues = get_jira_issues()[:5]  # Get top 5
     
-    return render_template('dashboard.html', stats=stats, jira_issues=jira_issues)
+    # Only subscribe where /api/stream can be served, rather than be refused on every page load
+    live_updates = Config.SSE_ENABLED and stream_slots(request.environ) > 0
+    return render_template('dashboard.html', stats=stats, jira_issues=jira_issues, live_updates=live_updates)
 
 
 # ============================================================================
 # Leave Management Routes
 # ============================================================================
 
-@app.route('/leaves')
+@route('/leaves')
 @login_required
 def leaves():
     """Leave tracking page"""
-    leaves_data = load_json_file('leaves.json')
-    leaves_data.sort(key=lambda x: x.get('date', ''), reverse=True)
-    return render_template('leaves.html', leaves=leaves_data)
+    def build_context():
+        page = paginate('leaves.json', sort_fields=('date', 'name', 'type', 'approval_status'))
+        return {'leaves': page.items, 'page': page}
+    return render_cached_page('leaves.html', ('leaves.json',), build_context, stream=True)
 
 
-@app.route('/leaves/add', methods=['POST'])
+@route('/leaves/add', methods=['POST'])
 @login_required
 def add_leave():
     """Add new leave entry"""
-    leaves_data = load_json_file('leaves.json')
-    
     new_leave = {
-        'id': get_next_id(leaves_data),
         'name': request.form.get('name'),
         'date': request.form.get('date'),
         'type': request.form.get('type'),
@@ -136,40 +212,36 @@ def add_leave():
         'approval_status': request.form.get('approval_status', 'pending')
     }
     
-    leaves_data.append(new_leave)
-    save_json_file('leaves.json', leaves_data)
+    add_record('leaves.json', new_leave)
     
     flash('Leave entry added successfully', 'success')
     return redirect(url_for('leaves'))
 
 
-@app.route('/leaves/edit/<int:leave_id>', methods=['POST'])
+@route('/leaves/edit/<int:leave_id>', methods=['POST'])
 @login_required
 def edit_leave(leave_id):
     """Edit leave entry"""
-    leaves_data = load_json_file('leaves.json')
-    
-    for leave in leaves_data:
-        if leave['id'] == leave_id:
-            leave['name'] = request.form.get('name')
-            leave['date'] = request.form.get('date')
-            leave['type'] = request.form.get('type')
-            leave['reason'] = request.form.get('reason')
-            leave['approval_status'] = request.form.get('approval_status')
-            break
-    
-    save_json_file('leaves.json', leaves_data)
+    leave = update_record('leaves.json', leave_id, {
+        'name': request.form.get('name'),
+        'date': request.form.get('date'),
+        'type': request.form.get('type'),
+        'reason': request.form.get('reason'),
+        'approval_status': request.form.get('approval_status')
+    })
+    if leave is None:
+        abort(404)
+    
     flash('Leave entry updated successfully', 'success')
     return redirect(url_for('leaves'))
 
 
-@app.route('/leaves/delete/<int:leave_id>')
+@route('/leaves/delete/<int:leave_id>')
 @login_required
 def delete_leave(leave_id):
     """Delete leave entry"""
-    leaves_data = load_json_file('leaves.json')
-    leaves_data = [l for l in leaves_data if l['id'] != leave_id]
-    save_json_file('leaves.json', leaves_data)
+    if not delete_record('leaves.json', leave_id):
+        abort(404)
     
     flash('Leave entry deleted successfully', 'success')
     return redirect(url_for('leaves'))
@@ -179,23 +251,21 @@ def delete_leave(leave_id):
 # Accomplishments Routes
 # ============================================================================
 
-@app.route('/accomplishments')
+@route('/accomplishments')
 @login_required
 def accomplishments():
     """Accomplishments page"""
-    accomplishments_data = load_json_file('accomplishments.json')
-    accomplishments_data.sort(key=lambda x: x.get('date', ''), reverse=True)
-    return render_template('accomplishments.html', accomplishments=accomplishments_data)
+    def build_context():
+        page = paginate('accomplishments.json', sort_fields=('date', 'member_name', 'type'))
+        return {'accomplishments': page.items, 'page': page}
+    return render_cached_page('accomplishments.html', ('accomplishments.json',), build_context)
 
 
-@app.route('/accomplishments/add', methods=['POST'])
+@route('/accomplishments/add', methods=['POST'])
 @login_required
 def add_accomplishment():
     """Add new accomplishment"""
-    accomplishments_data = load_json_file('accomplishments.json')
-    
     new_accomplishment = {
-        'id': get_next_id(accomplishments_data),
         'date': request.form.get('date'),
         'member_name': request.form.get('member_name'),
         'description': request.form.get('description'),
@@ -203,40 +273,36 @@ def add_accomplishment():
         'type': request.form.get('type')
     }
     
-    accomplishments_data.append(new_accomplishment)
-    save_json_file('accomplishments.json', accomplishments_data)
+    add_record('accomplishments.json', new_accomplishment)
     
     flash('Accomplishment added successfully', 'success')
     return redirect(url_for('accomplishments'))
 
 
-@app.route('/accomplishments/edit/<int:acc_id>', methods=['POST'])
+@route('/accomplishments/edit/<int:acc_id>', methods=['POST'])
 @login_required
 def edit_accomplishment(acc_id):
     """Edit accomplishment"""
-    accomplishments_data = load_json_file('accomplishments.json')
-    
-    for acc in accomplishments_data:
-        if acc['id'] == acc_id:
-            acc['date'] = request.form.get('date')
-            acc['member_name'] = request.form.get('member_name')
-            acc['description'] = request.form.get('description')
-            acc['impact'] = request.form.get('impact')
-            acc['type'] = request.form.get('type')
-            break
-    
-    save_json_file('accomplishments.json', accomplishments_data)
+    acc = update_record('accomplishments.json', acc_id, {
+        'date': request.form.get('date'),
+        'member_name': request.form.get('member_name'),
+        'description': request.form.get('description'),
+        'impact': request.form.get('impact'),
+        'type': request.form.get('type')
+    })
+    if acc is None:
+        abort(404)
+    
     flash('Accomplishment updated successfully', 'success')
     return redirect(url_for('accomplishments'))
 
 
-@app.route('/accomplishments/delete/<int:acc_id>')
+@route('/accomplishments/delete/<int:acc_id>')
 @login_required
 def delete_accomplishment(acc_id):
     """Delete accomplishment"""
-    accomplishments_data = load_json_file('accomplishments.json')
-    accomplishments_data = [a for a in accomplishments_data if a['id'] != acc_id]
-    save_json_file('accomplishments.json', accomplishments_data)
+    if not delete_record('accomplishments.json', acc_id):
+        abort(404)
     
     flash('Accomplishment deleted successfully', 'success')
     return redirect(url_for('accomplishments'))
@@ -246,22 +312,19 @@ def delete_accomplishment(acc_id):
 # Inventory Routes
 # ============================================================================
 
-@app.route('/inventory')
+@route('/inventory')
 @login_required
 def inventory():
     """Inventory page"""
-    inventory_data = load_json_file('inventory.json')
-    return render_template('inventory.html', inventory=inventory_data)
+    return render_cached_page('inventory.html', ('inventory.json',),
+                              lambda: {'inventory': iter_records('inventory.json')}, stream=True)
 
 
-@app.route('/inventory/add', methods=['POST'])
+@route('/inventory/add', methods=['POST'])
 @login_required
 def add_inventory():
     """Add inventory item"""
-    inventory_data = load_json_file('inventory.json')
-    
     new_item = {
-        'id': get_next_id(inventory_data),
         'item_name': request.form.get('item_name'),
         'assigned_to': request.form.get('assigned_to'),
         'serial_no': request.form.get('serial_no'),
@@ -269,40 +332,36 @@ def add_inventory():
         'remarks': request.form.get('remarks')
     }
     
-    inventory_data.append(new_item)
-    save_json_file('inventory.json', inventory_data)
+    add_record('inventory.json', new_item)
     
     flash('Inventory item added successfully', 'success')
     return redirect(url_for('inventory'))
 
 
-@app.route('/inventory/edit/<int:item_id>', methods=['POST'])
+@route('/inventory/edit/<int:item_id>', methods=['POST'])
 @login_required
 def edit_inventory(item_id):
     """Edit inventory item"""
-    inventory_data = load_json_file('inventory.json')
-    
-    for item in inventory_data:
-        if item['id'] == item_id:
-            item['item_name'] = request.form.get('item_name')
-            item['assigned_to'] = request.form.get('assigned_to')
-            item['serial_no'] = request.form.get('serial_no')
-            item['condition'] = request.form.get('condition')
-            item['remarks'] = request.form.get('remarks')
-            break
-    
-    save_json_file('inventory.json', inventory_data)
+    item = update_record('inventory.json', item_id, {
+        'item_name': request.form.get('item_name'),
+        'assigned_to': request.form.get('assigned_to'),
+        'serial_no': request.form.get('serial_no'),
+        'condition': request.form.get('condition'),
+        'remarks': request.form.get('remarks')
+    })
+    if item is None:
+        abort(404)
+    
     flash('Inventory item updated successfully', 'success')
     return redirect(url_for('inventory'))
 
 
-@app.route('/inventory/delete/<int:item_id>')
+@route('/inventory/delete/<int:item_id>')
 @login_required
 def delete_inventory(item_id):
     """Delete inventory item"""
-    inventory_data = load_json_file('inventory.json')
-    inventory_data = [i for i in inventory_data if i['id'] != item_id]
-    save_json_file('inventory.json', inventory_data)
+    if not delete_record('inventory.json', item_id):
+        abort(404)
     
     flash('Inventory item deleted successfully', 'success')
     return redirect(url_for('inventory'))
@@ -312,22 +371,19 @@ def delete_inventory(item_id):
 # Server Routes
 # ============================================================================
 
-@app.route('/servers')
+@route('/servers')
 @login_required
 def servers():
     """Servers page"""
-    servers_data = load_json_file('servers.json')
-    return render_template('servers.html', servers=servers_data)
+    return render_cached_page('servers.html', ('servers.json',),
+                              lambda: {'servers': load_json_file('servers.json')})
 
 
-@app.route('/servers/add', methods=['POST'])
+@route('/servers/add', methods=['POST'])
 @login_required
 def add_server():
     """Add server"""
-    servers_data = load_json_file('servers.json')
-    
     new_server = {
-        'id': get_next_id(servers_data),
         'server_name': request.form.get('server_name'),
         'ip': request.form.get('ip'),
         'os': request.form.get('os'),
@@ -337,42 +393,38 @@ def add_server():
         'status': request.form.get('status')
     }
     
-    servers_data.append(new_server)
-    save_json_file('servers.json', servers_data)
+    add_record('servers.json', new_server)
     
     flash('Server added successfully', 'success')
     return redirect(url_for('servers'))
 
 
-@app.route('/servers/edit/<int:server_id>', methods=['POST'])
+@route('/servers/edit/<int:server_id>', methods=['POST'])
 @login_required
 def edit_server(server_id):
     """Edit server"""
-    servers_data = load_json_file('servers.json')
-    
-    for server in servers_data:
-        if server['id'] == server_id:
-            server['server_name'] = request.form.get('server_name')
-            server['ip'] = request.form.get('ip')
-            server['os'] = request.form.get('os')
-            server['purpose'] = request.form.get('purpose')
-            server['assigned_team'] = request.form.get('assigned_team')
-            server['attached_devices'] = request.form.get('attached_devices')
-            server['status'] = request.form.get('status')
-            break
-    
-    save_json_file('servers.json', servers_data)
+    server = update_record('servers.json', server_id, {
+        'server_name': request.form.get('server_name'),
+        'ip': request.form.get('ip'),
+        'os': request.form.get('os'),
+        'purpose': request.form.get('purpose'),
+        'assigned_team': request.form.get('assigned_team'),
+        'attached_devices': request.form.get('attached_devices'),
+        'status': request.form.get('status')
+    })
+    if server is None:
+        abort(404)
+    
     flash('Server updated successfully', 'success')
     return redirect(url_for('servers'))
 
 
-@app.route('/servers/delete/<int:server_id>')
+@route('/servers/delete/<int:server_id>')
 @login_required
 def delete_server(server_id):
     """Delete server"""
-    servers_data = load_json_file('servers.json')
-    servers_data = [s for s in servers_data if s['id'] != server_id]
-    save_json_file('servers.json', servers_data)
+    if not delete_record('servers.json', server_id):
+        abort(404)
     
     flash('Server deleted successfully', 'success')
     return redirect(url_for('servers'))
@@ -382,23 +434,21 @@ def delete_server(server_id):
 # Build Routes
 # ============================================================================
 
-@app.route('/builds')
+@route('/builds')
 @login_required
 def builds():
     """Builds page"""
-    builds_data = load_json_file('builds.json')
-    builds_data.sort(key=lambda x: x.get('date', ''), reverse=True)
-    return render_template('builds.html', builds=builds_data)
+    def build_context():
+        page = paginate('builds.json', sort_fields=('date', 'build_name', 'environment', 'status'))
+        return {'builds': page.items, 'page': page}
+    return render_cached_page('builds.html', ('builds.json',), build_context)
 
 
-@app.route('/builds/add', methods=['POST'])
+@route('/builds/add', methods=['POST'])
 @login_required
 def add_build():
     """Add build"""
-    builds_data = load_json_file('builds.json')
-    
     new_build = {
-        'id': get_next_id(builds_data),
         'build_name': request.form.get('build_name'),
         'version': request.form.get('version'),
         'date': request.form.get('date'),
@@ -407,41 +457,37 @@ def add_build():
         'changelog_url': request.form.get('changelog_url')
     }
     
-    builds_data.append(new_build)
-    save_json_file('builds.json', builds_data)
+    add_record('builds.json', new_build)
     
     flash('Build added successfully', 'success')
     return redirect(url_for('builds'))
 
 
-@app.route('/builds/edit/<int:build_id>', methods=['POST'])
+@route('/builds/edit/<int:build_id>', methods=['POST'])
 @login_required
 def edit_build(build_id):
     """Edit build"""
-    builds_data = load_json_file('builds.json')
-    
-    for build in builds_data:
-        if build['id'] == build_id:
-            build['build_name'] = request.form.get('build_name')
-            build['version'] = request.form.get('version')
-            build['date'] = request.form.get('date')
-            build['environment'] = request.form.get('environment')
-            build['status'] = request.form.get('status')
-            build['changelog_url'] = request.form.get('changelog_url')
-            break
-    
-    save_json_file('builds.json', builds_data)
+    build = update_record('builds.json', build_id, {
+        'build_name': request.form.get('build_name'),
+        'version': request.form.get('version'),
+        'date': request.form.get('date'),
+        'environment': request.form.get('environment'),
+        'status': request.form.get('status'),
+        'changelog_url': request.form.get('changelog_url')
+    })
+    if build is None:
+        abort(404)
+    
     flash('Build updated successfully', 'success')
     return redirect(url_for('builds'))
 
 
-@app.route('/builds/delete/<int:build_id>')
+@route('/builds/delete/<int:build_id>')
 @login_required
 def delete_build(build_id):
     """Delete build"""
-    builds_data = load_json_file('builds.json')
-    builds_data = [b for b in builds_data if b['id'] != build_id]
-    save_json_file('builds.json', builds_data)
+    if not delete_record('builds.json', build_id):
+        abort(404)
     
     flash('Build deleted successfully', 'success')
     return redirect(url_for('builds'))
@@ -451,61 +497,54 @@ def delete_build(build_id):
 # Links Routes
 # ============================================================================
 
-@app.route('/links')
+@route('/links')
 @login_required
 def links():
     """Links page"""
-    links_data = load_json_file('links.json')
-    return render_template('links.html', links=links_data)
+    return render_cached_page('links.html', ('links.json',),
+                              lambda: {'links': load_json_file('links.json')})
 
 
-@app.route('/links/add', methods=['POST'])
+@route('/links/add', methods=['POST'])
 @login_required
 def add_link():
     """Add link"""
-    links_data = load_json_file('links.json')
-    
     new_link = {
-        'id': get_next_id(links_data),
         'title': request.form.get('title'),
         'url': request.form.get('url'),
         'category': request.form.get('category'),
         'description': request.form.get('description')
     }
     
-    links_data.append(new_link)
-    save_json_file('links.json', links_data)
+    add_record('links.json', new_link)
     
     flash('Link added successfully', 'success')
     return redirect(url_for('links'))
 
 
-@app.route('/links/edit/<int:link_id>', methods=['POST'])
+@route('/links/edit/<int:link_id>', methods=['POST'])
 @login_required
 def edit_link(link_id):
     """Edit link"""
-    links_data = load_json_file('links.json')
-    
-    for link in links_data:
-        if link['id'] == link_id:
-            link['title'] = request.form.get('title')
-            link['url'] = request.form.get('url')
-            link['category'] = request.form.get('category')
-            link['description'] = request.form.get('description')
-            break
+    link = update_record('links.json', link_id, {
+        'title': request.form.get('title'),
+        'url': request.form.get('url'),
+        'category': request.form.get('category'),
+        'description': request.form.get('description')
+    })
+    if link is None:
+        abort(404)
     
-    save_json_file('links.json', links_data)
     flash('Link updated successfully', 'success')
     return redirect(url_for('links'))
 
 
-@app.route('/links/delete/<int:link_id>')
+@route('/links/delete/<int:link_id>')
 @login_required
 def delete_link(link_id):
     """Delete link"""
-    links_data = load_json_file('links.json')
-    links_data = [l for l in links_data if l['id'] != link_id]
-    save_json_file('links.json', links_data)
+    if not delete_record('links.json', link_id):
+        abort(404)
     
     flash('Link deleted successfully', 'success')
     return redirect(url_for('links'))
@@ -515,61 +554,55 @@ def delete_link(link_id):
 # Announcements Routes
 # ============================================================================
 
-@app.route('/announcements')
+@route('/announcements')
 @login_required
 def announcements():
     """Announcements page"""
-    announcements_data = load_json_file('announcements.json')
-    announcements_data.sort(key=lambda x: x.get('date', ''), reverse=True)
-    return render_template('announcements.html', announcements=announcements_data)
+    def build_context():
+        page = paginate('announcements.json', sort_fields=('date', 'title'))
+        return {'announcements': page.items, 'page': page}
+    return render_cached_page('announcements.html', ('announcements.json',), build_context)
 
 
-@app.route('/announcements/add', methods=['POST'])
+@route('/announcements/add', methods=['POST'])
 @login_required
 def add_announcement():
     """Add announcement"""
-    announcements_data = load_json_file('announcements.json')
-    
     new_announcement = {
-        'id': get_next_id(announcements_data),
         'date': request.form.get('date'),
         'title': request.form.get('title'),
         'message': request.form.get('message'),
         'posted_by': session.get('name', 'Unknown')
     }
     
-    announcements_data.append(new_announcement)
-    save_json_file('announcements.json', announcements_data)
+    add_record('announcements.json', new_announcement)
     
     flash('Announcement added successfully', 'success')
     return redirect(url_for('announcements'))
 
 
-@app.route('/announcements/edit/<int:ann_id>', methods=['POST'])
+@route('/announcements/edit/<int:ann_id>', methods=['POST'])
 @login_required
 def edit_announcement(ann_id):
     """Edit announcement"""
-    announcements_data = load_json_file('announcements.json')
-    
-    for ann in announcements_data:
-        if ann['id'] == ann_id:
-            ann['date'] = request.form.get('date')
-            ann['title'] = request.form.get('title')
-            ann['message'] = request.form.get('message')
-            break
+    ann = update_record('announcements.json', ann_id, {
+        'date': request.form.get('date'),
+        'title': request.form.get('title'),
+        'message': request.form.get('message')
+    })
+    if ann is None:
+        abort(404)
     
-    save_json_file('announcements.json', announcements_data)
     flash('Announcement updated successfully', 'success')
     return redirect(url_for('announcements'))
 
 
-@app.route('/announcements/delete/<int:ann_id>')
+@route('/announcements/delete/<int:ann_id>')
 @login_required
 def delete_announcement(ann_id):
     """Delete announcement"""
-    announcements_data = load_json_file('announcements.json')
-    announcements_data = [a for a in announcements_data if a['id'] != ann_id]
-    save_json_file('announcements.json', announcements_data)
+    if not delete_record('announcements.json', ann_id):
+        abort(404)
     
     flash('Announcement deleted successfully', 'success')
     return redirect(url_for('announcements'))
@@ -579,23 +612,21 @@ def delete_announcement(ann_id):
 # Celebrations Routes
 # ============================================================================
 
-@app.route('/celebrations')
+@route('/celebrations')
 @login_required
 def celebrations():
     """Celebrations page"""
-    celebrations_data = load_json_file('celebrations.json')
-    celebrations_data.sort(key=lambda x: x.get('date', ''), reverse=True)
-    return render_template('celebrations.html', celebrations=celebrations_data)
+    def build_context():
+        page = paginate('celebrations.json', sort_fields=('date', 'member_name', 'event_type'))
+        return {'celebrations': page.items, 'page': page}
+    return render_cached_page('celebrations.html', ('celebrations.json',), build_context)
 
 
-@app.route('/celebrations/add', methods=['POST'])
+@route('/celebrations/add', methods=['POST'])
 @login_required
 def add_celebration():
     """Add celebration"""
-    celebrations_data = load_json_file('celebrations.json')
-    
     new_celebration = {
-        'id': get_next_id(celebrations_data),
         'date': request.form.get('date'),
         'member_name': request.form.get('member_name'),
         'event_type': request.form.get('event_type'),
@@ -603,40 +634,36 @@ def add_celebration():
         'photo_url': request.form.get('photo_url', '')
     }
     
-    celebrations_data.append(new_celebration)
-    save_json_file('celebrations.json', celebrations_data)
+    add_record('celebrations.json', new_celebration)
     
     flash('Celebration added successfully', 'success')
     return redirect(url_for('celebrations'))
 
 
-@app.route('/celebrations/edit/<int:cel_id>', methods=['POST'])
+@route('/celebrations/edit/<int:cel_id>', methods=['POST'])
 @login_required
 def edit_celebration(cel_id):
     """Edit celebration"""
-    celebrations_data = load_json_file('celebrations.json')
-    
-    for cel in celebrations_data:
-        if cel['id'] == cel_id:
-            cel['date'] = request.form.get('date')
-            cel['member_name'] = request.form.get('member_name')
-            cel['event_type'] = request.form.get('event_type')
-            cel['message'] = request.form.get('message')
-            cel['photo_url'] = request.form.get('photo_url', '')
-            break
-    
-    save_json_file('celebrations.json', celebrations_data)
+    cel = update_record('celebrations.json', cel_id, {
+        'date': request.form.get('date'),
+        'member_name': request.form.get('member_name'),
+        'event_type': request.form.get('event_type'),
+        'message': request.form.get('message'),
+        'photo_url': request.form.get('photo_url', '')
+    })
+    if cel is None:
+        abort(404)
+    
     flash('Celebration updated successfully', 'success')
     return redirect(url_for('celebrations'))
 
 
-@app.route('/celebrations/delete/<int:cel_id>')
+@route('/celebrations/delete/<int:cel_id>')
 @login_required
 def delete_celebration(cel_id):
     """Delete celebration"""
-    celebrations_data = load_json_file('celebrations.json')
-    celebrations_data = [c for c in celebrations_data if c['id'] != cel_id]
-    save_json_file('celebrations.json', celebrations_data)
+    if not delete_record('celebrations.json', cel_id):
+        abort(404)
     
     flash('Celebration deleted successfully', 'success')
     return redirect(url_for('celebrations'))
@@ -646,70 +673,65 @@ def delete_celebration(cel_id):
 # Skills Routes
 # ============================================================================
 
-@app.route('/skills')
+@route('/skills')
 @login_required
 def skills():
     """Skills matrix page"""
-    skills_data = load_json_file('skills.json')
-    
-    # Group skills by team member
-    skills_by_member = {}
-    for skill in skills_data:
-        name = skill.get('name')
-        if name not in skills_by_member:
-            skills_by_member[name] = []
-        skills_by_member[name].append(skill)
-    
-    return render_template('skills.html', skills=skills_data, skills_by_member=skills_by_member)
+    def build_context():
+        skills_data = load_json_file('skills.json')
+        
+        # Group skills by team member
+        skills_by_member = {}
+        for skill in skills_data:
+            name = skill.get('name')
+            if name not in skills_by_member:
+                skills_by_member[name] = []
+            skills_by_member[name].append(skill)
+        
+        return {'skills': skills_data, 'skills_by_member': skills_by_member}
+    return render_cached_page('skills.html', ('skills.json',), build_context)
 
 
-@app.route('/skills/add', methods=['POST'])
+@route('/skills/add', methods=['POST'])
 @login_required
 def add_skill():
     """Add skill"""
-    skills_data = load_json_file('skills.json')
-    
     new_skill = {
-        'id': get_next_id(skills_data),
         'name': request.form.get('name'),
         'skill': request.form.get('skill'),
         'level': request.form.get('level'),
         'last_updated': request.form.get('last_updated', get_today())
     }
     
-    skills_data.append(new_skill)
-    save_json_file('skills.json', skills_data)
+    add_record('skills.json', new_skill)
     
     flash('Skill added successfully', 'success')
     return redirect(url_for('skills'))
 
 
-@app.route('/skills/edit/<int:skill_id>', methods=['POST'])
+@route('/skills/edit/<int:skill_id>', methods=['POST'])
 @login_required
 def edit_skill(skill_id):
     """Edit skill"""
-    skills_data = load_json_file('skills.json')
-    
-    for skill in skills_data:
-        if skill['id'] == skill_id:
-            skill['name'] = request.form.get('name')
-            skill['skill'] = request.form.get('skill')
-            skill['level'] = request.form.get('level')
-            skill['last_updated'] = request.form.get('last_updated')
-            break
+    skill = update_record('skills.json', skill_id, {
+        'name': request.form.get('name'),
+        'skill': request.form.get('skill'),
+        'level': request.form.get('level'),
+        'last_updated': request.form.get('last_updated')
+    })
+    if skill is None:
+        abort(404)
     
-    save_json_file('skills.json', skills_data)
     flash('Skill updated successfully', 'success')
     return redirect(url_for('skills'))
 
 
-@app.route('/skills/delete/<int:skill_id>')
+@route('/skills/delete/<int:skill_id>')
 @login_required
 def delete_skill(skill_id):
     """Delete skill"""
-    skills_data = load_json_file('skills.json')
-    skills_data = [s for s in skills_data if s['id'] != skill_id]
-    save_json_file('skills.json', skills_data)
+    if not delete_record('skills.json', skill_id):
+        abort(404)
     
     flash('Skill deleted successfully', 'success')
     return redirect(url_for('skills'))
@@ -719,23 +741,21 @@ def delete_skill(skill_id):
 # Meetings Routes
 # ============================================================================
 
-@app.route('/meetings')
+@route('/meetings')
 @login_required
 def meetings():
     """Meetings page"""
-    meetings_data = load_json_file('meetings.json')
-    meetings_data.sort(key=lambda x: x.get('date', ''), reverse=True)
-    return render_template('meetings.html', meetings=meetings_data)
+    def build_context():
+        page = paginate('meetings.json', sort_fields=('date', 'topic', 'owner', 'status'))
+        return {'meetings': page.items, 'page': page}
+    return render_cached_page('meetings.html', ('meetings.json',), build_context)
 
 
-@app.route('/meetings/add', methods=['POST'])
+@route('/meetings/add', methods=['POST'])
 @login_required
 def add_meeting():
     """Add meeting"""
-    meetings_data = load_json_file('meetings.json')
-    
     new_meeting = {
-        'id': get_next_id(meetings_data),
         'date': request.form.get('date'),
         'topic': request.form.get('topic'),
         'action_items': request.form.get('action_items'),
@@ -743,40 +763,36 @@ def add_meeting():
         'status': request.form.get('status')
     }
     
-    meetings_data.append(new_meeting)
-    save_json_file('meetings.json', meetings_data)
+    add_record('meetings.json', new_meeting)
     
     flash('Meeting added successfully', 'success')
     return redirect(url_for('meetings'))
 
 
-@app.route('/meetings/edit/<int:meeting_id>', methods=['POST'])
+@route('/meetings/edit/<int:meeting_id>', methods=['POST'])
 @login_required
 def edit_meeting(meeting_id):
     """Edit meeting"""
-    meetings_data = load_json_file('meetings.json')
-    
-    for meeting in meetings_data:
-        if meeting['id'] == meeting_id:
-            meeting['date'] = request.form.get('date')
-            meeting['topic'] = request.form.get('topic')
-            meeting['action_items'] = request.form.get('action_items')
-            meeting['owner'] = request.form.get('owner')
-            meeting['status'] = request.form.get('status')
-            break
-    
-    save_json_file('meetings.json', meetings_data)
+    meeting = update_record('meetings.json', meeting_id, {
+        'date': request.form.get('date'),
+        'topic': request.form.get('topic'),
+        'action_items': request.form.get('action_items'),
+        'owner': request.form.get('owner'),
+        'status': request.form.get('status')
+    })
+    if meeting is None:
+        abort(404)
+    
     flash('Meeting updated successfully', 'success')
     return redirect(url_for('meetings'))
 
 
-@app.route('/meetings/delete/<int:meeting_id>')
+@route('/meetings/delete/<int:meeting_id>')
 @login_required
 def delete_meeting(meeting_id):
     """Delete meeting"""
-    meetings_data = load_json_file('meetings.json')
-    meetings_data = [m for m in meetings_data if m['id'] != meeting_id]
-    save_json_file('meetings.json', meetings_data)
+    if not delete_record('meetings.json', meeting_id):
+        abort(404)
     
     flash('Meeting deleted successfully', 'success')
     return redirect(url_for('meetings'))
@@ -786,22 +802,19 @@ def delete_meeting(meeting_id):
 # Tasks Routes
 # ============================================================================
 
-@app.route('/tasks')
+@route('/tasks')
 @login_required
 def tasks():
     """Tasks page"""
-    tasks_data = load_json_file('tasks.json')
-    return render_template('tasks.html', tasks=tasks_data)
+    return render_cached_page('tasks.html', ('tasks.json',),
+                              lambda: {'tasks': iter_records('tasks.json')}, stream=True)
 
 
-@app.route('/tasks/add', methods=['POST'])
+@route('/tasks/add', methods=['POST'])
 @login_required
 def add_task():
     """Add task"""
-    tasks_data = load_json_file('tasks.json')
-    
     new_task = {
-        'id': get_next_id(tasks_data),
         'member_name': request.form.get('member_name'),
         'project': request.form.get('project'),
         'task_description': request.form.get('task_description'),
@@ -810,41 +823,37 @@ def add_task():
         'status': request.form.get('status')
     }
     
-    tasks_data.append(new_task)
-    save_json_file('tasks.json', tasks_data)
+    add_record('tasks.json', new_task)
     
     flash('Task added successfully', 'success')
     return redirect(url_for('tasks'))
 
 
-@app.route('/tasks/edit/<int:task_id>', methods=['POST'])
+@route('/tasks/edit/<int:task_id>', methods=['POST'])
 @login_required
 def edit_task(task_id):
     """Edit task"""
-    tasks_data = load_json_file('tasks.json')
-    
-    for task in tasks_data:
-        if task['id'] == task_id:
-            task['member_name'] = request.form.get('member_name')
-            task['project'] = request.form.get('project')
-            task['task_description'] = request.form.get('task_description')
-            task['start_date'] = request.form.get('start_date')
-            task['due_date'] = request.form.get('due_date')
-            task['status'] = request.form.get('status')
-            break
-    
-    save_json_file('tasks.json', tasks_data)
+    task = update_record('tasks.json', task_id, {
+        'member_name': request.form.get('member_name'),
+        'project': request.form.get('project'),
+        'task_description': request.form.get('task_description'),
+        'start_date': request.form.get('start_date'),
+        'due_date': request.form.get('due_date'),
+        'status': request.form.get('status')
+    })
+    if task is None:
+        abort(404)
+    
     flash('Task updated successfully', 'success')
     return redirect(url_for('tasks'))
 
 
-@app.route('/tasks/delete/<int:task_id>')
+@route('/tasks/delete/<int:task_id>')
 @login_required
 def delete_task(task_id):
     """Delete task"""
-    tasks_data = load_json_file('tasks.json')
-    tasks_data = [t for t in tasks_data if t['id'] != task_id]
-    save_json_file('tasks.json', tasks_data)
+    if not delete_record('tasks.json', task_id):
+        abort(404)
     
     flash('Task deleted successfully', 'success')
     return redirect(url_for('tasks'))
@@ -854,38 +863,321 @@ def delete_task(task_id):
 # API Routes (for AJAX calls)
 # ============================================================================
 
-@app.route('/api/jira/sync')
+@route('/api/jira/sync')
 @login_required
 def sync_jira():
-    """Sync Jira issues"""
-    issues = fetch_jira_issues()
-    return jsonify({'success': True, 'issues': issues, 'count': len(issues)})
+    """Return cached Jira issues, refreshing them in the background if stale"""
+    from jira_client import get_jira_issues, jira_cache
+    if request.args.get('refresh'):
+        jira_cache.refresh_in_background()
+    issues = get_jira_issues()
+    return jsonify({'success': True, 'issues': issues, 'count': len(issues), **jira_cache.status()})
+
+
+@route('/api/<collection>/search')
+@login_required
+def search_collection(collection):
+    """Search a collection by field filters, date range and free text"""
+    filename = f'{collection}.json'
+    if filename not in FILTER_FIELDS:
+        abort(404)
+    
+    date_field = get_date_field(filename)
+    sort_fields = ((date_field,) if date_field else ('id',)) + FILTER_FIELDS[filename]
+    page = paginate(filename, default_sort=f'-{sort_fields[0]}', sort_fields=sort_fields, always_search=True)
+    return jsonify({
+        'success': True,
+        'items': page.items,
+        'page': page.page,
+        'per_page': page.per_page,
+        'total': page.total,
+        'pages': page.pages
+    })
+
+
+@route('/api/<collection>/import', methods=['POST'])
+@admin_required
+def import_collection(collection):
+    """Bulk import CSV or NDJSON rows (uploaded as 'file' or sent as the body)"""
+    filename = f'{collection}.json'
+    if filename not in IMPORT_FIELDS:
+        abort(404)
+    
+    upload = request.files.get('file')
+    try:
+        if upload:
+            data_format = detect_format(upload.filename, upload.mimetype, request.args.get('format'))
+            stream = upload.stream
+        else:
+            data_format = detect_format(None, request.mimetype, request.args.get('format'))
+            stream = request.stream
+        result = import_records(filename, stream, data_format, defaults={
+            'posted_by': session.get('name'),
+            'last_updated': get_today()
+        })
+    except BulkImportError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, **result})
+
+
+@route('/api/<collection>/export')
+@login_required
+def export_collection(collection):
+    """Stream a collection as CSV or NDJSON"""
+    filename = f'{collection}.json'
+    data_format = request.args.get('format', 'csv')
+    if filename not in IMPORT_FIELDS or data_format not in FORMATS:
+        abort(404)
+    
+    mimetype = 'text/csv' if data_format == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_export(filename, data_format),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={collection}.{data_format}'}
+    )
 
 
-@app.route('/api/email/test')
+@route('/api/email/test')
 @login_required
 def test_email():
     """Test email functionality"""
-    result = send_email(
+    message = send_email(
         subject="Test Email from Team Dashboard",
         body="<h2>This is a test email</h2><p>If you received this, email is configured correctly.</p>"
     )
-    return jsonify({'success': result})
+    if message is None:
+        return jsonify({'success': False})
+    return jsonify({'success': True, 'id': message['id'], 'status': message['status']})
 
 
-@app.route('/api/email/send-summary')
+@route('/api/email/send-summary')
 @login_required
 def trigger_email_summary():
     """Manually trigger daily summary email"""
-    send_daily_summary()
-    return jsonify({'success': True, 'message': 'Daily summary email sent'})
+    message = send_daily_summary()
+    if message is None:
+        return jsonify({'success': False, 'message': 'Daily summary email could not be queued'})
+    return jsonify({'success': True, 'id': message['id'], 'message': 'Daily summary email queued'})
+
+
+@route('/api/email/send-digests')
+@admin_required
+def trigger_member_digests():
+    """Manually queue the personalized digest for every team member"""
+    from digests import send_member_digests
+    count = send_member_digests()
+    return jsonify({'success': count > 0, 'count': count, 'message': f'{count} digests queued'})
+
+
+@route('/api/email/outbox')
+@admin_required
+def email_outbox():
+    """Outbox queue depth and delivery counts"""
+    from mailer import outbox_status
+    return jsonify({'success': True, **outbox_status()})
+
+
+@route('/api/email/outbox/<int:message_id>')
+@login_required
+def email_outbox_message(message_id):
+    """Delivery status of one queued email"""
+    from mailer import get_message_status
+    message = get_message_status(message_id)
+    if message is None:
+        abort(404)
+    return jsonify({'success': True, 'message': message})
+
+
+# ============================================================================
+# REST API (v1)
+# ============================================================================
+# Reads carry an ETag and Last-Modified derived from the collection's version,
+# so a poll with If-None-Match / If-Modified-Since costs one metadata read and
+# returns 304 until the collection changes.
+
+def _api_collection(collection):
+    """Map a URL collection name to its data file, or 404"""
+    filename = f'{collection}.json'
+    if filename not in IMPORT_FIELDS:
+        abort(404)
+    return filename
+
+
+def _api_error(message, status):
+    return jsonify({'success': False, 'error': message}), status
+
+
+# Filled in from the session, as the add forms do, so clients cannot set them
+ATTRIBUTION_FIELDS = ('posted_by',)
+
+
+@route('/api/v1/<collection>')
+@login_required
+def api_list(collection):
+    """List a collection (paginated; accepts the search arguments)"""
+    filename = _api_collection(collection)
+    etag, last_modified = collection_validators(filename)
+    if is_not_modified(etag, last_modified):
+        return set_validators(Response(status=304), etag, last_modified)
+    
+    date_field = get_date_field(filename)
+    sort_fields = ('id',) + ((date_field,) if date_field else ()) + FILTER_FIELDS[filename]
+    page = paginate(filename, default_sort=f'-{date_field}' if date_field else 'id', sort_fields=sort_fields)
+    response = jsonify({
+        'success': True,
+        'items': page.items,
+        'page': page.page,
+        'per_page': page.per_page,
+        'total': page.total,
+        'pages': page.pages
+    })
+    return set_validators(response, etag, last_modified)
+
+
+@route('/api/v1/<collection>/<int:record_id>')
+@login_required
+def api_get(collection, record_id):
+    """Get one record"""
+    filename = _api_collection(collection)
+    etag, last_modified = collection_validators(filename)
+    if is_not_modified(etag, last_modified):
+        return set_validators(Response(status=304), etag, last_modified)
+    
+    record = get_record(filename, record_id)
+    if record is None:
+        return _api_error('Not found', 404)
+    return set_validators(jsonify({'success': True, 'item': record}), etag, last_modified)
+
+
+@route('/api/v1/<collection>', methods=['POST'])
+@login_required
+def api_create(collection):
+    """Create a record from a JSON object"""
+    filename = _api_collection(collection)
+    defaults = dict(IMPORT_DEFAULTS.get(filename, {}), last_updated=get_today())
+    record, error = validate_row(filename, request.get_json(silent=True), defaults)
+    if error:
+        return _api_error(error, 400)
+    for field in ATTRIBUTION_FIELDS:
+        if field in IMPORT_FIELDS[filename][0]:
+            record[field] = session.get('name', 'Unknown')
+    
+    record = add_record(filename, record)
+    response = jsonify({'success': True, 'item': record})
+    response.status_code = 201
+    response.headers['Location'] = url_for('api_get', collection=collection, record_id=record['id'])
+    return response
+
+
+@route('/api/v1/<collection>/<int:record_id>', methods=['PATCH'])
+@login_required
+def api_update(collection, record_id):
+    """Update some fields of a record"""
+    filename = _api_collection(collection)
+    fields, error = validate_update(filename, request.get_json(silent=True))
+    if error:
+        return _api_error(error, 400)
+    read_only = [field for field in ATTRIBUTION_FIELDS if field in fields]
+    if read_only:
+        return _api_error(f"Read-only fields: {', '.join(read_only)}", 400)
+    
+    record = update_record(filename, record_id, fields)
+    if record is None:
+        return _api_error('Not found', 404)
+    return jsonify({'success': True, 'item': record})
+
+
+@route('/api/v1/<collection>/<int:record_id>', methods=['DELETE'])
+@login_required
+def api_delete(collection, record_id):
+    """Delete a record"""
+    filename = _api_collection(collection)
+    if not delete_record(filename, record_id):
+        return _api_error('Not found', 404)
+    return '', 204
+
+
+# ============================================================================
+# Live Updates
+# ============================================================================
+
+@route('/api/stream', profile=False)
+@login_required
+def live_stream():
+    """Server-Sent Events: committed changes and fresh dashboard figures"""
+    slots = stream_slots(request.environ) if Config.SSE_ENABLED else 0
+    if not slots:
+        # 204 tells the browser not to reconnect
+        return '', 204
+    stream = open_stream(request.headers.get('Last-Event-ID'), slots)
+    if stream is None:
+        return Response('Too many live connections\n', status=503, mimetype='text/plain',
+                        headers={'Retry-After': '60'})
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# ============================================================================
+# Metrics
+# ============================================================================
+
+@route('/metrics')
+def metrics():
+    """Prometheus metrics of this process"""
+    if not Config.METRICS_ENABLED:
+        abort(404)
+    if Config.METRICS_TOKEN:
+        expected = f'Bearer {Config.METRICS_TOKEN}'.encode()
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+            return Response('Unauthorized\n', 401, {'WWW-Authenticate': 'Bearer'})
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+def record_request_time(exc=None):
+    started = g.pop('request_started', None)
+    if started is not None:
+        REQUEST_SECONDS.labels(request.endpoint or 'unmatched').observe(time.perf_counter() - started)
+
+
+# ============================================================================
+# Profiler
+# ============================================================================
+
+@route('/admin/profiles')
+@admin_required
+def admin_profiles():
+    """Recent request profiles (add ?profile=1 to any page to record one)"""
+    return render_template('admin_profiles.html', profiles=get_profile_store().list())
+
+
+@route('/admin/profiles/<int:profile_id>')
+@admin_required
+def admin_profile(profile_id):
+    """Top functions of one request profile"""
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        abort(404)
+    return render_template('admin_profile.html', profile=profile)
+
+
+@route('/admin/profiles/<int:profile_id>/collapsed')
+@admin_required
+def admin_profile_collapsed(profile_id):
+    """Download a profile as collapsed stacks for flame graph tools"""
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        abort(404)
+    return collapsed_download(profile)
 
 
 # ============================================================================
 # Template Filters
 # ============================================================================
 
-@app.template_filter('format_date')
 def format_date_filter(date_str):
     """Format date for display"""
     return format_date(date_str)
@@ -895,13 +1187,11 @@ def format_date_filter(date_str):
 # Error Handlers
 # ============================================================================
 
-@app.errorhandler(404)
 def not_found(error):
     """404 error handler"""
     return render_template('404.html'), 404
 
 
-@app.errorhandler(500)
 def internal_error(error):
     """500 error handler"""
     return render_template('500.html'), 500
@@ -912,4 +1202,4 @@ def internal_error(error):
 # ============================================================================
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,291 @@
+"""
+Authentication for Team Management Dashboard
+
+Passwords are stored as salted, tunable hashes:
+
+    scrypt$<n>$<r>$<p>$<salt hex>$<hash hex>
+    pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>
+
+PASSWORD_HASH_METHOD and its cost settings pick the algorithm used for new
+hashes. Legacy unsalted SHA-256 hashes (and hashes made with older cost
+settings) still verify, and are upgraded transparently on the next login.
+
+Logins look users up in an in-memory username index kept current from the
+storage change feed, and every attempt first takes a token from a per-IP
+and a per-username bucket, which caps the hashing work brute force can
+trigger. Measure the cost of the current settings with:
+
+    python auth.py benchmark
+"""
+import argparse
+import getpass
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+from config import Config
+from storage import get_storage
+
+
+LEGACY_HASH_LENGTH = 64  # unsalted SHA-256 hex digest
+
+
+# ============================================================================
+# Password Hashing
+# ============================================================================
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p,
+        maxmem=2 * 128 * n * r * p + 1024 * 1024, dklen=32
+    )
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+
+def hash_password(password):
+    """Hash a password with a random salt using the configured method"""
+    salt = os.urandom(16)
+    if Config.PASSWORD_HASH_METHOD == 'pbkdf2':
+        iterations = Config.PASSWORD_PBKDF2_ITERATIONS
+        return f"pbkdf2_sha256${iterations}${salt.hex()}${_pbkdf2(password, salt, iterations).hex()}"
+    n, r, p = Config.PASSWORD_SCRYPT_N, Config.PASSWORD_SCRYPT_R, Config.PASSWORD_SCRYPT_P
+    return f"scrypt${n}${r}${p}${salt.hex()}${_scrypt(password, salt, n, r, p).hex()}"
+
+
+def needs_rehash(stored):
+    """True if a stored hash was not made with the current method and cost"""
+    if Config.PASSWORD_HASH_METHOD == 'pbkdf2':
+        current = f"pbkdf2_sha256${Config.PASSWORD_PBKDF2_ITERATIONS}$"
+    else:
+        current = f"scrypt${Config.PASSWORD_SCRYPT_N}${Config.PASSWORD_SCRYPT_R}${Config.PASSWORD_SCRYPT_P}$"
+    return not stored.startswith(current)
+
+
+def verify_password(password, stored):
+    """Check a password against any supported stored hash"""
+    if not stored or password is None:
+        return False
+    try:
+        if stored.startswith('scrypt$'):
+            _, n, r, p, salt, expected = stored.split('$')
+            actual = _scrypt(password, bytes.fromhex(salt), int(n), int(r), int(p))
+        elif stored.startswith('pbkdf2_sha256$'):
+            _, iterations, salt, expected = stored.split('$')
+            actual = _pbkdf2(password, bytes.fromhex(salt), int(iterations))
+        elif len(stored) == LEGACY_HASH_LENGTH:
+            expected = stored
+            actual = hashlib.sha256(password.encode()).digest()
+        else:
+            return False
+        return hmac.compare_digest(actual.hex(), expected)
+    except ValueError:
+        print("Unrecognized password hash format")
+        return False
+
+
+# Verified against when the username is unknown, so that response time does
+# not reveal which usernames exist
+_dummy_hash = None
+
+
+def _get_dummy_hash():
+    global _dummy_hash
+    if _dummy_hash is None or needs_rehash(_dummy_hash):
+        _dummy_hash = hash_password(os.urandom(16).hex())
+    return _dummy_hash
+
+
+# ============================================================================
+# Users Index
+# ============================================================================
+
+class UserIndex:
+    """Users keyed by username, kept current from the storage change feed"""
+
+    def __init__(self):
+        self.version = None
+        self.users = {}
+        self._lock = threading.Lock()
+
+    def rebuild(self, storage):
+        with self._lock:
+            version = storage.version('users.json')
+            self.users = {
+                user['username']: user
+                for user in storage.load('users.json') if user.get('username')
+            }
+            self.version = version
+
+    def apply(self, filename, version, changes):
+        if filename != 'users.json':
+            return
+        with self._lock:
+            if changes is None or self.version is None or version != self.version + 1:
+                self.version = None
+                return
+            for record_id, old, new in changes:
+                if old is not None:
+                    current = self.users.get(old.get('username'))
+                    if current is not None and current.get('id') == record_id:
+                        del self.users[old['username']]
+                if new is not None and new.get('username'):
+                    self.users[new['username']] = new
+            self.version = version
+
+    def get(self, username):
+        with self._lock:
+            user = self.users.get(username)
+            return dict(user) if user is not None else None
+
+
+_user_index = None
+_user_index_lock = threading.Lock()
+
+
+def get_user_index():
+    """Return the up-to-date username index"""
+    global _user_index
+    storage = get_storage()
+    with _user_index_lock:
+        if _user_index is None:
+            _user_index = UserIndex()
+            storage.subscribe(_user_index.apply)
+    if _user_index.version is None or _user_index.version != storage.version('users.json'):
+        _user_index.rebuild(storage)
+    return _user_index
+
+
+def get_user_by_username(username):
+    """Return a user record by username, or None"""
+    return get_user_index().get(username)
+
+
+# ============================================================================
+# Login Rate Limiting
+# ============================================================================
+
+class TokenBucketLimiter:
+    """Per-key token buckets: `capacity` attempts, refilled over `window` seconds"""
+
+    def __init__(self, capacity, window):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self._buckets = {}  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """Take a token for key; False when its bucket is empty"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > 10000:
+                self._prune(now)
+            return allowed
+
+    def _prune(self, now):
+        """Forget buckets that have refilled completely"""
+        full_after = self.capacity / self.rate
+        for key in [key for key, (_, updated) in self._buckets.items() if now - updated > full_after]:
+            del self._buckets[key]
+
+    def refund(self, key):
+        """Give back a token taken by allow()"""
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(self.capacity, tokens + 1), updated)
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+ip_limiter = TokenBucketLimiter(Config.LOGIN_RATE_LIMIT_IP, Config.LOGIN_RATE_WINDOW)
+user_limiter = TokenBucketLimiter(Config.LOGIN_RATE_LIMIT_USER, Config.LOGIN_RATE_WINDOW)
+
+
+def _user_key(ip, username):
+    # Per client address too, so nobody can lock an account out from elsewhere
+    return ((username or '').lower(), ip)
+
+
+def login_allowed(ip, username):
+    """Take a login attempt token for the client IP and for the username from that IP
+
+    Tokens are taken before the password is checked, so concurrent guesses
+    cannot all slip past the limit; login_succeeded() gives them back.
+    """
+    if not ip_limiter.allow(ip):
+        return False
+    if not user_limiter.allow(_user_key(ip, username)):
+        ip_limiter.refund(ip)
+        return False
+    return True
+
+
+def login_succeeded(ip, username):
+    """Only failed logins count against the limits"""
+    ip_limiter.refund(ip)
+    user_limiter.reset(_user_key(ip, username))
+
+
+def authenticate(username, password):
+    """Return the user for valid credentials (upgrading an outdated hash), else None"""
+    user = get_user_by_username(username)
+    if user is None:
+        verify_password(password or '', _get_dummy_hash())
+        return None
+    if not verify_password(password, user.get('password')):
+        return None
+    if needs_rehash(user['password']):
+        try:
+            get_storage().update('users.json', user['id'], {'password': hash_password(password)})
+        except Exception as e:
+            print(f"Error upgrading password hash: {e}")
+    return user
+
+
+# ============================================================================
+# Command Line
+# ============================================================================
+
+def benchmark(rounds=5):
+    """Average seconds to hash and to verify one password with current settings"""
+    started = time.perf_counter()
+    hashes = [hash_password('benchmark-password') for _ in range(rounds)]
+    hashed = time.perf_counter()
+    for stored in hashes:
+        verify_password('benchmark-password', stored)
+    verified = time.perf_counter()
+    return (hashed - started) / rounds, (verified - hashed) / rounds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Password hashing tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('hash', help='print a hash for a password read from the prompt')
+    bench = commands.add_parser('benchmark', help='time hashing with the current settings')
+    bench.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == 'hash':
+        print(hash_password(getpass.getpass('Password: ')))
+    else:
+        hash_seconds, verify_seconds = benchmark(args.rounds)
+        print(f"method: {Config.PASSWORD_HASH_METHOD}")
+        print(f"hash:   {hash_seconds * 1000:.1f} ms")
+        print(f"verify: {verify_seconds * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
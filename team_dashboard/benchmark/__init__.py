@@ -0,0 +1,13 @@
+"""
+End-to-end benchmarks for Team Management Dashboard
+
+Generates synthetic collections at a chosen scale in a scratch data
+directory, drives every route through the Flask test client and a
+multi-threaded HTTP load driver, and writes latency percentiles, throughput
+and peak RSS as JSON that can be compared across commits. Run from the
+team_dashboard directory:
+
+    python -m benchmark run --rows 10000
+    python -m benchmark run --rows 100000 --backend sqlite --concurrency 16
+    python -m benchmark compare benchmark/results/before.json benchmark/results/after.json
+"""
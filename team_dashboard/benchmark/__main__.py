@@ -0,0 +1,173 @@
+"""
+Command line for the benchmark suite: python -m benchmark run|compare
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(APP_DIR, 'benchmark', 'results')
+
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from bulk import IMPORT_FIELDS
+from config import Config
+from benchmark.drivers import (
+    use_data_dir, build_operations, login_cookie, run_test_client, run_http, peak_rss_mb
+)
+from benchmark.synthetic import RecordFactory, generate, member_names
+
+
+COLUMNS = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps')
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git checkout"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'operation':<36} {'driver':<12} {'req':>6} {'err':>5} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    for result in results:
+        values = [result[column] if result[column] is not None else float('nan') for column in COLUMNS]
+        print(f"{result['operation']:<36} {result['driver']:<12} {result['requests']:>6} "
+              f"{result['errors']:>5} {values[0]:>9.2f} {values[1]:>9.2f} {values[2]:>9.2f} {values[3]:>9.1f}")
+
+
+def run(args):
+    collections = args.collections.split(',') if args.collections else list(IMPORT_FIELDS)
+    unknown = [name for name in collections if name not in IMPORT_FIELDS]
+    if unknown:
+        print(f"Unknown collections: {', '.join(unknown)}")
+        return 2
+
+    data_dir = tempfile.mkdtemp(prefix='dashboard-benchmark-')
+    use_data_dir(data_dir, args.backend)
+    if args.no_cache:
+        Config.FRAGMENT_CACHE_ENABLED = False
+    if args.no_journal:
+        Config.JOURNAL_ENABLED = False
+    from app import create_app
+
+    try:
+        print(f"Generating {args.rows} rows per collection in {data_dir} ({args.backend})...")
+        generate_seconds = generate(args.rows, args.members, collections, args.seed)
+        app = create_app(start_services=False)
+        cookie = login_cookie(app)
+        factory = RecordFactory(member_names(args.members), args.seed + 1)
+        operations = build_operations(factory, collections)
+        if args.operations:
+            operations = [op for op in operations if any(part in op[0] for part in args.operations.split(','))]
+
+        results = []
+        started = time.perf_counter()
+        if args.driver in ('test_client', 'both'):
+            results += run_test_client(app, operations, cookie, args.requests, args.max_seconds)
+        if args.driver in ('http', 'both'):
+            results += run_http(app, operations, cookie, args.requests, args.concurrency, args.max_seconds)
+
+        report = {
+            'commit': git_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'settings': {
+                'backend': args.backend, 'rows': args.rows, 'members': args.members,
+                'collections': collections, 'requests': args.requests,
+                'concurrency': args.concurrency, 'max_seconds': args.max_seconds,
+                'fragment_cache': Config.FRAGMENT_CACHE_ENABLED, 'journal': Config.JOURNAL_ENABLED,
+                'seed': args.seed
+            },
+            'generate_seconds': {name: round(seconds, 3) for name, seconds in generate_seconds.items()},
+            'run_seconds': round(time.perf_counter() - started, 3),
+            'peak_rss_mb': peak_rss_mb(),
+            'results': results
+        }
+        output = args.output or os.path.join(
+            RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['commit'] or 'local'}-{args.backend}-{args.rows}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        print_results(results)
+        if report['peak_rss_mb'] is not None:
+            print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+        print(f"Results written to {output}")
+    finally:
+        if args.keep_data:
+            print(f"Benchmark data kept in {data_dir}")
+        else:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    return 0
+
+
+def compare(args):
+    """Print the change of each operation's latency and throughput between two runs"""
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    baseline = {(r['operation'], r['driver']): r for r in before['results']}
+
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    print(f"{'operation':<36} {'driver':<12} " + ' '.join(f"{column:>22}" for column in COLUMNS))
+    for result in after['results']:
+        old = baseline.get((result['operation'], result['driver']))
+        if old is None:
+            continue
+        cells = []
+        for column in COLUMNS:
+            if old[column] is None or result[column] is None:
+                cells.append(f"{'-':>22}")
+                continue
+            change = (result[column] - old[column]) / old[column] * 100 if old[column] else 0.0
+            cells.append(f"{old[column]:>8.2f} {result[column]:>8.2f} {change:>+4.0f}%")
+        print(f"{result['operation']:<36} {result['driver']:<12} " + ' '.join(cells))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description='Benchmark every route')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    bench = commands.add_parser('run', help='generate data, drive the routes and write a JSON report')
+    bench.add_argument('--rows', type=int, default=1000, help='records per collection (1k to 1M)')
+    bench.add_argument('--members', type=int, default=50, help='team members to generate')
+    bench.add_argument('--backend', choices=('json', 'sqlite'), default=Config.STORAGE_BACKEND)
+    bench.add_argument('--collections', help='comma-separated collections, e.g. leaves.json,tasks.json')
+    bench.add_argument('--operations', help='only run operations containing one of these comma-separated strings')
+    bench.add_argument('--driver', choices=('test_client', 'http', 'both'), default='both')
+    bench.add_argument('--requests', type=int, default=100, help='requests per operation and driver')
+    bench.add_argument('--concurrency', type=int, default=8, help='client threads of the HTTP driver')
+    bench.add_argument('--max-seconds', type=float, default=30, help='time limit per operation and driver')
+    bench.add_argument('--no-cache', action='store_true', help='disable the rendered page cache')
+    bench.add_argument('--no-journal', action='store_true',
+                       help='JSON backend: rewrite the data file on every write instead of journaling')
+    bench.add_argument('--seed', type=int, default=0)
+    bench.add_argument('--output', help='JSON report path (default: benchmark/results/...)')
+    bench.add_argument('--keep-data', action='store_true', help='keep the generated data directory')
+
+    diff = commands.add_parser('compare', help='compare two JSON reports')
+    diff.add_argument('before')
+    diff.add_argument('after')
+
+    args = parser.parse_args(argv)
+    return run(args) if args.command == 'run' else compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Benchmark drivers
+
+Every list, add, edit and delete route of each collection, plus /dashboard,
+is run as one operation. An operation is driven either in-process through
+the Flask test client (one request at a time, no network) or over HTTP by a
+pool of client threads against a threaded server on a local port.
+
+All requests reuse one logged-in session cookie and ignore the cookies
+they get back, so flash messages do not pile up in the session.
+"""
+import http.client
+import itertools
+import math
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from bulk import IMPORT_FIELDS
+from config import Config
+from storage import get_storage
+
+from benchmark.synthetic import BENCHMARK_PASSWORD
+
+
+def use_data_dir(data_dir, backend='json'):
+    """Point the app at a benchmark data directory (before storage is first used)"""
+    Config.DATA_DIR = data_dir
+    Config.SQLITE_PATH = os.path.join(data_dir, 'dashboard.db')
+    Config.STORAGE_BACKEND = backend
+    Config.SCHEDULER_MODE = 'off'
+    Config.EMAIL_ENABLED = False
+    Config.JIRA_ENABLED = False
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(operation, driver, latencies, errors, elapsed):
+    """Latency percentiles (ms) and throughput of one operation run"""
+    latencies = sorted(latencies)
+    to_ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        'operation': operation,
+        'driver': driver,
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': to_ms(percentile(latencies, 50)),
+        'p95_ms': to_ms(percentile(latencies, 95)),
+        'p99_ms': to_ms(percentile(latencies, 99)),
+        'mean_ms': to_ms(sum(latencies) / len(latencies)) if latencies else None,
+        'max_ms': to_ms(latencies[-1]) if latencies else None,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+class _IdPool:
+    """Hands out record ids to edit and to delete without handing one out twice"""
+
+    def __init__(self, ids):
+        half = len(ids) // 2
+        self._to_delete = iter(ids[:half])
+        self._to_edit = ids[half:] or ids
+        self._lock = threading.Lock()
+        self._edits = itertools.count()
+
+    def delete_id(self):
+        with self._lock:
+            return next(self._to_delete)  # StopIteration once all are used
+
+    def edit_id(self):
+        if not self._to_edit:
+            raise StopIteration
+        return self._to_edit[next(self._edits) % len(self._to_edit)]
+
+
+def build_operations(factory, collections=None):
+    """Return the benchmarked operations as (name, method, make_request)
+
+    make_request() returns (path, form data or None) and raises
+    StopIteration when the operation has nothing left to work on.
+    """
+    storage = get_storage()
+    operations = [('GET /dashboard', 'GET', lambda: ('/dashboard', None))]
+    for filename in collections or IMPORT_FIELDS:
+        name = filename[:-5]
+        pool = _IdPool([record['id'] for record in storage.iter_records(filename)])
+        counter = itertools.count(1)
+
+        def list_page(name=name):
+            return f'/{name}', None
+
+        def add(name=name, filename=filename, counter=counter):
+            return f'/{name}/add', factory.make(filename, next(counter))
+
+        def edit(name=name, filename=filename, pool=pool, counter=counter):
+            return f'/{name}/edit/{pool.edit_id()}', factory.make(filename, next(counter))
+
+        def delete(name=name, pool=pool):
+            return f'/{name}/delete/{pool.delete_id()}', None
+
+        operations += [
+            (f'GET /{name}', 'GET', list_page),
+            (f'POST /{name}/add', 'POST', add),
+            (f'POST /{name}/edit/<id>', 'POST', edit),
+            (f'GET /{name}/delete/<id>', 'GET', delete),
+        ]
+    return operations
+
+
+def login_cookie(app):
+    """Log in as the benchmark admin and return the session Cookie header"""
+    client = app.test_client()
+    response = client.post('/login', data={'username': 'admin', 'password': BENCHMARK_PASSWORD},
+                           follow_redirects=True)
+    cookie = client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    if response.status_code != 200 or cookie is None:
+        raise RuntimeError('Could not log in as the benchmark admin')
+    return f"{cookie.key}={cookie.value}"
+
+
+def run_test_client(app, operations, cookie, requests=100, max_seconds=30):
+    """Drive each operation sequentially through the Flask test client"""
+    client = app.test_client(use_cookies=False)
+    results = []
+    for name, method, make_request in operations:
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            try:
+                path, form = make_request()
+            except StopIteration:
+                break
+            sent = time.perf_counter()
+            response = client.open(path, method=method, data=form, headers={'Cookie': cookie})
+            response.get_data()  # read streamed pages to the end
+            latencies.append(time.perf_counter() - sent)
+            if response.status_code >= 400:
+                errors += 1
+            if time.perf_counter() - started > max_seconds:
+                break
+        results.append(summarize(name, 'test_client', latencies, errors, time.perf_counter() - started))
+    return results
+
+
+class _QuietHandler(WSGIRequestHandler):
+    """Keep-alive request handler that does not log every request"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def _http_worker(port, method, make_request, cookie, claim, deadline, record):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        while claim() and time.perf_counter() < deadline:
+            try:
+                path, form = make_request()
+            except StopIteration:
+                return
+            headers = {'Cookie': cookie}
+            body = None
+            if form is not None:
+                body = urlencode(form)
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            sent = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                status = None
+            record(time.perf_counter() - sent, status is None or status >= 400)
+    finally:
+        conn.close()
+
+
+def run_http(app, operations, cookie, requests=100, concurrency=8, max_seconds=30):
+    """Drive each operation with `concurrency` client threads over real HTTP"""
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_QuietHandler)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    results = []
+    try:
+        for name, method, make_request in operations:
+            latencies = []
+            errors = [0]
+            lock = threading.Lock()
+            claimed = itertools.count()
+
+            def claim():
+                return next(claimed) < requests
+
+            def record(latency, failed):
+                with lock:
+                    latencies.append(latency)
+                    errors[0] += failed
+
+            started = time.perf_counter()
+            workers = [
+                threading.Thread(target=_http_worker, args=(
+                    server.server_port, method, make_request, cookie, claim,
+                    started + max_seconds, record))
+                for _ in range(concurrency)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            results.append(summarize(name, 'http', latencies, errors[0], time.perf_counter() - started))
+    finally:
+        server.shutdown()
+    return results
@@ -0,0 +1,151 @@
+"""
+Synthetic data for benchmarks
+
+Builds realistic records for every collection - dates spread around today,
+the same option values the forms offer, and work spread over a pool of team
+members - and writes them through the storage layer in large batches.
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from auth import hash_password
+from bulk import IMPORT_FIELDS
+from config import Config
+from storage import get_storage
+
+
+BENCHMARK_PASSWORD = 'benchmark'
+
+FIRST_NAMES = ('Alex', 'Sam', 'Priya', 'Chen', 'Maria', 'Omar', 'Jana', 'Liam', 'Aiko', 'Noah',
+               'Fatima', 'Lucas', 'Elena', 'Ravi', 'Grace', 'Tomas', 'Amara', 'Jonas', 'Mei', 'Diego')
+LAST_NAMES = ('Smith', 'Kumar', 'Garcia', 'Wang', 'Novak', 'Okafor', 'Silva', 'Muller', 'Tanaka',
+              'Haddad', 'Jensen', 'Rossi', 'Kim', 'Dubois', 'Ivanova', 'Brown', 'Costa', 'Ali')
+WORDS = ('login', 'report', 'export', 'regression', 'checkout', 'search', 'upload', 'billing',
+         'dashboard', 'api', 'latency', 'cache', 'install', 'upgrade', 'mobile', 'payment')
+
+LEAVE_TYPES = ('Leave', 'Work From Home', 'Sick Leave', 'Personal Leave')
+APPROVAL_STATUSES = ('pending', 'approved', 'rejected')
+ACCOMPLISHMENT_TYPES = ('Feature Test', 'Automation Improvement', 'Support Task', 'Bug Fix', 'Performance')
+CONDITIONS = ('Excellent', 'Good', 'Fair', 'Poor')
+SERVER_STATUSES = ('available', 'in use')
+ENVIRONMENTS = ('Development', 'Testing', 'Staging', 'Production')
+BUILD_STATUSES = ('testing', 'release', 'deprecated')
+LINK_CATEGORIES = ('CI/CD', 'Project Management', 'Documentation', 'Communication',
+                   'Version Control', 'Test Management')
+EVENT_TYPES = ('Birthday', 'Work Anniversary', 'Achievement', 'Milestone', 'Award')
+SKILLS = ('Selenium', 'Python', 'API Testing', 'JMeter', 'SQL', 'Docker', 'Jenkins', 'Appium')
+SKILL_LEVELS = ('beginner', 'intermediate', 'expert')
+WORK_STATUSES = ('pending', 'in progress', 'completed')
+
+DATE_SPREAD_DAYS = 365  # records are dated up to this many days either side of today
+
+
+def member_names(count):
+    """Return count distinct 'First Last' names"""
+    names = []
+    suffix = 0
+    while len(names) < count:
+        for last in LAST_NAMES:
+            for first in FIRST_NAMES:
+                names.append(f"{first} {last} {suffix}" if suffix else f"{first} {last}")
+        suffix += 1
+    return names[:count]
+
+
+class RecordFactory:
+    """Builds realistic records for each collection from a seeded random source"""
+
+    def __init__(self, members, seed=0):
+        self.members = members
+        self.random = random.Random(seed)
+        self.today = date.today()
+
+    def _date(self):
+        offset = self.random.randint(-DATE_SPREAD_DAYS, DATE_SPREAD_DAYS)
+        return (self.today + timedelta(days=offset)).strftime(Config.DATE_FORMAT)
+
+    def _text(self, words=6):
+        return ' '.join(self.random.choice(WORDS) for _ in range(words)).capitalize()
+
+    def _member(self):
+        return self.random.choice(self.members)
+
+    def make(self, filename, n):
+        """Build the n-th synthetic record of a collection"""
+        choice = self.random.choice
+        if filename == 'leaves.json':
+            return {'name': self._member(), 'date': self._date(), 'type': choice(LEAVE_TYPES),
+                    'reason': self._text(3), 'approval_status': choice(APPROVAL_STATUSES)}
+        if filename == 'accomplishments.json':
+            return {'date': self._date(), 'member_name': self._member(),
+                    'description': self._text(8), 'impact': self._text(4),
+                    'type': choice(ACCOMPLISHMENT_TYPES)}
+        if filename == 'inventory.json':
+            return {'item_name': f"{choice(('Laptop', 'Monitor', 'Phone', 'Tablet'))} {n}",
+                    'assigned_to': self._member(), 'serial_no': f"SN{n:08d}",
+                    'condition': choice(CONDITIONS), 'remarks': self._text(3)}
+        if filename == 'servers.json':
+            return {'server_name': f"qa-server-{n:05d}", 'ip': f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}",
+                    'os': choice(('Ubuntu 22.04', 'Windows Server 2022', 'RHEL 9')),
+                    'purpose': self._text(3), 'assigned_team': choice(('QA', 'Automation', 'Performance')),
+                    'attached_devices': '', 'status': choice(SERVER_STATUSES)}
+        if filename == 'builds.json':
+            return {'build_name': f"App {choice(('Android', 'iOS', 'Web'))}", 'version': f"{n // 100}.{n % 100}.0",
+                    'date': self._date(), 'environment': choice(ENVIRONMENTS),
+                    'status': choice(BUILD_STATUSES), 'changelog_url': f"https://example.com/changelog/{n}"}
+        if filename == 'links.json':
+            return {'title': f"{self._text(2)} {n}", 'url': f"https://example.com/{n}",
+                    'category': choice(LINK_CATEGORIES), 'description': self._text(6)}
+        if filename == 'announcements.json':
+            return {'date': self._date(), 'title': self._text(4), 'message': self._text(20),
+                    'posted_by': self._member()}
+        if filename == 'celebrations.json':
+            return {'date': self._date(), 'member_name': self._member(), 'event_type': choice(EVENT_TYPES),
+                    'message': self._text(6), 'photo_url': ''}
+        if filename == 'skills.json':
+            return {'name': self._member(), 'skill': choice(SKILLS), 'level': choice(SKILL_LEVELS),
+                    'last_updated': self._date()}
+        if filename == 'meetings.json':
+            return {'date': self._date(), 'topic': self._text(4), 'action_items': self._text(10),
+                    'owner': self._member(), 'status': choice(WORK_STATUSES)}
+        if filename == 'tasks.json':
+            return {'member_name': self._member(), 'project': choice(('Web', 'Mobile', 'API')),
+                    'task_description': self._text(8), 'start_date': self._date(),
+                    'due_date': self._date(), 'status': choice(WORK_STATUSES)}
+        raise ValueError(f"No synthetic records for {filename}")
+
+    def make_user(self, name, password):
+        """Build a team member account"""
+        username = name.lower().replace(' ', '.')
+        return {'username': username, 'password': password, 'role': 'member',
+                'name': name, 'email': f"{username}@example.com"}
+
+
+def generate(rows=1000, members=50, collections=None, seed=0, batch_size=50000):
+    """Fill the configured storage with synthetic data
+
+    Writes an admin user (password BENCHMARK_PASSWORD), `members` team
+    members and `rows` records in each collection. Returns the seconds
+    spent per collection.
+    """
+    storage = get_storage()
+    names = member_names(members)
+    factory = RecordFactory(names, seed)
+    timings = {}
+
+    started = time.perf_counter()
+    password = hash_password(BENCHMARK_PASSWORD)
+    users = [{'username': 'admin', 'password': password, 'role': 'admin',
+              'name': 'Benchmark Admin', 'email': 'admin@example.com'}]
+    users += [factory.make_user(name, password) for name in names]
+    storage.insert_many('users.json', users)
+    timings['users.json'] = time.perf_counter() - started
+
+    for filename in collections or IMPORT_FIELDS:
+        started = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            count = min(batch_size, rows - offset)
+            storage.insert_many(filename, [factory.make(filename, offset + n + 1) for n in range(count)])
+        timings[filename] = time.perf_counter() - started
+    return timings
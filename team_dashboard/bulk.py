@@ -0,0 +1,222 @@
+"""
+Bulk import and export for Team Management Dashboard
+
+Imports accept CSV (with a header row) or NDJSON (one JSON object per line)
+and are parsed as a stream. Each row is validated on its own; valid rows are
+given ids in one batch and committed in a single write, and rejected rows
+are reported back with their line numbers.
+
+Exports stream the collection row by row from a generator, so the response
+is never built in memory as a whole.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+
+from config import Config
+from storage import get_storage
+
+
+# Columns of each collection, and the ones an imported row must fill in
+IMPORT_FIELDS = {
+    'leaves.json': (
+        ('name', 'date', 'type', 'reason', 'approval_status'),
+        ('name', 'date', 'type')),
+    'accomplishments.json': (
+        ('date', 'member_name', 'description', 'impact', 'type'),
+        ('date', 'member_name', 'description')),
+    'inventory.json': (
+        ('item_name', 'assigned_to', 'serial_no', 'condition', 'remarks'),
+        ('item_name',)),
+    'servers.json': (
+        ('server_name', 'ip', 'os', 'purpose', 'assigned_team', 'attached_devices', 'status'),
+        ('server_name',)),
+    'builds.json': (
+        ('build_name', 'version', 'date', 'environment', 'status', 'changelog_url'),
+        ('build_name', 'version')),
+    'links.json': (
+        ('title', 'url', 'category', 'description'),
+        ('title', 'url')),
+    'announcements.json': (
+        ('date', 'title', 'message', 'posted_by'),
+        ('date', 'title', 'message')),
+    'celebrations.json': (
+        ('date', 'member_name', 'event_type', 'message', 'photo_url'),
+        ('date', 'member_name', 'event_type')),
+    'skills.json': (
+        ('name', 'skill', 'level', 'last_updated'),
+        ('name', 'skill', 'level')),
+    'meetings.json': (
+        ('date', 'topic', 'action_items', 'owner', 'status'),
+        ('date', 'topic')),
+    'tasks.json': (
+        ('member_name', 'project', 'task_description', 'start_date', 'due_date', 'status'),
+        ('member_name', 'task_description')),
+}
+
+# Values filled in when an imported row leaves a column empty (as the add forms do)
+IMPORT_DEFAULTS = {
+    'leaves.json': {'approval_status': 'pending'},
+    'celebrations.json': {'photo_url': ''},
+}
+
+DATE_COLUMNS = ('date', 'start_date', 'due_date', 'last_updated')
+
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ('csv', 'ndjson')
+
+
+class BulkImportError(ValueError):
+    """Raised when an upload cannot be parsed at all"""
+
+
+def detect_format(filename=None, mimetype=None, requested=None):
+    """Pick 'csv' or 'ndjson' from an explicit choice, file extension or MIME type"""
+    if requested:
+        if requested not in FORMATS:
+            raise BulkImportError(f"Unsupported format: {requested}")
+        return requested
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in (mimetype or ''):
+        return 'ndjson'
+    return 'csv'
+
+
+def _iter_csv(stream):
+    """Yield (line number, row dict) from a CSV byte stream"""
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _iter_ndjson(stream):
+    """Yield (line number, object) from an NDJSON byte stream"""
+    for line_num, line in enumerate(codecs.iterdecode(stream, 'utf-8-sig'), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_num, e
+
+
+def _check_dates(record):
+    """Return an error message if a date column is not YYYY-MM-DD"""
+    for field in DATE_COLUMNS:
+        value = record.get(field)
+        if value:
+            try:
+                datetime.strptime(str(value), Config.DATE_FORMAT)
+            except ValueError:
+                return f"Invalid {field} '{value}' (expected YYYY-MM-DD)"
+    return None
+
+
+def validate_row(filename, row, defaults):
+    """Return (record, None) for a valid row or (None, error message)"""
+    if isinstance(row, Exception):
+        return None, f"Invalid JSON: {row}"
+    if not isinstance(row, dict):
+        return None, "Row is not an object"
+    fields, required = IMPORT_FIELDS[filename]
+    record = {}
+    for field in fields:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, '') and field in defaults:
+            value = defaults[field]
+        record[field] = value
+    missing = [field for field in required if not record.get(field)]
+    if missing:
+        return None, f"Missing {', '.join(missing)}"
+    error = _check_dates(record)
+    if error:
+        return None, error
+    return record, None
+
+
+def validate_update(filename, fields):
+    """Return (fields, None) if a partial update is valid, else (None, error message)"""
+    if not isinstance(fields, dict):
+        return None, "Body must be a JSON object"
+    columns, required = IMPORT_FIELDS[filename]
+    unknown = sorted(set(fields) - set(columns))
+    if unknown:
+        return None, f"Unknown fields: {', '.join(unknown)}"
+    cleared = [field for field in required if field in fields and not fields[field]]
+    if cleared:
+        return None, f"Missing {', '.join(cleared)}"
+    error = _check_dates(fields)
+    if error:
+        return None, error
+    return fields, None
+
+
+def import_records(filename, stream, data_format='csv', defaults=None):
+    """Validate an upload row by row and commit the valid rows in one write
+
+    Returns {'imported': count, 'rejected': count, 'errors': [...]}, listing
+    at most MAX_REPORTED_ERRORS rejected rows.
+    """
+    if filename not in IMPORT_FIELDS:
+        raise BulkImportError(f"Collection does not support import: {filename}")
+    defaults = dict(IMPORT_DEFAULTS.get(filename, {}), **(defaults or {}))
+    rows = _iter_ndjson(stream) if data_format == 'ndjson' else _iter_csv(stream)
+
+    records = []
+    errors = []
+    rejected = 0
+    try:
+        for line_num, row in rows:
+            record, error = validate_row(filename, row, defaults)
+            if error:
+                rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line_num, 'error': error})
+            else:
+                records.append(record)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise BulkImportError(f"Could not parse upload: {e}") from e
+
+    get_storage().insert_many(filename, records)
+    return {'imported': len(records), 'rejected': rejected, 'errors': errors}
+
+
+def export_columns(filename):
+    """Return the columns written for a collection, id first"""
+    return ('id',) + IMPORT_FIELDS[filename][0]
+
+
+def stream_export(filename, data_format='csv', batch_size=500):
+    """Yield an export of a collection in chunks of about batch_size rows"""
+    records = get_storage().iter_records(filename)
+    if data_format == 'ndjson':
+        chunk = []
+        for record in records:
+            chunk.append(json.dumps(record, default=str))
+            if len(chunk) >= batch_size:
+                yield '\n'.join(chunk) + '\n'
+                chunk = []
+        if chunk:
+            yield '\n'.join(chunk) + '\n'
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=export_columns(filename), extrasaction='ignore')
+    writer.writeheader()
+    rows = 0
+    for record in records:
+        writer.writerow(record)
+        rows += 1
+        if rows >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -17,32 +17,116 @@ class Config:
     # Data Directory
     DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
     
+    # Password Hashing ('scrypt' or 'pbkdf2'; higher cost = slower logins)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt').lower()
+    PASSWORD_SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 14))
+    PASSWORD_SCRYPT_R = 8
+    PASSWORD_SCRYPT_P = 1
+    PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 600000))
+    
+    # Login Rate Limiting (token buckets refilled over LOGIN_RATE_WINDOW seconds)
+    LOGIN_RATE_LIMIT_IP = int(os.environ.get('LOGIN_RATE_LIMIT_IP', 20))
+    LOGIN_RATE_LIMIT_USER = int(os.environ.get('LOGIN_RATE_LIMIT_USER', 5))
+    LOGIN_RATE_WINDOW = 300
+    
+    # Reverse proxies in front of the app; their X-Forwarded-For gives the client
+    # address the login limits are kept for (0 = clients connect directly)
+    PROXY_FIX_HOPS = int(os.environ.get('PROXY_FIX_HOPS', 0))
+    
+    # Storage Backend ('json' or 'sqlite')
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'json').lower()
+    SQLITE_PATH = os.environ.get('SQLITE_PATH', os.path.join(DATA_DIR, 'dashboard.db'))
+    
+    # JSON backend: append each write to '<collection>.journal' instead of rewriting the file
+    JOURNAL_ENABLED = os.environ.get('JOURNAL_ENABLED', 'True').lower() == 'true'
+    # Fold a journal into its snapshot once it is larger than this and than the snapshot
+    JOURNAL_COMPACT_BYTES = int(os.environ.get('JOURNAL_COMPACT_BYTES', 4 * 1024 * 1024))
+    JOURNAL_COMPACT_INTERVAL = int(os.environ.get('JOURNAL_COMPACT_INTERVAL', 3600))  # seconds
+    JOURNAL_ARCHIVES = int(os.environ.get('JOURNAL_ARCHIVES', 10))  # compacted journals kept
+    
     # Email Configuration (Gmail SMTP)
     EMAIL_ENABLED = os.environ.get('EMAIL_ENABLED', 'False').lower() == 'true'
     EMAIL_SENDER = os.environ.get('EMAIL_SENDER', 'team.bot@gmail.com')
     EMAIL_PASSWORD = os.environ.get('EMAIL_PASSWORD', '')  # Use Gmail App Password
     MANAGER_EMAIL = os.environ.get('MANAGER_EMAIL', 'manager@company.com')
-    SMTP_SERVER = 'smtp.gmail.com'
-    SMTP_PORT = 587
+    SMTP_SERVER = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
+    SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
+    SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', 'True').lower() == 'true'
+    SMTP_AUTH = os.environ.get('SMTP_AUTH', 'True').lower() == 'true'
+    SMTP_TIMEOUT = 30  # seconds
+    
+    # Email Outbox (messages are queued and sent by a background worker)
+    EMAIL_OUTBOX_INTERVAL = int(os.environ.get('EMAIL_OUTBOX_INTERVAL', 60))  # seconds between polls
+    EMAIL_BATCH_SIZE = 50  # messages sent per SMTP session
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_RETRY_BACKOFF = 30  # seconds, doubled after each failed attempt
+    EMAIL_CLAIM_TIMEOUT = 600  # seconds before a stuck 'sending' message is retried
+    EMAIL_OUTBOX_RETENTION_DAYS = 30  # sent and failed messages are pruned after this
     
     # Email Schedule (24-hour format)
     EMAIL_SCHEDULE_HOUR = 18  # 6 PM
     EMAIL_SCHEDULE_MINUTE = 0
     
+    # Scheduler ('embedded': one web worker runs the jobs, 'standalone': run
+    # `python scheduler.py` separately, 'off': no scheduled jobs)
+    SCHEDULER_MODE = os.environ.get('SCHEDULER_MODE', 'embedded').lower()
+    SCHEDULER_LOCK_PATH = os.path.join(DATA_DIR, 'scheduler.lock')
+    SCHEDULER_STATE_PATH = os.path.join(DATA_DIR, 'scheduler_state.store')
+    SCHEDULER_MISFIRE_GRACE = 6 * 3600  # seconds; older missed runs are skipped
+    
+    # Per-member daily digests (sent at the same time as the summary)
+    EMAIL_DIGESTS_ENABLED = os.environ.get('EMAIL_DIGESTS_ENABLED', 'False').lower() == 'true'
+    DIGEST_LOOKAHEAD_DAYS = 7  # leaves and celebrations shown ahead of today
+    
     # Jira Configuration
     JIRA_ENABLED = os.environ.get('JIRA_ENABLED', 'False').lower() == 'true'
     JIRA_URL = os.environ.get('JIRA_URL', 'https://yourcompany.atlassian.net')
     JIRA_USERNAME = os.environ.get('JIRA_USERNAME', '')
     JIRA_API_TOKEN = os.environ.get('JIRA_API_TOKEN', '')  # Use API token for Jira Cloud
     JIRA_PROJECT_KEY = os.environ.get('JIRA_PROJECT_KEY', 'QA')
+    JIRA_TIMEOUT = 10  # seconds per request
+    JIRA_REFRESH_INTERVAL = int(os.environ.get('JIRA_REFRESH_INTERVAL', 300))  # seconds
+    JIRA_CACHE_TTL = int(os.environ.get('JIRA_CACHE_TTL', 300))  # seconds
+    JIRA_FULL_SYNC_INTERVAL = int(os.environ.get('JIRA_FULL_SYNC_INTERVAL', 24 * 3600))  # seconds
+    JIRA_PAGE_SIZE = 100
+    JIRA_FETCH_WORKERS = 4  # concurrent page requests
+    JIRA_STORE_PATH = os.path.join(DATA_DIR, 'jira_issues.store')
     
     # Pagination
     ITEMS_PER_PAGE = 10
+    MAX_ITEMS_PER_PAGE = 100
     
     # Date Format
     DATE_FORMAT = '%Y-%m-%d'
     DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
     
+    # Rendered list pages, reused until their collection changes (see fragments.py)
+    FRAGMENT_CACHE_ENABLED = os.environ.get('FRAGMENT_CACHE_ENABLED', 'True').lower() == 'true'
+    FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    
+    # Prometheus metrics at /metrics; scrapers send "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'False').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # empty: no token (restrict at the proxy)
+    
+    # Request profiler: admins add ?profile=1 (or an X-Profile: 1 header) to any page
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'False').lower() == 'true'
+    PROFILER_MAX_PROFILES = 20  # most recent profiles kept per process
+    PROFILER_TOP_N = 40  # functions listed in each summary
+    
+    # Live dashboard updates over Server-Sent Events at /api/stream
+    SSE_ENABLED = os.environ.get('SSE_ENABLED', 'True').lower() == 'true'
+    SSE_MAX_CLIENTS = int(os.environ.get('SSE_MAX_CLIENTS', 100))  # open streams per process
+    # Streams allowed under a threaded server, where each holds a request thread;
+    # keep it well below the thread count (0 = no live updates there)
+    SSE_THREADED_MAX_CLIENTS = int(os.environ.get('SSE_THREADED_MAX_CLIENTS', 0))
+    SSE_MAX_SECONDS = int(os.environ.get('SSE_MAX_SECONDS', 300))  # browsers reconnect after this
+    SSE_HEARTBEAT_SECONDS = 15  # comment sent on idle streams
+    SSE_POLL_INTERVAL = 2  # seconds between checks for writes from other processes
+    SSE_BUFFER_EVENTS = 256  # recent events kept for reconnecting browsers
+    
+    # Load data and build indexes at startup instead of on the first request
+    PRELOAD_CACHES = os.environ.get('PRELOAD_CACHES', 'False').lower() == 'true'
+    
     # Application Settings
     APP_NAME = 'Team Management Dashboard'
     APP_VERSION = '1.0.0'
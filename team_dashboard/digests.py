@@ -0,0 +1,115 @@
+"""
+Personalized daily digests for Team Management Dashboard
+
+Every team member with an email address gets a digest of their own open
+tasks, upcoming leaves and celebrations. Each collection is loaded once and
+partitioned by member in a single pass, all digests are rendered from one
+compiled Jinja template, and the whole batch is queued in the outbox in a
+single write so the worker delivers it over one SMTP session.
+"""
+from datetime import datetime, timedelta
+
+from config import Config
+from storage import get_storage
+from utils import format_date, get_today, get_email_environment
+from mailer import email_configured, enqueue_emails
+
+
+DIGEST_TEMPLATE = 'email/digest.html'
+
+
+def member_key(member):
+    """Identify a member by user id, or by email for accounts without one"""
+    return member['id'] if member.get('id') is not None else member['email']
+
+
+def partition_by_member(members, tasks, leaves, celebrations, today, until):
+    """Group each member's open tasks, upcoming leaves and celebrations by member_key()
+
+    Tasks, leaves and celebrations only name their member, so a record is
+    given to the one member with that name. Records naming members who
+    share a name are left out of both digests rather than sent to the
+    wrong person.
+    """
+    groups = {}
+    keys_by_name = {}
+    for member in members:
+        groups[member_key(member)] = {'tasks': [], 'leaves': [], 'celebrations': []}
+        keys_by_name.setdefault(member['name'], []).append(member_key(member))
+    for name, keys in keys_by_name.items():
+        if len(keys) > 1:
+            print(f"Members share the name '{name}'; their tasks, leaves and celebrations are left out of digests")
+
+    def group_of(name):
+        keys = keys_by_name.get(name)
+        return groups[keys[0]] if keys and len(keys) == 1 else None
+
+    for task in tasks:
+        group = group_of(task.get('member_name'))
+        if group is not None and task.get('status') != 'completed':
+            group['tasks'].append(task)
+    for leave in leaves:
+        group = group_of(leave.get('name'))
+        if group is not None and today <= (leave.get('date') or '') <= until:
+            group['leaves'].append(leave)
+    for celebration in celebrations:
+        group = group_of(celebration.get('member_name'))
+        if group is not None and today <= (celebration.get('date') or '') <= until:
+            group['celebrations'].append(celebration)
+
+    for group in groups.values():
+        group['tasks'].sort(key=lambda task: task.get('due_date') or '9999-12-31')
+        group['leaves'].sort(key=lambda leave: leave.get('date'))
+        group['celebrations'].sort(key=lambda celebration: celebration.get('date'))
+    return groups
+
+
+def render_digests(today=None):
+    """Render every member's digest; returns a list of (member, subject, html)"""
+    today = today or get_today()
+    until = (datetime.strptime(today, Config.DATE_FORMAT)
+             + timedelta(days=Config.DIGEST_LOOKAHEAD_DAYS)).strftime(Config.DATE_FORMAT)
+
+    storage = get_storage()
+    members = [
+        user for user in storage.load('users.json')
+        if user.get('role') != 'admin' and user.get('email') and user.get('name')
+    ]
+    groups = partition_by_member(
+        members,
+        storage.load('tasks.json'),
+        storage.load('leaves.json'),
+        storage.load('celebrations.json'),
+        today, until
+    )
+
+    template = get_email_environment().get_template(DIGEST_TEMPLATE)
+    subject = f"Your Daily Digest - {format_date(today)}"
+    generated_at = datetime.now().strftime(Config.DATETIME_FORMAT)
+    digests = []
+    for member in members:
+        html = template.render(
+            member=member,
+            today=today,
+            app_name=Config.APP_NAME,
+            generated_at=generated_at,
+            **groups[member_key(member)]
+        )
+        digests.append((member, subject, html))
+    return digests
+
+
+def send_member_digests():
+    """Queue a personalized digest for every team member; returns the number queued"""
+    if not Config.EMAIL_ENABLED:
+        print("Email disabled. Would have sent member digests")
+        return 0
+    if not email_configured():
+        return 0
+    try:
+        digests = render_digests()
+        queued = enqueue_emails([(subject, html, member['email']) for member, subject, html in digests])
+        return len(queued)
+    except Exception as e:
+        print(f"Error queueing member digests: {e}")
+        return 0
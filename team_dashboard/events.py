@@ -0,0 +1,298 @@
+"""
+Live change events for Team Management Dashboard
+
+Browsers that keep /dashboard open subscribe to GET /api/stream, a
+Server-Sent Events stream. Each committed write in this process (taken from
+the storage change feed) is published once as a 'change' event naming the
+collection, the operation and the record id, with the new dashboard figures
+when the collection feeds them, so script.js can patch the page in place
+instead of reloading it. The change feed runs inside the writer's storage
+lock, so it only queues the change; a single publisher thread builds the
+figures and publishes the events. The same thread picks up writes made by
+other worker processes by comparing collection versions every
+SSE_POLL_INTERVAL seconds.
+
+Fan-out costs the same however many clients listen: an event is encoded
+once into a ring of recent events, and a client only keeps the sequence
+number of the last event it was sent. A browser reconnecting with
+Last-Event-ID is sent what it missed from the ring, or the current figures
+if those events are gone.
+
+Streams are meant for gunicorn's gevent workers (-k gevent), where a
+waiting stream is a greenlet rather than a thread; there each process holds
+up to SSE_MAX_CLIENTS of them, closing each after SSE_MAX_SECONDS (browsers
+reconnect by themselves). Under a threaded server (the Flask dev server,
+gunicorn --threads) every open stream occupies one of the request threads,
+so streams are refused unless SSE_THREADED_MAX_CLIENTS reserves a few,
+leaving the rest of the threads for pages. Gunicorn's default sync workers
+serve one request at a time, so streams are always refused there.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from aggregates import DashboardAggregates, get_dashboard_aggregates
+from config import Config
+from storage import get_storage
+from utils import get_dashboard_stats, get_today
+
+
+# Browsers wait this long before reconnecting a dropped stream
+RECONNECT_MILLISECONDS = 5000
+
+# Fields of today's accomplishments shown on the dashboard
+ACCOMPLISHMENT_FIELDS = ('member_name', 'type', 'description', 'impact')
+
+
+def encode_event(event, data, event_id=None):
+    """Format one Server-Sent Event"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+class Broadcaster:
+    """A ring of recent events that any number of clients wait on"""
+
+    def __init__(self, size):
+        self._events = deque(maxlen=size)  # (sequence number, encoded event)
+        self._sequence = 0
+        self._condition = threading.Condition()
+        # Event ids carry a per-process token, so an id from another worker
+        # (or from before a restart) is not taken for a position in this ring
+        self._token = f'{os.getpid():x}{int(time.time()):x}'
+        self.clients = 0
+
+    def connect(self, max_clients):
+        """Take a client slot; returns False if all are in use"""
+        with self._condition:
+            if self.clients >= max_clients:
+                return False
+            self.clients += 1
+            return True
+
+    def disconnect(self):
+        with self._condition:
+            self.clients -= 1
+
+    def publish(self, event, data):
+        """Encode an event once and wake every waiting client"""
+        with self._condition:
+            self._sequence += 1
+            event_id = f'{self._token}-{self._sequence}'
+            self._events.append((self._sequence, encode_event(event, data, event_id)))
+            self._condition.notify_all()
+
+    def resume(self, last_event_id=None):
+        """Return (sequence number to read after, True if last_event_id could be resumed)"""
+        with self._condition:
+            token, _, sequence = (last_event_id or '').rpartition('-')
+            if token == self._token and sequence.isdigit():
+                oldest = self._events[0][0] if self._events else self._sequence + 1
+                if oldest - 1 <= int(sequence) <= self._sequence:
+                    return int(sequence), True
+            return self._sequence, False
+
+    def wait(self, after, timeout):
+        """Return (encoded events published after `after`, new position)
+
+        Waits up to timeout seconds when there are none yet. The events are
+        None if the client fell further behind than the ring reaches.
+        """
+        with self._condition:
+            if self._sequence <= after:
+                self._condition.wait(timeout)
+            if self._sequence <= after:
+                return [], after
+            skip = after + 1 - self._events[0][0]
+            if skip < 0:
+                return None, self._sequence
+            return [encoded for _, encoded in itertools.islice(self._events, skip, None)], self._sequence
+
+
+def live_stats():
+    """The dashboard figures as sent to browsers"""
+    stats = get_dashboard_stats()
+    stats['recent_accomplishments_list'] = [
+        {field: acc.get(field) for field in ACCOMPLISHMENT_FIELDS}
+        for acc in stats['recent_accomplishments_list']
+    ]
+    return stats
+
+
+def describe_changes(changes):
+    """Return (op, record id) of one committed write from the storage change feed"""
+    if changes is None:
+        return 'replace', None
+    if len(changes) != 1:
+        return 'bulk', None
+    record_id, old, new = changes[0]
+    if old is None:
+        return 'add', record_id
+    return ('delete' if new is None else 'edit'), record_id
+
+
+class ChangeFeed:
+    """Publishes committed writes, including those of other processes, as events"""
+
+    def __init__(self, storage, broadcaster):
+        self.storage = storage
+        self.broadcaster = broadcaster
+        self._lock = threading.Lock()
+        self._pending = []  # (filename, op, record_id, version, count) not yet published
+        self._wake = threading.Event()
+        self._versions = {filename: storage.version(filename) for filename in DashboardAggregates.COLLECTIONS}
+        self._today = get_today()
+        storage.subscribe(self.on_commit)
+
+    def on_commit(self, filename, version, changes):
+        """Queue a committed write for the publisher thread (called with the storage lock held)"""
+        with self._lock:
+            self._versions[filename] = version
+            if not self.broadcaster.clients:
+                return
+            op, record_id = describe_changes(changes)
+            self._pending.append((filename, op, record_id, version, len(changes) if changes else None))
+        self._wake.set()
+
+    def flush(self):
+        """Publish the queued writes, building the dashboard figures once for all of them"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        stats = None
+        if any(change[0] in DashboardAggregates.COLLECTIONS for change in pending):
+            stats = live_stats()
+        for filename, op, record_id, version, count in pending:
+            self.publish(filename, op, record_id, version, count, stats)
+
+    def publish(self, filename, op, record_id, version, count=None, stats=None):
+        data = {
+            'collection': filename[:-len('.json')],
+            'op': op,
+            'id': record_id,
+            'count': count,
+            'version': version
+        }
+        if filename in DashboardAggregates.COLLECTIONS:
+            data['stats'] = stats if stats is not None else live_stats()
+        self.broadcaster.publish('change', data)
+
+    def check(self):
+        """Publish writes made by other processes, and the figures of a new day"""
+        today = get_today()
+        if today != self._today:
+            self._today = today
+            self.broadcaster.publish('stats', live_stats())
+        for filename in DashboardAggregates.COLLECTIONS:
+            version = self.storage.version(filename)
+            with self._lock:
+                known = self._versions.get(filename)
+                self._versions[filename] = version
+            if version != known:
+                self.publish(filename, 'sync', None, version)
+
+    def run(self, poll_interval):
+        """Publisher thread: flush() when woken, and check() every poll_interval seconds"""
+        next_check = time.monotonic() + poll_interval
+        while True:
+            timeout = max(0, next_check - time.monotonic()) if poll_interval > 0 else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+            try:
+                self.flush()
+                if poll_interval > 0 and time.monotonic() >= next_check:
+                    next_check = time.monotonic() + poll_interval
+                    if self.broadcaster.clients:
+                        self.check()
+            except Exception as e:
+                print(f"Error publishing changes: {e}")
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    """Return the process-wide broadcaster, wiring it to the change feed on first use"""
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            # Subscribe the aggregates first, so events carry figures that include the write
+            get_dashboard_aggregates()
+            broadcaster = Broadcaster(Config.SSE_BUFFER_EVENTS)
+            feed = ChangeFeed(get_storage(), broadcaster)
+            threading.Thread(target=feed.run, args=(Config.SSE_POLL_INTERVAL,),
+                             name='sse-publisher', daemon=True).start()
+            _broadcaster = broadcaster
+        return _broadcaster
+
+
+def stream_slots(environ):
+    """How many streams this process may hold open under the server running it
+
+    0 on sync workers, where an open stream would block the whole worker,
+    and by default on threaded servers, where it would hold a request thread.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        monkey = None
+    if monkey is not None and monkey.is_module_patched('socket'):
+        return Config.SSE_MAX_CLIENTS
+    if environ.get('wsgi.multithread'):
+        return min(Config.SSE_MAX_CLIENTS, Config.SSE_THREADED_MAX_CLIENTS)
+    return 0
+
+
+class EventStream:
+    """Body of one client's stream; the server's close() frees its slot"""
+
+    def __init__(self, broadcaster, last_event_id=None):
+        self._broadcaster = broadcaster
+        self._events = self._generate(last_event_id)
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._events)
+
+    def _generate(self, last_event_id):
+        position, resumed = self._broadcaster.resume(last_event_id)
+        yield f'retry: {RECONNECT_MILLISECONDS}\n\n'.encode()
+        if not resumed:
+            yield encode_event('stats', live_stats())
+        deadline = time.monotonic() + Config.SSE_MAX_SECONDS
+        while time.monotonic() < deadline:
+            events, position = self._broadcaster.wait(position, Config.SSE_HEARTBEAT_SECONDS)
+            if events is None:
+                yield encode_event('stats', live_stats())
+            elif events:
+                yield b''.join(events)
+            else:
+                # Keeps proxies from timing out the connection and finds dead clients
+                yield b': keep-alive\n\n'
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._events.close()
+            self._broadcaster.disconnect()
+
+
+def open_stream(last_event_id=None, max_clients=None):
+    """Return the event stream of a new client, or None if this process is at max_clients
+
+    max_clients defaults to SSE_MAX_CLIENTS.
+    """
+    broadcaster = get_broadcaster()
+    if not broadcaster.connect(Config.SSE_MAX_CLIENTS if max_clients is None else max_clients):
+        return None
+    return EventStream(broadcaster, last_event_id)
@@ -0,0 +1,190 @@
+"""
+Rendered page cache for Team Management Dashboard
+
+List pages render the same HTML for every user until their data changes.
+The blocks a list template defines (title, content, extra_js) are cached as
+rendered markup, keyed by endpoint, query string (page, sort, search) and the
+version of each collection the page shows, and are spliced into base.html on
+every request. The per-user parts of the layout - the signed-in name, flash
+messages and the active menu item - are therefore never cached.
+
+A write bumps the collection's version, so its old entries are no longer
+looked up and age out of the LRU, whose total size is capped by
+FRAGMENT_CACHE_MAX_BYTES.
+
+Table-heavy pages can also be streamed: on a cache miss the layout and each
+block are sent as they render, rows are pulled lazily from the storage
+layer, and the page is cached once the whole response has gone out.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app, get_flashed_messages, render_template, request, stream_template
+from markupsafe import Markup
+
+from config import Config
+from storage import get_storage
+
+
+PAGE_TEMPLATE = 'cached_page.html'
+
+STREAM_CHUNK_SIZE = 8 * 1024  # characters sent per write when streaming
+
+
+class FragmentCache:
+    """LRU of rendered template blocks, bounded by their total size in bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (blocks, size)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached blocks for key (marking them recently used), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, blocks):
+        """Cache blocks under key, evicting the least recently used entries"""
+        size = sum(sys.getsizeof(html) for html in blocks.values())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (blocks, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_fragment_cache = None
+_fragment_cache_lock = threading.Lock()
+
+
+def get_fragment_cache():
+    """Return the process-wide page fragment cache"""
+    global _fragment_cache
+    with _fragment_cache_lock:
+        if _fragment_cache is None:
+            _fragment_cache = FragmentCache(Config.FRAGMENT_CACHE_MAX_BYTES)
+        return _fragment_cache
+
+
+def _block_streams(template_name, context):
+    """Return a chunk generator for each block a template defines"""
+    app = current_app._get_current_object()
+    template = app.jinja_env.get_template(template_name)
+    app.update_template_context(context)
+    template_context = template.new_context(context)
+    return {name: block(template_context) for name, block in template.blocks.items()}
+
+
+def render_blocks(template_name, context):
+    """Render each block a template defines on its own; returns {name: Markup}"""
+    return {
+        name: Markup(''.join(chunks))
+        for name, chunks in _block_streams(template_name, context).items()
+    }
+
+
+class _RecordedBlock:
+    """Yields a block's chunks as they render and keeps a copy for the cache"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.parts = []
+        self.done = False
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self.parts.append(chunk)
+            yield Markup(chunk)
+        self.done = True
+
+
+def _stream_page(template_name, context, cache=None, key=None):
+    """Stream a list page block by block, caching it if it was sent in full"""
+    # Take the flash messages now: the session cookie is written before the
+    # body, so popping them while streaming would not be saved
+    get_flashed_messages(with_categories=True)
+    blocks = {
+        name: _RecordedBlock(chunks)
+        for name, chunks in _block_streams(template_name, context).items()
+    }
+    page = stream_template(PAGE_TEMPLATE, fragments=blocks)
+
+    def generate():
+        # Jinja yields many small pieces; send them in fewer, larger writes
+        buffer = []
+        buffered = 0
+        for chunk in page:
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= STREAM_CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+                buffered = 0
+        if buffer:
+            yield ''.join(buffer)
+        if cache is not None and all(block.done for block in blocks.values()):
+            cache.put(key, {name: Markup(''.join(block.parts)) for name, block in blocks.items()})
+
+    return Response(generate())
+
+
+def render_cached_page(template_name, filenames, build_context, stream=False):
+    """Render a list page, reusing its cached blocks while filenames are unchanged
+
+    build_context() loads the data for the template and is only called on a
+    cache miss. With stream=True a miss is streamed to the client as it
+    renders, so build_context may return lazy iterators instead of lists.
+    """
+    if not Config.FRAGMENT_CACHE_ENABLED:
+        if stream:
+            return _stream_page(template_name, build_context())
+        return render_template(template_name, **build_context())
+
+    # Read the versions before loading, so a concurrent write can at worst
+    # cache newer data under a key that is never looked up again
+    storage = get_storage()
+    key = (
+        request.endpoint,
+        tuple(storage.version_info(filename) for filename in filenames),
+        tuple(sorted(request.args.items(multi=True)))
+    )
+    cache = get_fragment_cache()
+    blocks = cache.get(key)
+    if blocks is None:
+        if stream:
+            return _stream_page(template_name, build_context(), cache, key)
+        blocks = render_blocks(template_name, build_context())
+        cache.put(key, blocks)
+    return render_template(PAGE_TEMPLATE, fragments={name: (html,) for name, html in blocks.items()})
@@ -0,0 +1,297 @@
+"""
+Jira integration for Team Management Dashboard
+
+Issues are fetched in the background (by the scheduler, or on demand when
+the cache has expired) and served from an in-memory TTL cache, so page
+requests never wait on Jira. Stale issues keep being served while a refresh
+runs. All calls share one pooled requests.Session.
+
+Refreshes are incremental: only issues updated since the previous sync are
+requested (`updated >= -Nm`, which sidesteps server/user time zones) and
+merged into a local issue store keyed by issue key and persisted in
+Config.JIRA_STORE_PATH. A full resync runs every JIRA_FULL_SYNC_INTERVAL to
+drop issues deleted in Jira. Result pages are fetched concurrently.
+"""
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+from config import Config
+from metrics import JIRA_REQUEST_SECONDS, JIRA_ERRORS
+from storage import atomic_write_json
+
+
+JIRA_FIELDS = 'summary,status,assignee,priority,created,updated'
+DONE_STATUS = 'Done'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the shared Jira session (keep-alive connection pool)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            retry = Retry(
+                total=2, backoff_factor=0.5,
+                status_forcelist=(429, 502, 503, 504), allowed_methods=('GET',)
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=max(4, Config.JIRA_FETCH_WORKERS), max_retries=retry
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.auth = HTTPBasicAuth(Config.JIRA_USERNAME, Config.JIRA_API_TOKEN)
+            session.headers['Accept'] = 'application/json'
+            _session = session
+    return _session
+
+
+def _parse_issue(issue):
+    fields = issue['fields']
+    return {
+        'key': issue['key'],
+        'summary': fields['summary'],
+        'status': fields['status']['name'],
+        'assignee': fields['assignee']['displayName'] if fields.get('assignee') else 'Unassigned',
+        'priority': fields['priority']['name'] if fields.get('priority') else 'None',
+        'created': fields['created'][:10],
+        'updated': fields.get('updated', '')
+    }
+
+
+def _fetch_page(jql, start_at):
+    """Fetch one page of search results"""
+    started = time.perf_counter()
+    try:
+        response = get_session().get(
+            f"{Config.JIRA_URL}/rest/api/3/search",
+            params={
+                'jql': jql,
+                'startAt': start_at,
+                'maxResults': Config.JIRA_PAGE_SIZE,
+                'fields': JIRA_FIELDS
+            },
+            timeout=Config.JIRA_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
+    except Exception:
+        JIRA_ERRORS.inc()
+        raise
+    finally:
+        JIRA_REQUEST_SECONDS.observe(time.perf_counter() - started)
+
+
+def _fetch_all(jql):
+    """Fetch every page of a search, requesting the remaining pages concurrently"""
+    first = _fetch_page(jql, 0)
+    issues = list(first.get('issues', []))
+    total = first.get('total', len(issues))
+    # The server may cap maxResults below what we asked for
+    step = first.get('maxResults') or len(issues) or Config.JIRA_PAGE_SIZE
+    starts = range(len(issues), total, step)
+    if starts:
+        with ThreadPoolExecutor(max_workers=Config.JIRA_FETCH_WORKERS) as pool:
+            for page in pool.map(lambda start: _fetch_page(jql, start), starts):
+                issues.extend(page.get('issues', []))
+    return issues
+
+
+def fetch_jira_issues(assignee=None, updated_within_minutes=None):
+    """Fetch issues from Jira; returns None if the request failed
+
+    With updated_within_minutes, every issue updated in that window is
+    returned (including ones moved to Done) so a local store can be updated.
+    """
+    if not Config.JIRA_ENABLED:
+        return []
+
+    if not Config.JIRA_API_TOKEN or not Config.JIRA_USERNAME:
+        print("Jira credentials not configured")
+        return []
+
+    try:
+        # Build JQL query
+        if assignee:
+            jql = f'assignee="{assignee}"'
+        else:
+            jql = f'project={Config.JIRA_PROJECT_KEY}'
+        if updated_within_minutes is None:
+            jql += f' AND status != {DONE_STATUS}'
+        else:
+            jql += f' AND updated >= -{updated_within_minutes}m'
+        # A stable order keeps concurrently fetched pages consistent
+        jql += ' ORDER BY key ASC'
+
+        return [_parse_issue(issue) for issue in _fetch_all(jql)]
+    except Exception as e:
+        print(f"Error fetching Jira issues: {e}")
+        return None
+
+
+class JiraIssueStore:
+    """Open issues keyed by issue key, persisted between restarts"""
+
+    def __init__(self, path):
+        self.path = path
+        self.issues = {}
+        self.last_sync = None
+        self.last_full_sync = None
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.issues = data.get('issues', {})
+        self.last_sync = data.get('last_sync')
+        self.last_full_sync = data.get('last_full_sync')
+
+    def save(self):
+        atomic_write_json(self.path, {
+            'last_sync': self.last_sync,
+            'last_full_sync': self.last_full_sync,
+            'issues': self.issues
+        })
+
+    def replace(self, issues):
+        self.issues = {issue['key']: issue for issue in issues}
+
+    def merge(self, issues):
+        """Upsert changed issues, dropping the ones that were closed"""
+        for issue in issues:
+            if issue['status'] == DONE_STATUS:
+                self.issues.pop(issue['key'], None)
+            else:
+                self.issues[issue['key']] = issue
+
+    def sorted_issues(self):
+        """Most recently updated first"""
+        return sorted(self.issues.values(), key=lambda issue: issue.get('updated', ''), reverse=True)
+
+
+class JiraCache:
+    """TTL cache of project issues with single-flight background refresh"""
+
+    def __init__(self, ttl, store_path):
+        self.ttl = ttl
+        self.store = JiraIssueStore(store_path)
+        self.issues = None
+        self.fetched_at = None
+        self.error = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_stale(self):
+        return self.fetched_at is None or time.time() - self.fetched_at > self.ttl
+
+    @property
+    def refreshing(self):
+        return self._refreshing
+
+    def _ensure_loaded(self):
+        """Serve the persisted issues until the first refresh completes"""
+        if self.issues is None:
+            self.store.load()
+            self.issues = self.store.sorted_issues()
+
+    def refresh(self, full=False):
+        """Sync issues now (unless a refresh is already running)"""
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+            self._ensure_loaded()
+        try:
+            self._sync(full)
+        finally:
+            with self._lock:
+                self._refreshing = False
+        return True
+
+    def _sync(self, full):
+        started = time.time()
+        store = self.store
+        full = (
+            full or store.last_sync is None or store.last_full_sync is None
+            or started - store.last_full_sync > Config.JIRA_FULL_SYNC_INTERVAL
+        )
+        if full:
+            issues = fetch_jira_issues()
+        else:
+            # One extra minute of overlap; merging the same issue twice is harmless
+            minutes = math.ceil((started - store.last_sync) / 60) + 1
+            issues = fetch_jira_issues(updated_within_minutes=minutes)
+
+        with self._lock:
+            if issues is None:
+                # Keep serving the previous issues until Jira recovers
+                self.error = 'Jira request failed'
+            else:
+                if full:
+                    store.replace(issues)
+                    store.last_full_sync = started
+                else:
+                    store.merge(issues)
+                store.last_sync = started
+                self.issues = store.sorted_issues()
+                self.error = None
+            self.fetched_at = time.time()
+        if issues is not None:
+            try:
+                store.save()
+            except OSError as e:
+                print(f"Error saving Jira issue store: {e}")
+
+    def refresh_in_background(self, full=False):
+        """Start a refresh thread if none is running"""
+        if self._refreshing:
+            return
+        threading.Thread(target=self.refresh, args=(full,), name='jira-refresh', daemon=True).start()
+
+    def get(self):
+        """Return cached issues, triggering a background refresh when stale"""
+        if self.is_stale:
+            self.refresh_in_background()
+        with self._lock:
+            self._ensure_loaded()
+            return list(self.issues)
+
+    def status(self):
+        """Describe the cache for API responses"""
+        with self._lock:
+            return {
+                'fetched_at': self.fetched_at,
+                'last_sync': self.store.last_sync,
+                'stale': self.is_stale,
+                'refreshing': self._refreshing,
+                'error': self.error
+            }
+
+
+jira_cache = JiraCache(ttl=Config.JIRA_CACHE_TTL, store_path=Config.JIRA_STORE_PATH)
+
+
+def get_jira_issues():
+    """Return the cached project issues (empty when Jira is disabled)"""
+    if not Config.JIRA_ENABLED:
+        return []
+    return jira_cache.get()
+
+
+def refresh_jira_issues():
+    """Scheduler job: refresh the issue cache"""
+    if Config.JIRA_ENABLED:
+        jira_cache.refresh()
@@ -0,0 +1,341 @@
+"""
+Email outbox for Team Management Dashboard
+
+send_email() only queues a message in the 'outbox.json' collection and
+returns; a background OutboxWorker drains the queue. Each drain opens one
+authenticated SMTP session for all due messages, and failed messages are
+retried with exponential backoff until EMAIL_MAX_ATTEMPTS is reached. If
+the session cannot be opened (server down, bad password), the drain stops
+and the messages go back to the queue without using up an attempt, so a
+wrong password costs one login attempt per drain rather than one per
+message.
+
+Messages are claimed inside a storage transaction, so several app processes
+can share one outbox without sending anything twice. A claim left behind by
+a crashed process is released after EMAIL_CLAIM_TIMEOUT seconds.
+"""
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+from config import Config
+from metrics import EMAIL_SEND_SECONDS, EMAIL_ERRORS
+from storage import get_storage
+
+
+OUTBOX = 'outbox.json'
+
+STATUS_QUEUED = 'queued'
+STATUS_SENDING = 'sending'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+
+
+def _now():
+    return datetime.now().strftime(Config.DATETIME_FORMAT)
+
+
+def email_configured():
+    """Check that email is enabled and has credentials"""
+    if not Config.EMAIL_ENABLED:
+        return False
+    if Config.SMTP_AUTH and not Config.EMAIL_PASSWORD:
+        print("Email password not configured")
+        return False
+    return True
+
+
+def _new_message(subject, body, to_email):
+    return {
+        'subject': subject,
+        'body': body,
+        'to': to_email or Config.MANAGER_EMAIL,
+        'status': STATUS_QUEUED,
+        'attempts': 0,
+        'next_attempt_at': 0,
+        'claimed_at': None,
+        'last_error': None,
+        'created_at': _now(),
+        'sent_at': None
+    }
+
+
+def enqueue_email(subject, body, to_email=None):
+    """Add a message to the outbox and wake the worker; returns the record"""
+    message = get_storage().insert(OUTBOX, _new_message(subject, body, to_email))
+    get_outbox_worker().wake()
+    return message
+
+
+def enqueue_emails(messages):
+    """Queue many (subject, body, to_email) messages in one write; returns the records"""
+    with get_storage().transaction(OUTBOX) as txn:
+        queued = [txn.insert(_new_message(subject, body, to_email))
+                  for subject, body, to_email in messages]
+    if queued:
+        get_outbox_worker().wake()
+    return queued
+
+
+def build_message(message):
+    """Build the MIME message for an outbox record"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = message['subject']
+    msg['From'] = Config.EMAIL_SENDER
+    msg['To'] = message['to']
+    msg.attach(MIMEText(message['body'], 'html'))
+    return msg
+
+
+class SMTPConnectionError(Exception):
+    """The SMTP session could not be opened or authenticated"""
+
+
+def open_smtp_session():
+    """Open and authenticate one SMTP connection"""
+    server = smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT, timeout=Config.SMTP_TIMEOUT)
+    try:
+        if Config.SMTP_USE_TLS:
+            server.starttls()
+        if Config.SMTP_AUTH:
+            server.login(Config.EMAIL_SENDER, Config.EMAIL_PASSWORD)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def _close_smtp_session(server):
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+
+def claim_due_messages(limit):
+    """Mark up to `limit` due messages as sending and return them"""
+    now = time.time()
+    claimed = []
+    with get_storage().transaction(OUTBOX) as txn:
+        for message in txn.all():
+            if len(claimed) >= limit:
+                break
+            status = message.get('status')
+            due = status == STATUS_QUEUED and message.get('next_attempt_at', 0) <= now
+            abandoned = (
+                status == STATUS_SENDING
+                and now - (message.get('claimed_at') or 0) > Config.EMAIL_CLAIM_TIMEOUT
+            )
+            if due or abandoned:
+                claimed.append(txn.update(message['id'], {
+                    'status': STATUS_SENDING,
+                    'claimed_at': now
+                }))
+    return claimed
+
+
+def _release_messages(message_ids, error):
+    """Put claimed messages back in the queue without counting an attempt"""
+    with get_storage().transaction(OUTBOX) as txn:
+        for message_id in message_ids:
+            if txn.get(message_id) is not None:
+                txn.update(message_id, {
+                    'status': STATUS_QUEUED, 'last_error': error, 'claimed_at': None
+                })
+
+
+def _record_results(results):
+    """Store the outcome of a batch: {id: None on success or an error string}"""
+    now = time.time()
+    with get_storage().transaction(OUTBOX) as txn:
+        for message_id, error in results.items():
+            message = txn.get(message_id)
+            if message is None:
+                continue
+            attempts = message.get('attempts', 0) + 1
+            if error is None:
+                txn.update(message_id, {
+                    'status': STATUS_SENT, 'attempts': attempts,
+                    'sent_at': _now(), 'last_error': None, 'claimed_at': None
+                })
+            elif attempts >= Config.EMAIL_MAX_ATTEMPTS:
+                txn.update(message_id, {
+                    'status': STATUS_FAILED, 'attempts': attempts,
+                    'last_error': error, 'claimed_at': None
+                })
+            else:
+                backoff = Config.EMAIL_RETRY_BACKOFF * (2 ** (attempts - 1))
+                txn.update(message_id, {
+                    'status': STATUS_QUEUED, 'attempts': attempts,
+                    'next_attempt_at': now + backoff,
+                    'last_error': error, 'claimed_at': None
+                })
+
+
+class SMTPSession:
+    """SMTP connection opened on first use and reused until closed"""
+
+    def __init__(self):
+        self.server = None
+
+    def send(self, msg):
+        if self.server is None:
+            try:
+                self.server = open_smtp_session()
+            except (smtplib.SMTPException, OSError) as e:
+                raise SMTPConnectionError(str(e) or e.__class__.__name__) from e
+        try:
+            self.server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # Connection-level failure: reconnect for the next message
+            self.server.close()
+            self.server = None
+            raise
+
+    def close(self):
+        if self.server is not None:
+            _close_smtp_session(self.server)
+            self.server = None
+
+
+def deliver_batch(messages, session):
+    """Send messages over an SMTP session
+
+    Returns ({id: error or None}, connection error or None). The batch stops
+    when the session cannot be opened; messages after that are left out of
+    the results.
+    """
+    results = {}
+    for message in messages:
+        started = time.perf_counter()
+        try:
+            session.send(build_message(message))
+            results[message['id']] = None
+        except SMTPConnectionError as e:
+            EMAIL_ERRORS.inc()
+            return results, str(e)
+        except Exception as e:
+            results[message['id']] = str(e) or e.__class__.__name__
+            EMAIL_ERRORS.inc()
+        EMAIL_SEND_SECONDS.observe(time.perf_counter() - started)
+    return results, None
+
+
+def drain_outbox():
+    """Deliver every due message over one SMTP session; returns the number sent"""
+    sent = 0
+    session = SMTPSession()
+    try:
+        while True:
+            messages = claim_due_messages(Config.EMAIL_BATCH_SIZE)
+            if not messages:
+                return sent
+            results, connection_error = deliver_batch(messages, session)
+            _record_results(results)
+            sent += sum(1 for error in results.values() if error is None)
+            for message in messages:
+                if results.get(message['id']):
+                    print(f"Error sending email '{message['subject']}': {results[message['id']]}")
+            if connection_error:
+                _release_messages([m['id'] for m in messages if m['id'] not in results], connection_error)
+                print(f"Error connecting to SMTP server: {connection_error}")
+                return sent
+            if len(messages) < Config.EMAIL_BATCH_SIZE:
+                return sent
+    finally:
+        session.close()
+
+
+def prune_outbox():
+    """Delete sent and failed messages older than the retention period"""
+    cutoff = (datetime.now() - timedelta(days=Config.EMAIL_OUTBOX_RETENTION_DAYS)).strftime(
+        Config.DATETIME_FORMAT)
+    removed = 0
+    with get_storage().transaction(OUTBOX) as txn:
+        for message in txn.all():
+            if message.get('status') in (STATUS_SENT, STATUS_FAILED) \
+                    and (message.get('sent_at') or message.get('created_at') or '') < cutoff:
+                txn.delete(message['id'])
+                removed += 1
+    return removed
+
+
+def outbox_status():
+    """Queue depth and delivery counts by status"""
+    counts = {STATUS_QUEUED: 0, STATUS_SENDING: 0, STATUS_SENT: 0, STATUS_FAILED: 0}
+    for message in get_storage().load(OUTBOX):
+        status = message.get('status')
+        counts[status] = counts.get(status, 0) + 1
+    return {
+        'depth': counts[STATUS_QUEUED] + counts[STATUS_SENDING],
+        'counts': counts,
+        'worker_running': get_outbox_worker().is_alive()
+    }
+
+
+def get_message_status(message_id):
+    """Delivery status of one message (without its body), or None"""
+    message = get_storage().get(OUTBOX, message_id)
+    if message is None:
+        return None
+    message.pop('body', None)
+    return message
+
+
+class OutboxWorker:
+    """Background thread that drains the outbox when woken or on an interval"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+                self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def wake(self):
+        self.start()
+        self._event.set()
+
+    def _run(self):
+        last_prune = 0
+        while True:
+            self._event.wait(self.interval)
+            self._event.clear()
+            try:
+                drain_outbox()
+                if time.time() - last_prune > 3600:
+                    prune_outbox()
+                    last_prune = time.time()
+            except Exception as e:
+                print(f"Error draining email outbox: {e}")
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_outbox_worker():
+    """Return the process-wide outbox worker"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = OutboxWorker(Config.EMAIL_OUTBOX_INTERVAL)
+    return _worker
+
+
+def start_outbox_worker():
+    """Start draining the outbox (also delivers messages queued before a restart)"""
+    worker = get_outbox_worker()
+    worker.wake()
+    return worker
@@ -0,0 +1,83 @@
+"""
+Measure cold-start time of Team Management Dashboard
+
+Each run starts a fresh interpreter, imports app, calls create_app() and
+serves one request through the test client, reporting how long each step
+took. Use --max-ms to fail (exit status 1) when the median import-to-first-
+request time regresses past a budget, e.g. in CI:
+
+    python measure_startup.py --runs 5 --max-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {app_dir!r})
+import app as app_module
+imported = time.perf_counter()
+app = app_module.create_app(start_services={services!r}, preload={preload!r})
+created = time.perf_counter()
+client = app.test_client()
+with client.session_transaction() as session:
+    session.update(user='admin', role='admin', name='Admin User')
+status = client.get({path!r}).status_code
+served = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'total_ms': (served - started) * 1000,
+    'status': status
+}}))
+'''
+
+STEPS = ('import_ms', 'create_app_ms', 'first_request_ms', 'total_ms')
+
+
+def measure_once(path='/dashboard', services=False, preload=False):
+    """Time one cold start in a fresh interpreter"""
+    code = CHILD.format(app_dir=APP_DIR, path=path, services=services, preload=preload)
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=APP_DIR,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(runs=5, path='/dashboard', services=False, preload=False):
+    """Return the median of each startup step over several cold starts"""
+    samples = [measure_once(path, services, preload) for _ in range(runs)]
+    return {step: statistics.median(sample[step] for sample in samples) for step in STEPS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure import-to-first-request time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/dashboard', help='page requested first')
+    parser.add_argument('--services', action='store_true',
+                        help='also start the scheduler and email worker')
+    parser.add_argument('--preload', action='store_true', help='preload data caches')
+    parser.add_argument('--max-ms', type=float,
+                        help='fail if the median total exceeds this many milliseconds')
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs, args.path, args.services, args.preload)
+    for step in STEPS:
+        print(f"{step:>18}: {result[step]:8.1f}")
+    if args.max_ms is not None and result['total_ms'] > args.max_ms:
+        print(f"Startup took {result['total_ms']:.1f} ms, over the {args.max_ms:.0f} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Prometheus metrics for Team Management Dashboard
+
+Counters and histograms are served at /metrics in the Prometheus text
+format. Updating one takes no lock: every thread adds to its own slots, and
+the slots are only summed when /metrics is scraped. A label set's slots are
+allocated the first time a thread uses it, so steady-state observations
+create no new objects. Metrics are per process; with several gunicorn
+workers, scrape each of them (or run one worker per container).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+class _ThreadSlots:
+    """Per-thread lists of numbers, each written only by its own thread"""
+
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._threads = []  # (thread, slots) of threads that have written
+        self._retired = [0] * size  # totals of threads that have exited
+        self._fold_at = 64
+        self._lock = threading.Lock()
+
+    def mine(self):
+        """Return the calling thread's slots"""
+        try:
+            return self._local.slots
+        except AttributeError:
+            slots = self._local.slots = [0] * self.size
+            with self._lock:
+                self._threads.append((threading.current_thread(), slots))
+                # Servers that start a thread per request would otherwise
+                # grow this list until the next scrape
+                if len(self._threads) > self._fold_at:
+                    self._fold_exited()
+                    self._fold_at = 2 * len(self._threads) + 64
+            return slots
+
+    def _fold_exited(self):
+        """Add the slots of exited threads to the retired totals (lock held)"""
+        alive = []
+        for thread, slots in self._threads:
+            if thread.is_alive():
+                alive.append((thread, slots))
+            else:
+                for i, value in enumerate(slots):
+                    self._retired[i] += value
+        self._threads = alive
+
+    def totals(self):
+        """Sum the slots of every thread"""
+        with self._lock:
+            self._fold_exited()
+            totals = list(self._retired)
+            for _, slots in self._threads:
+                for i, value in enumerate(slots):
+                    totals[i] += value
+        return totals
+
+
+class _CounterChild:
+    def __init__(self):
+        self._slots = _ThreadSlots(1)
+
+    def inc(self, amount=1):
+        self._slots.mine()[0] += amount
+
+    def samples(self, name, labels):
+        yield name, labels, self._slots.totals()[0]
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf, then the sum of observed values
+        self._slots = _ThreadSlots(len(buckets) + 2)
+
+    def observe(self, value):
+        slots = self._slots.mine()
+        slots[bisect.bisect_left(self.buckets, value)] += 1
+        slots[-1] += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def samples(self, name, labels):
+        totals = self._slots.totals()
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), totals):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            yield f'{name}_bucket', labels + (('le', le),), cumulative
+        yield f'{name}_sum', labels, totals[-1]
+        yield f'{name}_count', labels, cumulative
+
+
+class _Metric:
+    """A named metric with zero or more labels"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Return the child for a set of label values, creating it on first use"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            labels = tuple(zip(self.labelnames, values))
+            yield from child.samples(self.name, labels)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+
+_registry = []
+
+
+def counter(name, documentation, labelnames=()):
+    """Create and register a counter"""
+    metric = Counter(name, documentation, labelnames)
+    _registry.append(metric)
+    return metric
+
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+    """Create and register a histogram"""
+    metric = Histogram(name, documentation, labelnames, buckets)
+    _registry.append(metric)
+    return metric
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+def render_metrics():
+    """Return every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples():
+            if labels:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels)
+                lines.append(f'{name}{{{label_text}}} {_format_value(value)}')
+            else:
+                lines.append(f'{name} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+# ============================================================================
+# Application Metrics
+# ============================================================================
+
+REQUEST_SECONDS = histogram(
+    'dashboard_request_duration_seconds', 'Time to handle a request, by Flask endpoint',
+    ('endpoint',))
+
+STORAGE_READ_SECONDS = histogram(
+    'dashboard_storage_read_seconds', 'Time to read a collection from disk', ('collection',))
+STORAGE_READ_BYTES = counter(
+    'dashboard_storage_read_bytes_total', 'Bytes of data files parsed', ('collection',))
+STORAGE_WRITE_SECONDS = histogram(
+    'dashboard_storage_write_seconds', 'Time to commit a write transaction', ('collection',))
+STORAGE_WRITE_BYTES = counter(
+    'dashboard_storage_write_bytes_total', 'Bytes of data files written', ('collection',))
+STORAGE_COMPACT_SECONDS = histogram(
+    'dashboard_storage_compaction_seconds', 'Time to fold a journal into a new snapshot',
+    ('collection',), buckets=SLOW_BUCKETS)
+
+JIRA_REQUEST_SECONDS = histogram(
+    'dashboard_jira_request_seconds', 'Latency of Jira API requests')
+JIRA_ERRORS = counter(
+    'dashboard_jira_errors_total', 'Jira API requests that failed')
+
+EMAIL_SEND_SECONDS = histogram(
+    'dashboard_email_send_seconds', 'Time to send one email over SMTP')
+EMAIL_ERRORS = counter(
+    'dashboard_email_errors_total', 'Emails that failed to send (each attempt)')
+
+JOB_SECONDS = histogram(
+    'dashboard_scheduler_job_seconds', 'Duration of scheduled job runs', ('job',),
+    buckets=SLOW_BUCKETS)
+JOB_ERRORS = counter(
+    'dashboard_scheduler_job_errors_total', 'Scheduled job runs that raised', ('job',))
@@ -0,0 +1,224 @@
+"""
+On-demand request profiler for Team Management Dashboard
+
+With PROFILER_ENABLED, an admin can profile any page by adding `?profile=1`
+to its URL or sending an `X-Profile: 1` header. The view then runs under
+cProfile; a streamed body is profiled chunk by chunk as it is sent, so it
+still streams, and its profile is stored once the body is finished. The
+result is kept in a bounded ring of recent profiles that can be browsed at
+/admin/profiles. Each profile has a top-N summary
+sorted by cumulative time and a collapsed-stack file ("a;b;c <µs>" per
+line) for flamegraph.pl or https://www.speedscope.app.
+
+cProfile records caller/callee pairs rather than whole stacks, so the
+collapsed stacks split each function's time between its callers in
+proportion to the time each caller spent in it.
+"""
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+from flask import Response, current_app, request, session
+
+from config import Config
+from utils import is_admin
+
+
+MAX_STACK_DEPTH = 64
+MIN_STACK_MICROSECONDS = 1
+
+
+class ProfileStore:
+    """The most recent profiles, oldest dropped first"""
+
+    def __init__(self, size):
+        self._profiles = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def new_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    def add(self, profile):
+        """Store a profile, giving it an id unless new_id() already did"""
+        with self._lock:
+            if 'id' not in profile:
+                profile['id'] = next(self._ids)
+            self._profiles.append(profile)
+        return profile
+
+    def list(self):
+        """Profiles, newest first"""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile['id'] == profile_id:
+                    return profile
+        return None
+
+
+_profile_store = None
+_profile_store_lock = threading.Lock()
+
+
+def get_profile_store():
+    """Return the process-wide ring of recent profiles"""
+    global _profile_store
+    with _profile_store_lock:
+        if _profile_store is None:
+            _profile_store = ProfileStore(Config.PROFILER_MAX_PROFILES)
+        return _profile_store
+
+
+def profiling_requested():
+    """True if an admin asked for this request to be profiled"""
+    flag = request.args.get('profile') or request.headers.get('X-Profile')
+    return flag in ('1', 'true') and is_admin()
+
+
+def _frame_label(func):
+    filename, line, name = func
+    if filename == '~':  # built-in
+        return name.replace(';', ',')
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(';', ',')
+
+
+def collapsed_stacks(stats):
+    """Turn pstats data into collapsed stacks: {"a;b;c": microseconds of self time}"""
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge[3]
+    roots = [func for func, entry in stats.items() if not set(entry[4]) - {func}]
+
+    stacks = {}
+
+    def walk(func, inclusive, path, seen):
+        if inclusive * 1e6 < MIN_STACK_MICROSECONDS:
+            return
+        _, _, own, cumulative, _ = stats[func]
+        scale = inclusive / cumulative if cumulative else 0
+        path = path + [_frame_label(func)]
+        self_time = own * scale
+        children = callees.get(func, {})
+        if len(path) >= MAX_STACK_DEPTH:
+            self_time = inclusive
+            children = {}
+        key = ';'.join(path)
+        for callee, edge_time in children.items():
+            if callee in seen:  # recursion: count it as time spent here
+                self_time += edge_time * scale
+            else:
+                walk(callee, edge_time * scale, path, seen | {callee})
+        micros = self_time * 1e6
+        if micros >= MIN_STACK_MICROSECONDS:
+            stacks[key] = stacks.get(key, 0) + micros
+
+    for root in roots:
+        walk(root, stats[root][3], [], {root})
+    return stacks
+
+
+def format_collapsed(stacks):
+    return ''.join(f"{stack} {int(micros)}\n" for stack, micros in sorted(stacks.items()))
+
+
+def summarize(profiler, top_n):
+    """Top functions by cumulative time, as printed by pstats"""
+    buffer = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buffer)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(top_n)
+    return buffer.getvalue()
+
+
+def _profiled_body(body, profiler, on_done):
+    """Iterate over a streamed body, profiling only the work that produces each chunk
+
+    on_done() is called once the body is exhausted or closed.
+    """
+    iterator = iter(body)
+    try:
+        while True:
+            profiler.enable()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                profiler.disable()
+            yield chunk
+    finally:
+        try:
+            if hasattr(body, 'close'):
+                body.close()
+        finally:
+            on_done()
+
+
+def _store_profile(profile, profiler, started):
+    profile['duration_ms'] = (time.perf_counter() - started) * 1000
+    profile['summary'] = summarize(profiler, Config.PROFILER_TOP_N)
+    profile['collapsed'] = format_collapsed(collapsed_stacks(pstats.Stats(profiler).stats))
+    get_profile_store().add(profile)
+
+
+def run_profiled(view, *args, **kwargs):
+    """Run a view under cProfile and store the result
+
+    A streamed body is not buffered: it is profiled while the server sends
+    it, and the profile is stored once the body is finished.
+    """
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        response = current_app.make_response(view(*args, **kwargs))
+    finally:
+        profiler.disable()
+
+    profile = {
+        'id': get_profile_store().new_id(),
+        'created': datetime.now().strftime(Config.DATETIME_FORMAT),
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'user': session.get('user'),
+        'status': response.status_code
+    }
+    response.headers['X-Profile-Id'] = str(profile['id'])
+    if response.is_streamed:
+        response.response = _profiled_body(
+            response.response, profiler, lambda: _store_profile(profile, profiler, started))
+    else:
+        _store_profile(profile, profiler, started)
+    return response
+
+
+def profiled(view):
+    """Wrap a view so admins can profile it on request"""
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        if profiling_requested():
+            return run_profiled(view, *args, **kwargs)
+        return view(*args, **kwargs)
+    return decorated_function
+
+
+def collapsed_download(profile):
+    """The collapsed stacks of a profile as a file download"""
+    return Response(
+        profile['collapsed'],
+        mimetype='text/plain',
+        headers={'Content-Disposition': f"attachment; filename=profile-{profile['id']}.collapsed"}
+    )
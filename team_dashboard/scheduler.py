@@ -0,0 +1,264 @@
+"""
+Background job scheduler for Team Management Dashboard
+
+Only one process may run the scheduled jobs (daily summary, member digests,
+Jira refresh, journal compaction), otherwise every gunicorn worker would send
+its own copy of the 18:00 summary. The process that runs them holds an exclusive lock on
+Config.SCHEDULER_LOCK_PATH. SCHEDULER_MODE selects who that is:
+
+- 'embedded' (default): the first web worker to grab the lock runs the
+  scheduler; the others serve requests only.
+- 'standalone': web workers never schedule anything; run the jobs in their
+  own process with `python scheduler.py`. A second copy waits as a hot
+  standby until the lock is released.
+- 'off': no scheduled jobs.
+
+The time each job last fired is kept in Config.SCHEDULER_STATE_PATH. When
+the scheduler starts, a daily job whose fire time passed while no scheduler
+was running (within SCHEDULER_MISFIRE_GRACE) is run once straight away.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from config import Config
+from metrics import JOB_SECONDS, JOB_ERRORS
+from storage import atomic_write_json
+
+
+class LeaderLock:
+    """Non-blocking exclusive lock held for the lifetime of the process"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def acquire(self):
+        """Try to become the leader; returns True on success"""
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lock_file = open(self.path, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class JobState:
+    """Last fire time of each job, persisted between restarts"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._adopt_legacy_file()
+        try:
+            with open(path, 'r') as f:
+                self.last_runs = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.last_runs = {}
+
+    def _adopt_legacy_file(self):
+        """Rename the state file of older releases (scheduler_state.json)
+
+        It was moved out of data/*.json, where 'storage.py migrate' took it
+        for a collection; without this the missed-run catch-up would start
+        from scratch after an upgrade.
+        """
+        legacy = os.path.splitext(self.path)[0] + '.json'
+        if legacy == self.path or os.path.exists(self.path) or not os.path.exists(legacy):
+            return
+        try:
+            os.replace(legacy, self.path)
+        except OSError as e:
+            print(f"Error renaming {legacy}: {e}")
+
+    def get(self, job_id):
+        return self.last_runs.get(job_id)
+
+    def record(self, job_id, timestamp):
+        with self._lock:
+            self.last_runs[job_id] = timestamp
+            try:
+                atomic_write_json(self.path, self.last_runs, indent=2)
+            except OSError as e:
+                print(f"Error saving scheduler state: {e}")
+
+
+def get_jobs():
+    """Return the scheduled jobs as (job_id, function, trigger, catch_up)"""
+    from utils import send_daily_summary
+    from digests import send_member_digests
+    from jira_client import refresh_jira_issues
+    from storage import compact_journals
+
+    daily = dict(hour=Config.EMAIL_SCHEDULE_HOUR, minute=Config.EMAIL_SCHEDULE_MINUTE)
+    jobs = [('daily_summary', send_daily_summary, CronTrigger(**daily), True)]
+    if Config.EMAIL_DIGESTS_ENABLED:
+        jobs.append(('member_digests', send_member_digests, CronTrigger(**daily), True))
+    if Config.JIRA_ENABLED:
+        # Keep the Jira issue cache warm, starting right away
+        jobs.append(('jira_refresh', refresh_jira_issues,
+                     IntervalTrigger(seconds=Config.JIRA_REFRESH_INTERVAL), False))
+    if Config.STORAGE_BACKEND == 'json' and Config.JOURNAL_ENABLED:
+        # Fold the write journals into the data files, starting right away
+        jobs.append(('journal_compaction', compact_journals,
+                     IntervalTrigger(seconds=Config.JOURNAL_COMPACT_INTERVAL), False))
+    return jobs
+
+
+def _first_run_time(scheduler, state, job_id, trigger, catch_up, now):
+    """When a job should first run: now if it must run at start or missed a run"""
+    if not catch_up:
+        return now
+    last_run = state.get(job_id)
+    if last_run is None:
+        # First start: nothing was missed, remember where we started from
+        state.record(job_id, now.timestamp())
+        return None
+    missed = trigger.get_next_fire_time(None, datetime.fromtimestamp(last_run, scheduler.timezone))
+    if missed is not None and missed <= now and (now - missed).total_seconds() <= Config.SCHEDULER_MISFIRE_GRACE:
+        print(f"Scheduler: catching up missed run of {job_id} ({missed:%Y-%m-%d %H:%M})")
+        return now
+    return None
+
+
+def timed_job(job_id, func):
+    """Wrap a job so its run time and failures are recorded in the metrics"""
+    seconds = JOB_SECONDS.labels(job_id)
+    errors = JOB_ERRORS.labels(job_id)
+
+    def run():
+        started = time.perf_counter()
+        try:
+            return func()
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            seconds.observe(time.perf_counter() - started)
+    return run
+
+
+def configure_scheduler(scheduler, state):
+    """Register every job on a scheduler and record their runs in state"""
+    now = datetime.now(scheduler.timezone)
+    for job_id, func, trigger, catch_up in get_jobs():
+        options = {}
+        first_run = _first_run_time(scheduler, state, job_id, trigger, catch_up, now)
+        if first_run is not None:
+            options['next_run_time'] = first_run
+        scheduler.add_job(
+            func=timed_job(job_id, func), trigger=trigger, id=job_id, replace_existing=True,
+            coalesce=True, misfire_grace_time=Config.SCHEDULER_MISFIRE_GRACE,
+            **options
+        )
+
+    def record_run(event):
+        state.record(event.job_id, event.scheduled_run_time.timestamp())
+
+    scheduler.add_listener(record_run, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+    return scheduler
+
+
+_scheduler = None
+_leader_lock = LeaderLock(Config.SCHEDULER_LOCK_PATH)
+
+
+def start_embedded_scheduler():
+    """Run the scheduler in this web worker if no other process does; returns it or None"""
+    global _scheduler
+    if _scheduler is not None:
+        return _scheduler
+    if not _leader_lock.acquire():
+        return None
+    scheduler = BackgroundScheduler()
+    configure_scheduler(scheduler, JobState(Config.SCHEDULER_STATE_PATH))
+    scheduler.start()
+    _scheduler = scheduler
+    return scheduler
+
+
+def shutdown_scheduler():
+    """Stop the scheduler (if this process runs it) and release leadership"""
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown()
+        _scheduler = None
+    _leader_lock.release()
+
+
+def run_standalone(poll_interval=5):
+    """Wait to become the leader, then run the jobs until interrupted"""
+    from mailer import start_outbox_worker
+
+    if not _leader_lock.acquire():
+        print("Scheduler: another process holds the lock, waiting as standby...")
+        while not _leader_lock.acquire():
+            time.sleep(poll_interval)
+    print(f"Scheduler: running jobs in process {os.getpid()}")
+    if Config.EMAIL_ENABLED:
+        start_outbox_worker()
+    scheduler = BlockingScheduler()
+    configure_scheduler(scheduler, JobState(Config.SCHEDULER_STATE_PATH))
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        _leader_lock.release()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the dashboard job scheduler')
+    parser.add_argument('--poll', type=int, default=5,
+                        help='seconds between lock attempts while on standby')
+    args = parser.parse_args(argv)
+    run_standalone(args.poll)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+Server-side search for Team Management Dashboard
+
+Each searchable collection gets an in-memory SearchIndex with:
+- field indexes (lowercased value -> ids) for exact-match filters such as
+  status, member_name or environment
+- a token inverted index (token -> ids) over every text field, with prefix
+  matching so partially typed words still match
+
+Indexes are built on first use and then kept current from the storage
+change feed; if the collection was written by another process (its version
+moved on without us seeing the change) the index is rebuilt.
+"""
+import bisect
+import re
+import threading
+
+from storage import get_storage, get_date_field, sort_value
+
+
+# Exact-match filter fields per searchable collection
+FILTER_FIELDS = {
+    'leaves.json': ('name', 'type', 'approval_status'),
+    'accomplishments.json': ('member_name', 'type'),
+    'inventory.json': ('assigned_to', 'condition'),
+    'servers.json': ('assigned_team', 'os', 'status'),
+    'builds.json': ('environment', 'status'),
+    'links.json': ('category',),
+    'announcements.json': ('posted_by',),
+    'celebrations.json': ('member_name', 'event_type'),
+    'skills.json': ('name', 'skill', 'level'),
+    'meetings.json': ('owner', 'status'),
+    'tasks.json': ('member_name', 'project', 'status'),
+}
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def _normalize(value):
+    return '' if value is None else str(value).strip().lower()
+
+
+class SearchIndex:
+    """Field and token indexes for one collection"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.filter_fields = FILTER_FIELDS[filename]
+        self.date_field = get_date_field(filename)
+        self.version = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.fields = {field: {} for field in self.filter_fields}
+        self.tokens = {}
+        self.sort_keys = {}  # id -> {field: sort value}
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+
+    def _sortable_fields(self):
+        if self.date_field:
+            return (self.date_field,) + self.filter_fields
+        return self.filter_fields
+
+    def _record_tokens(self, record):
+        tokens = set()
+        for field, value in record.items():
+            if field != 'id' and isinstance(value, str):
+                tokens.update(tokenize(value))
+        return tokens
+
+    def _add(self, record_id, record):
+        for field in self.filter_fields:
+            self.fields[field].setdefault(_normalize(record.get(field)), set()).add(record_id)
+        for token in self._record_tokens(record):
+            postings = self.tokens.get(token)
+            if postings is None:
+                postings = self.tokens[token] = set()
+                self._vocabulary_dirty = True
+            postings.add(record_id)
+        self.sort_keys[record_id] = {
+            field: sort_value(record.get(field)) for field in self._sortable_fields()
+        }
+
+    def _remove(self, record_id, record):
+        for field in self.filter_fields:
+            ids = self.fields[field].get(_normalize(record.get(field)))
+            if ids is not None:
+                ids.discard(record_id)
+        for token in self._record_tokens(record):
+            postings = self.tokens.get(token)
+            if postings is not None:
+                postings.discard(record_id)
+                if not postings:
+                    del self.tokens[token]
+                    self._vocabulary_dirty = True
+        self.sort_keys.pop(record_id, None)
+
+    def rebuild(self, storage):
+        """Rebuild the index from the full collection"""
+        with self._lock:
+            version = storage.version(self.filename)
+            self._reset()
+            for record in storage.load(self.filename):
+                if isinstance(record.get('id'), int):
+                    self._add(record['id'], record)
+            self.version = version
+
+    def apply(self, version, changes):
+        """Apply one committed write from the storage change feed"""
+        with self._lock:
+            if changes is None or self.version is None or version != self.version + 1:
+                # Missed a write (or the collection was replaced): rebuild lazily
+                self.version = None
+                return
+            for record_id, old, new in changes:
+                if old is not None:
+                    self._remove(record_id, old)
+                if new is not None:
+                    self._add(record_id, new)
+            self.version = version
+
+    def _prefix_ids(self, prefix):
+        """Union of postings for every token starting with prefix"""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self.tokens)
+            self._vocabulary_dirty = False
+        ids = set()
+        position = bisect.bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            ids |= self.tokens[self._vocabulary[position]]
+            position += 1
+        return ids
+
+    def match(self, text='', filters=None, date_from=None, date_to=None,
+              sort=None, descending=True):
+        """Return the ids of matching records in sorted order"""
+        with self._lock:
+            candidates = None
+            for field, value in (filters or {}).items():
+                ids = self.fields[field].get(_normalize(value), set())
+                candidates = set(ids) if candidates is None else candidates & ids
+            for token in tokenize(text):
+                ids = self._prefix_ids(token)
+                candidates = ids if candidates is None else candidates & ids
+            if candidates is None:
+                candidates = set(self.sort_keys)
+
+            if self.date_field and (date_from or date_to):
+                candidates = {
+                    record_id for record_id in candidates
+                    if (not date_from or self.sort_keys[record_id][self.date_field] >= date_from)
+                    and (not date_to or self.sort_keys[record_id][self.date_field] <= date_to)
+                }
+
+            sort = sort if sort in self._sortable_fields() else self.date_field
+            if sort:
+                key = lambda record_id: (self.sort_keys[record_id][sort], record_id)
+            else:
+                key = None
+            return sorted(candidates, key=key, reverse=descending)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _on_storage_change(filename, version, changes):
+    index = _indexes.get(filename)
+    if index is not None:
+        index.apply(version, changes)
+
+
+def get_search_index(filename):
+    """Return the up-to-date SearchIndex of a collection"""
+    storage = get_storage()
+    with _indexes_lock:
+        if not _indexes:
+            storage.subscribe(_on_storage_change)
+        index = _indexes.get(filename)
+        if index is None:
+            index = _indexes[filename] = SearchIndex(filename)
+    if index.version is None or index.version != storage.version(filename):
+        index.rebuild(storage)
+    return index
+
+
+def search(filename, text='', filters=None, date_from=None, date_to=None,
+           sort=None, descending=True, offset=0, limit=None):
+    """Return (records, total) matching a search over one collection"""
+    if filename not in FILTER_FIELDS:
+        raise ValueError(f"Collection is not searchable: {filename}")
+    unknown = set(filters or {}) - set(FILTER_FIELDS[filename])
+    if unknown:
+        raise ValueError(f"Unknown filter fields: {', '.join(sorted(unknown))}")
+
+    ids = get_search_index(filename).match(text, filters, date_from, date_to, sort, descending)
+    end = len(ids) if limit is None else offset + limit
+    return get_storage().get_many(filename, ids[offset:end]), len(ids)
@@ -47,7 +47,7 @@ function validateForm(formId) {
     form.classList.add('was-validated');
 }
 
-// Search/Filter functionality
+// Search/Filter functionality (client-side, for small static tables)
 function filterTable(inputId, tableId) {
     var input = document.getElementById(inputId);
     var filter = input.value.toLowerCase();
@@ -276,19 +276,164 @@ function debounce(func, wait) {
     };
 }
 
+// Server-side search: fetch the first page of matches and swap in the results
+var searchControllers = {};
+
+function searchResults(input) {
+    var selector = input.getAttribute('data-target');
+    var url = new URL(window.location.href);
+    if (input.value.trim()) {
+        url.searchParams.set('q', input.value.trim());
+    } else {
+        url.searchParams.delete('q');
+    }
+    url.searchParams.delete('page');
+
+    // Cancel the previous request so slow responses never overwrite newer ones
+    if (searchControllers[selector]) {
+        searchControllers[selector].abort();
+    }
+    var controller = new AbortController();
+    searchControllers[selector] = controller;
+
+    fetch(url, { signal: controller.signal, headers: { 'X-Requested-With': 'fetch' } })
+        .then(function(response) { return response.text(); })
+        .then(function(html) {
+            var doc = new DOMParser().parseFromString(html, 'text/html');
+            var fresh = doc.querySelector(selector);
+            var target = document.querySelector(selector);
+            if (fresh && target) {
+                target.innerHTML = fresh.innerHTML;
+            }
+            window.history.replaceState(null, '', url);
+        })
+        .catch(function(error) {
+            if (error.name !== 'AbortError') {
+                console.error('Search error:', error);
+            }
+        });
+}
+
 // Initialize search with debounce
 document.addEventListener('DOMContentLoaded', function() {
     var searchInputs = document.querySelectorAll('.search-input');
     searchInputs.forEach(function(input) {
-        input.addEventListener('keyup', debounce(function() {
+        input.addEventListener('input', debounce(function() {
             var tableId = input.getAttribute('data-table');
-            if (tableId) {
+            if (input.getAttribute('data-target')) {
+                searchResults(input);
+            } else if (tableId) {
                 filterTable(input.id, tableId);
             }
         }, 300));
     });
 });
 
+// Live dashboard updates: patch the figures from the /api/stream event stream
+function flashUpdated(element) {
+    element.classList.remove('live-updated');
+    void element.offsetWidth; // restart the animation
+    element.classList.add('live-updated');
+}
+
+function renderOnLeave(container, names) {
+    container.innerHTML = '';
+    if (!names.length) {
+        container.innerHTML = '<p class="text-muted mb-0">No one on leave today</p>';
+        return;
+    }
+    var list = document.createElement('ul');
+    list.className = 'list-group list-group-flush';
+    names.forEach(function(name) {
+        var item = document.createElement('li');
+        item.className = 'list-group-item';
+        item.innerHTML = '<i class="bi bi-person-dash"></i> ';
+        item.appendChild(document.createTextNode(name));
+        list.appendChild(item);
+    });
+    container.appendChild(list);
+}
+
+function renderAccomplishments(container, accomplishments) {
+    container.innerHTML = '';
+    if (!accomplishments.length) {
+        container.innerHTML = '<p class="text-muted mb-0">No accomplishments logged today</p>';
+        return;
+    }
+    var list = document.createElement('div');
+    list.className = 'list-group list-group-flush';
+    accomplishments.forEach(function(acc) {
+        var item = document.createElement('div');
+        item.className = 'list-group-item';
+        var name = document.createElement('strong');
+        name.textContent = acc.member_name;
+        var impact = document.createElement('em');
+        impact.textContent = 'Impact: ' + (acc.impact || 'N/A');
+        item.append(name, ' - ' + acc.type, document.createElement('br'),
+                    acc.description, document.createElement('br'), impact);
+        list.appendChild(item);
+    });
+    container.appendChild(list);
+}
+
+function applyDashboardStats(stats) {
+    document.querySelectorAll('[data-stat]').forEach(function(element) {
+        var value = stats[element.getAttribute('data-stat')];
+        if (value !== undefined && element.textContent !== String(value)) {
+            element.textContent = value;
+            flashUpdated(element);
+        }
+    });
+    var renderers = { on_leave_names: renderOnLeave, recent_accomplishments_list: renderAccomplishments };
+    document.querySelectorAll('[data-live]').forEach(function(container) {
+        var key = container.getAttribute('data-live');
+        var value = JSON.stringify(stats[key]);
+        if (renderers[key] && stats[key] && container.getAttribute('data-value') !== value) {
+            if (container.hasAttribute('data-value')) {
+                flashUpdated(container);
+            }
+            container.setAttribute('data-value', value);
+            renderers[key](container, stats[key]);
+        }
+    });
+}
+
+// Wait before reconnecting after the server turned the stream away (full, or restarting);
+// doubled after each refusal up to the cap, and reset once a stream opens
+var LIVE_RETRY_MS = 30000;
+var LIVE_RETRY_MAX_MS = 30 * 60000;
+var liveRetryMs = LIVE_RETRY_MS;
+
+function connectLiveUpdates(url) {
+    var source = new EventSource(url);
+    source.addEventListener('open', function() {
+        liveRetryMs = LIVE_RETRY_MS;
+    });
+    source.addEventListener('stats', function(event) {
+        applyDashboardStats(JSON.parse(event.data));
+    });
+    source.addEventListener('change', function(event) {
+        var change = JSON.parse(event.data);
+        if (change.stats) {
+            applyDashboardStats(change.stats);
+        }
+    });
+    source.onerror = function() {
+        // The browser reconnects by itself unless the server turned us away
+        if (source.readyState === EventSource.CLOSED) {
+            setTimeout(function() { connectLiveUpdates(url); }, liveRetryMs);
+            liveRetryMs = Math.min(liveRetryMs * 2, LIVE_RETRY_MAX_MS);
+        }
+    };
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    var live = document.querySelector('[data-live-updates]');
+    if (live && window.EventSource) {
+        connectLiveUpdates(live.getAttribute('data-live-updates'));
+    }
+});
+
 // Console welcome message
 console.log('%c Team Management Dashboard ', 'background: #667eea; color: white; font-size: 20px; padding: 10px;');
 console.log('%c Powered by Flask & Bootstrap 5 ', 'background: #764ba2; color: white; font-size: 14px; padding: 5px;');
@@ -0,0 +1,1174 @@
+"""
+Storage backends for Team Management Dashboard
+
+Collections are addressed by their data file name (e.g. 'leaves.json') so the
+JSON and SQLite backends are interchangeable behind the helpers in utils.py.
+The backend is chosen with the STORAGE_BACKEND setting ('json' or 'sqlite').
+
+All writes go through a per-collection transaction:
+
+    with get_storage().transaction('leaves.json') as txn:
+        leave = txn.get(leave_id)
+        txn.update(leave_id, {'approval_status': 'approved'})
+
+The JSON backend holds an advisory lock on the collection for the duration of
+the transaction, so concurrent workers never lose updates. A commit appends
+one fsynced line to the collection's journal ('leaves.json.journal'), and
+readers replay the journal on top of the last snapshot ('leaves.json').
+Compaction rewrites the snapshot with a temp-file-and-rename and starts a new
+journal, keeping the old one as an audit trail:
+
+    python storage.py compact
+
+Ids come from a per-collection sequence kept in metadata next to the
+collection ('leaves.json.meta' or the SQLite '_meta' table). Allocating an id
+is O(1), and ids are never reused after a delete. The same metadata holds a
+version counter and modification time updated on every committed write
+(they also back the API's ETag/Last-Modified headers); in-process
+subscribers are told about each commit so derived indexes can follow along.
+
+Migrate existing data files into SQLite with:
+
+    python storage.py migrate
+"""
+import argparse
+import bisect
+import glob
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from config import Config
+from metrics import (
+    STORAGE_READ_SECONDS, STORAGE_READ_BYTES, STORAGE_WRITE_SECONDS, STORAGE_WRITE_BYTES,
+    STORAGE_COMPACT_SECONDS
+)
+
+
+# Field indexed as the "date" column for each collection (default: 'date')
+DATE_FIELDS = {
+    'tasks.json': 'due_date',
+    'skills.json': 'last_updated',
+    'users.json': None,
+    'inventory.json': None,
+    'servers.json': None,
+    'links.json': None,
+}
+
+
+# Appended to a collection's file name for its journal of committed writes
+JOURNAL_SUFFIX = '.journal'
+
+
+class StorageError(Exception):
+    """Raised when a collection cannot be read or written safely"""
+
+
+def get_date_field(filename):
+    """Return the record field used as the date of a collection, if any"""
+    return DATE_FIELDS.get(filename, 'date')
+
+
+def sort_value(value):
+    """Normalise a field value so records with mixed types can be sorted"""
+    return '' if value is None else str(value)
+
+
+def fsync_dir(dirpath):
+    """Flush a directory so a rename or a new file in it survives a crash (POSIX only)"""
+    if os.name != 'posix':
+        return
+    fd = os.open(dirpath, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(filepath, data, indent=None):
+    """Write JSON to a temp file in the same directory and rename it over filepath"""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(filepath), prefix=f'.{os.path.basename(filepath)}.', suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+        fsync_dir(os.path.dirname(filepath) or '.')
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def copy_records(data):
+    """Copy a collection so callers can mutate it without touching shared state"""
+    if isinstance(data, list):
+        return [dict(item) if isinstance(item, dict) else item for item in data]
+    return data
+
+
+class Storage:
+    """Interface shared by all storage backends"""
+
+    def __init__(self):
+        self._listeners = []
+        self._current_user = lambda: None
+
+    def set_user_provider(self, callback):
+        """Use callback() to name the user behind each write (kept in the JSON journal)"""
+        self._current_user = callback
+
+    def subscribe(self, callback):
+        """Call callback(filename, version, changes) after every committed write
+
+        changes is a list of (record_id, old_record, new_record) tuples, with
+        None for the missing side of an insert or delete, or None when the
+        whole collection was replaced.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, filename, version, changes):
+        for callback in self._listeners:
+            try:
+                callback(filename, version, changes)
+            except Exception as e:
+                print(f"Error in storage listener: {e}")
+
+    def version(self, filename):
+        """Return the collection's write counter (0 if never written)"""
+        raise NotImplementedError
+
+    def version_info(self, filename):
+        """Return (version, last modified epoch seconds or None) of a collection"""
+        return self.version(filename), None
+
+    def load(self, filename):
+        """Return every record of a collection"""
+        raise NotImplementedError
+
+    def get(self, filename, record_id):
+        """Return one record by id, or None"""
+        raise NotImplementedError
+
+    def get_many(self, filename, record_ids):
+        """Return the records with the given ids, in that order, skipping missing ones"""
+        records = (self.get(filename, record_id) for record_id in record_ids)
+        return [record for record in records if record is not None]
+
+    def query(self, filename, sort=None, descending=False, offset=0, limit=None):
+        """Return (records, total) for one window of a sorted collection"""
+        raise NotImplementedError
+
+    def transaction(self, filename):
+        """Context manager yielding a transaction on one collection"""
+        raise NotImplementedError
+
+    def save(self, filename, data):
+        """Replace a whole collection"""
+        with self.transaction(filename) as txn:
+            txn.replace(data)
+
+    def allocate_id(self, filename):
+        """Reserve and return the next id of a collection"""
+        with self.transaction(filename) as txn:
+            return txn.allocate_id()
+
+    def insert(self, filename, record):
+        """Insert a record, assigning it an id, and return it"""
+        with self.transaction(filename) as txn:
+            return txn.insert(record)
+
+    def insert_many(self, filename, records):
+        """Insert records in one write, assigning ids in a batch; returns the ids"""
+        with self.transaction(filename) as txn:
+            return txn.insert_many(records)
+
+    def iter_records(self, filename, batch_size=1000):
+        """Iterate over a collection in id order without copying it all at once"""
+        for record in self.load(filename):
+            yield record
+
+    def update(self, filename, record_id, fields):
+        """Update fields of a record; return the record or None if missing"""
+        with self.transaction(filename) as txn:
+            return txn.update(record_id, fields)
+
+    def delete(self, filename, record_id):
+        """Delete a record; return True if it existed"""
+        with self.transaction(filename) as txn:
+            return txn.delete(record_id)
+
+    def clear_cache(self):
+        """Drop any in-process caches"""
+
+
+# ============================================================================
+# JSON Backend
+# ============================================================================
+
+def index_records(records):
+    """Build an ordered id -> record index for a list of records
+
+    Records without a usable id (or with a duplicate one) are kept under a
+    negative key so that nothing is lost when the collection is written back.
+    """
+    index = {}
+    for position, record in enumerate(records):
+        key = record.get('id') if isinstance(record, dict) else None
+        if not isinstance(key, int) or key in index:
+            key = -(position + 1)
+        index[key] = record
+    return index
+
+
+class JSONTransaction:
+    """Read-modify-write view of a JSON collection, written once on commit
+
+    Reads go through the collection's id index, and changes are kept in an
+    overlay until commit, so get/update/delete by id are O(1).
+    """
+
+    def __init__(self, filename, records, meta):
+        self.filename = filename
+        self._records = records  # id -> record index shared with the cache
+        self._changes = {}  # id -> new record, or None when deleted
+        self._meta = meta
+        self._replaced = False
+        self.changed = False
+        self.meta_changed = False
+
+    def _current(self, record_id):
+        if record_id in self._changes:
+            return self._changes[record_id]
+        return self._records.get(record_id)
+
+    def records(self):
+        """Iterate over the records as they will be written"""
+        for key, record in self._records.items():
+            if key in self._changes:
+                if self._changes[key] is not None:
+                    yield self._changes[key]
+            else:
+                yield record
+        for key, record in self._changes.items():
+            if key not in self._records and record is not None:
+                yield record
+
+    def all(self):
+        """Return a copy of every record"""
+        return [dict(record) for record in self.records()]
+
+    def get(self, record_id):
+        """Return a copy of a record by id, or None"""
+        record = self._current(record_id)
+        return dict(record) if record is not None else None
+
+    def _max_id(self):
+        return max(max(self._records, default=0), 0)
+
+    def allocate_id(self):
+        """Take the next id from the collection's sequence"""
+        next_id = self._meta.get('next_id')
+        if next_id is None:
+            # First use: seed the sequence from the existing records
+            next_id = self._max_id() + 1
+        self._meta['next_id'] = next_id + 1
+        self.meta_changed = True
+        return next_id
+
+    def allocate_ids(self, count):
+        """Take `count` consecutive ids from the sequence; returns a range"""
+        first = self.allocate_id()
+        self._meta['next_id'] = first + count
+        return range(first, first + count)
+
+    def insert(self, record):
+        record = dict(record)
+        record['id'] = self.allocate_id()
+        self._changes[record['id']] = record
+        self.changed = True
+        return dict(record)
+
+    def insert_many(self, records):
+        records = list(records)
+        if not records:
+            return []
+        ids = self.allocate_ids(len(records))
+        for record_id, record in zip(ids, records):
+            record = dict(record)
+            record['id'] = record_id
+            self._changes[record_id] = record
+        self.changed = True
+        return list(ids)
+
+    def update(self, record_id, fields):
+        record = self._current(record_id)
+        if record is None:
+            return None
+        record = dict(record, **fields)
+        record['id'] = record_id
+        self._changes[record_id] = record
+        self.changed = True
+        return dict(record)
+
+    def delete(self, record_id):
+        if self._current(record_id) is None:
+            return False
+        self._changes[record_id] = None
+        self.changed = True
+        return True
+
+    def replace(self, records):
+        """Replace the whole collection"""
+        self._records = index_records(copy_records(list(records)))
+        self._changes = {}
+        self._replaced = True
+        next_id = max(self._meta.get('next_id') or 1, self._max_id() + 1)
+        if next_id != self._meta.get('next_id'):
+            self._meta['next_id'] = next_id
+            self.meta_changed = True
+        self.changed = True
+
+    def changes(self):
+        """Return (id, old, new) tuples for subscribers, or None after replace()"""
+        if self._replaced:
+            return None
+        changes = []
+        for key, record in self._changes.items():
+            old = self._records.get(key)
+            if old is not None or record is not None:
+                changes.append((key, old, record))
+        return changes
+
+    def journal_ops(self):
+        """Return the journal operations that replay this transaction
+
+        ["put", record] sets a record, ["del", id] removes one and
+        ["replace", records] swaps the whole collection.
+        """
+        ops = [['replace', list(self._records.values())]] if self._replaced else []
+        for key, record in self._changes.items():
+            if record is not None:
+                ops.append(['put', record])
+            elif key in self._records:
+                ops.append(['del', key])
+        return ops
+
+    def apply(self):
+        """Fold the overlay into the index after a successful write"""
+        for key, record in self._changes.items():
+            if record is None:
+                self._records.pop(key, None)
+            else:
+                self._records[key] = record
+        self._changes = {}
+        return self._records
+
+
+class CachedCollection:
+    """A parsed collection: its snapshot with the journal replayed on top"""
+
+    def __init__(self, signature, index, meta):
+        self.signature = signature  # of the snapshot file, or None if there is none yet
+        self.index = index
+        self.meta = meta
+        self.journal = None  # signature of the journal when it was last read
+        self.offset = 0  # bytes of the journal replayed so far
+
+
+class JSONStorage(Storage):
+    """Stores each collection as a JSON snapshot plus an append-only journal
+
+    Every committed transaction appends one fsynced line to
+    '<filename>.journal', so a write costs O(size of the changed records)
+    rather than a rewrite of the whole collection. Compaction folds the
+    journal into a new snapshot once it outgrows the snapshot (and when
+    compact() is called), moving it to '<filename>.journal.1' where the
+    most recent journals are kept as an audit trail. With journal=False
+    every commit writes a new snapshot instead.
+    """
+
+    def __init__(self, data_dir, journal=True, compact_bytes=4 * 1024 * 1024, journal_archives=10):
+        super().__init__()
+        self.data_dir = data_dir
+        self.journal = journal
+        self.compact_bytes = compact_bytes
+        self.journal_archives = journal_archives
+        # Parsed collections keyed by snapshot path: {filepath: CachedCollection}
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        # Presorted keys per (filepath, field): {key: (index, [(value, id), ...])}
+        self._sorted = {}
+        # In-process locks per collection; the file lock covers other processes
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _path(self, filename):
+        return os.path.join(self.data_dir, filename)
+
+    @staticmethod
+    def _signature(filepath):
+        """Return (inode, mtime_ns, size) used to detect changes to a file, or None if missing"""
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, filename):
+        """Return the CachedCollection of a collection, reading what changed on disk"""
+        filepath = self._path(filename)
+        snapshot = self._signature(filepath)
+        journal = self._signature(filepath + JOURNAL_SUFFIX)
+        cached = self._cache.get(filepath)
+        if cached is not None and cached.signature == snapshot:
+            if cached.journal == journal:
+                return cached
+            if (journal is not None and journal[2] >= cached.offset
+                    and (cached.journal is None or cached.journal[0] == journal[0])):
+                # Only new lines were appended (by another process): replay them
+                with self._cache_lock:
+                    if self._cache.get(filepath) is cached:
+                        self._read_journal(filename, cached)
+                        return cached
+
+        # Retry if the snapshot is replaced by a compaction while it is read
+        for _ in range(5):
+            cached = self._read_snapshot(filename, snapshot)
+            current = self._signature(filepath)
+            if current == snapshot:
+                break
+            snapshot = current
+        with self._cache_lock:
+            self._read_journal(filename, cached)
+            self._cache[filepath] = cached
+        return cached
+
+    def _read_snapshot(self, filename, signature):
+        """Parse a collection's snapshot and metadata into a CachedCollection"""
+        filepath = self._path(filename)
+        data = []
+        if signature is not None:
+            started = time.perf_counter()
+            try:
+                with open(filepath, 'r') as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                data = []
+            except json.JSONDecodeError as e:
+                raise StorageError(f"Corrupt data file {filename}: {e}") from e
+            if not isinstance(data, list):
+                raise StorageError(f"Data file {filename} does not contain a list")
+            STORAGE_READ_SECONDS.labels(filename).observe(time.perf_counter() - started)
+            STORAGE_READ_BYTES.labels(filename).inc(signature[2])
+
+        try:
+            with open(filepath + '.meta', 'r') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = {}
+        except json.JSONDecodeError as e:
+            raise StorageError(f"Corrupt metadata for {filename}: {e}") from e
+        return CachedCollection(signature, index_records(data), meta)
+
+    def _read_journal(self, filename, cached):
+        """Replay the journal lines written since cached.offset (cache lock held)
+
+        Only complete lines are replayed. A line that does not parse is taken
+        to be a write torn by a crash if nothing follows it; the next commit
+        cuts it off.
+        """
+        try:
+            f = open(self._path(filename) + JOURNAL_SUFFIX, 'rb')
+        except FileNotFoundError:
+            cached.journal = None
+            cached.offset = 0
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            f.seek(cached.offset)
+            data = f.read()
+        try:
+            if data:
+                self._replay_lines(filename, cached, data)
+        finally:
+            # Only count what was replayed, so that a line caught half written
+            # (or appended after the fstat) is read again next time
+            cached.journal = (stat.st_ino, stat.st_mtime_ns, cached.offset)
+
+    def _replay_lines(self, filename, cached, data):
+        """Replay the complete lines of a chunk read from the journal"""
+        started = time.perf_counter()
+        filepath = self._path(filename)
+        # A collection being loaded from scratch has no presorted keys to maintain yet
+        track_sorted = self._cache.get(filepath) is cached
+        lines = data.split(b'\n')
+        for position, line in enumerate(lines[:-1]):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                if any(rest.strip() for rest in lines[position + 1:]):
+                    raise StorageError(f"Corrupt journal for {filename} at byte {cached.offset}")
+                break
+            self._replay(filepath, cached, entry, track_sorted)
+            cached.offset += len(line) + 1
+        STORAGE_READ_SECONDS.labels(filename).observe(time.perf_counter() - started)
+        STORAGE_READ_BYTES.labels(filename).inc(len(data))
+
+    def _replay(self, filepath, cached, entry, track_sorted=True):
+        """Apply one journal entry, skipping changes the snapshot already has"""
+        meta = cached.meta
+        if entry.get('next_id') is not None:
+            meta['next_id'] = max(meta.get('next_id') or 0, entry['next_id'])
+        if 'ops' not in entry or entry['v'] <= meta.get('version', 0):
+            return
+        for op in entry['ops']:
+            if op[0] == 'replace':
+                cached.index = index_records(op[1])
+                continue
+            record_id, record = (op[1]['id'], op[1]) if op[0] == 'put' else (op[1], None)
+            if track_sorted:
+                self._update_sorted_keys(filepath, cached.index, {record_id: record})
+            if record is None:
+                cached.index.pop(record_id, None)
+            else:
+                cached.index[record_id] = record
+        meta['version'] = entry['v']
+        meta['modified'] = entry.get('t')
+
+    def _read(self, filename):
+        """Return the cached id index of a collection"""
+        return self._load(filename).index
+
+    def load(self, filename):
+        """Load a collection, reading only what changed on disk since the last call"""
+        index = self._read(filename)
+        with self._cache_lock:
+            return [dict(record) for record in index.values()]
+
+    def get(self, filename, record_id):
+        index = self._read(filename)
+        with self._cache_lock:
+            record = index.get(record_id)
+            return dict(record) if record is not None else None
+
+    def get_many(self, filename, record_ids):
+        """Copy several records out of the cached index in one read"""
+        index = self._read(filename)
+        with self._cache_lock:
+            return [dict(index[record_id]) for record_id in record_ids if record_id in index]
+
+    def iter_records(self, filename, batch_size=1000):
+        """Iterate over a snapshot of the cached collection, copying one record at a time"""
+        index = self._read(filename)
+        with self._cache_lock:
+            records = list(index.values())
+        for record in records:
+            yield dict(record)
+
+    @staticmethod
+    def _sort_key(field, key, record):
+        """Value a record is ordered by in the presorted keys of field"""
+        if field == 'id':
+            return key  # the index key: the id, or negative for records without one
+        return sort_value(record.get(field))
+
+    def _sorted_keys(self, filepath, index, field):
+        """Return (value, id) pairs of a collection sorted by field
+
+        Built once per cached index and kept up to date by _write; must be
+        called with the cache lock held.
+        """
+        cached = self._sorted.get((filepath, field))
+        if cached and cached[0] is index:
+            return cached[1]
+        keys = sorted((self._sort_key(field, key, record), key) for key, record in index.items())
+        self._sorted[(filepath, field)] = (index, keys)
+        return keys
+
+    def _update_sorted_keys(self, filepath, index, changes):
+        """Move changed records within every presorted index of a collection"""
+        for (path, field), (sorted_index, keys) in list(self._sorted.items()):
+            if path != filepath or sorted_index is not index:
+                continue
+            if len(changes) > max(64, len(keys) // 8):
+                # Cheaper to sort again on the next query than to insert one by one
+                del self._sorted[(path, field)]
+                continue
+            for key, record in changes.items():
+                old = index.get(key)
+                if old is not None:
+                    position = bisect.bisect_left(keys, (self._sort_key(field, key, old), key))
+                    if position < len(keys) and keys[position][1] == key:
+                        del keys[position]
+                if record is not None:
+                    bisect.insort(keys, (self._sort_key(field, key, record), key))
+
+    def query(self, filename, sort=None, descending=False, offset=0, limit=None):
+        """Return one page of a collection using its presorted index"""
+        filepath = self._path(filename)
+        index = self._read(filename)
+        with self._cache_lock:
+            total = len(index)
+            end = total if limit is None else min(total, offset + limit)
+            pairs = self._sorted_keys(filepath, index, sort or 'id')
+            if descending:
+                # Count from the end rather than reverse the whole list
+                selected = [key for _, key in reversed(pairs[max(0, total - end):max(0, total - offset)])]
+            else:
+                selected = [key for _, key in pairs[offset:end]]
+            return [dict(index[key]) for key in selected], total
+
+    def version(self, filename):
+        try:
+            return self._load(filename).meta.get('version', 0)
+        except StorageError:
+            return 0
+
+    def version_info(self, filename):
+        try:
+            cached = self._load(filename)
+        except StorageError:
+            return 0, None
+        modified = cached.meta.get('modified')
+        if cached.signature is not None:
+            # The snapshot may also have been edited by hand since the last commit
+            modified = max(modified or 0, cached.signature[1] / 1e9)
+        return cached.meta.get('version', 0), modified
+
+    def _append(self, filename, cached, entry):
+        """Append one entry to the journal and fsync it; returns the bytes written"""
+        line = (json.dumps(entry, default=str) + '\n').encode()
+        journal_path = self._path(filename) + JOURNAL_SUFFIX
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0)
+        fd = os.open(journal_path, flags, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size != cached.offset:
+                if size < cached.offset:
+                    raise StorageError(f"Journal for {filename} is shorter than what was replayed")
+                print(f"Discarding {size - cached.offset} bytes of a torn write at the end of "
+                      f"{filename}{JOURNAL_SUFFIX}")
+                os.ftruncate(fd, cached.offset)
+            written = 0
+            while written < len(line):
+                written += os.write(fd, line[written:])
+            os.fsync(fd)
+            stat = os.fstat(fd)
+        finally:
+            os.close(fd)
+        if size == 0:
+            fsync_dir(self.data_dir)  # make a newly created journal survive a crash
+        with self._cache_lock:
+            cached.journal = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            cached.offset = stat.st_size
+        return len(line)
+
+    def _write_snapshot(self, filename, cached):
+        """Write the collection and its metadata, then archive the journal; returns the bytes written
+
+        The journal is only archived once the snapshot and metadata are on
+        disk. Replaying it again after a crash in between is harmless since
+        every entry sets records to their value at that point.
+        """
+        started = time.perf_counter()
+        filepath = self._path(filename)
+        with self._cache_lock:
+            records = list(cached.index.values())
+        atomic_write_json(filepath, records, indent=2)
+        atomic_write_json(filepath + '.meta', cached.meta)
+        self._archive_journal(filepath + JOURNAL_SUFFIX)
+        with self._cache_lock:
+            cached.signature = self._signature(filepath)
+            cached.journal = None
+            cached.offset = 0
+        STORAGE_COMPACT_SECONDS.labels(filename).observe(time.perf_counter() - started)
+        return cached.signature[2]
+
+    def _archive_journal(self, journal_path):
+        """Move the journal to '.journal.1', shifting older ones along"""
+        if not os.path.exists(journal_path):
+            return
+        if self.journal_archives <= 0 or os.path.getsize(journal_path) == 0:
+            os.remove(journal_path)
+        else:
+            for generation in range(self.journal_archives - 1, 0, -1):
+                older = f'{journal_path}.{generation}'
+                if os.path.exists(older):
+                    os.replace(older, f'{journal_path}.{generation + 1}')
+            os.replace(journal_path, journal_path + '.1')
+        fsync_dir(self.data_dir)
+
+    def _thread_lock(self, filename):
+        with self._locks_lock:
+            lock = self._locks.get(filename)
+            if lock is None:
+                lock = self._locks[filename] = threading.Lock()
+        return lock
+
+    @contextmanager
+    def _file_lock(self, filename):
+        """Hold an exclusive advisory lock on '<filename>.lock'"""
+        with self._thread_lock(filename):
+            with open(self._path(filename) + '.lock', 'a+') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    else:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @contextmanager
+    def transaction(self, filename):
+        """Lock a collection, yield a JSONTransaction and journal its changes on commit"""
+        with self._file_lock(filename):
+            cached = self._load(filename)
+            txn = JSONTransaction(filename, cached.index, dict(cached.meta))
+            yield txn
+            if not (txn.changed or txn.meta_changed):
+                return
+            started = time.perf_counter()
+            entry = {'v': txn._meta.get('version', 0)}
+            if txn._meta.get('next_id') is not None:
+                entry['next_id'] = txn._meta['next_id']
+            if txn.changed:
+                txn._meta['version'] = entry['v'] = entry['v'] + 1
+                txn._meta['modified'] = entry['t'] = time.time()
+                user = self._current_user()
+                if user:
+                    entry['user'] = user
+                entry['ops'] = txn.journal_ops()
+            changes = txn.changes()
+
+            written = 0
+            if self.journal:
+                written += self._append(filename, cached, entry)
+            elif not txn.changed:
+                atomic_write_json(self._path(filename) + '.meta', txn._meta)
+            if txn.changed:
+                with self._cache_lock:
+                    if not txn._replaced:
+                        self._update_sorted_keys(self._path(filename), cached.index, txn._changes)
+                    cached.index = txn.apply()
+                    cached.meta = txn._meta
+                snapshot_size = cached.signature[2] if cached.signature else 0
+                if not self.journal or cached.offset > max(self.compact_bytes, snapshot_size):
+                    written += self._write_snapshot(filename, cached)
+                STORAGE_WRITE_BYTES.labels(filename).inc(written)
+                STORAGE_WRITE_SECONDS.labels(filename).observe(time.perf_counter() - started)
+                self._notify(filename, txn._meta['version'], changes)
+            else:
+                with self._cache_lock:
+                    cached.meta = txn._meta
+
+    def compact(self, filename):
+        """Fold a collection's journal into its snapshot; returns True if there was one"""
+        with self._file_lock(filename):
+            cached = self._load(filename)
+            if cached.journal is None:
+                return False
+            STORAGE_WRITE_BYTES.labels(filename).inc(self._write_snapshot(filename, cached))
+            return True
+
+    def compact_all(self):
+        """Compact every collection that has a journal; returns their names"""
+        compacted = []
+        for journal_path in sorted(glob.glob(os.path.join(self.data_dir, '*' + JOURNAL_SUFFIX))):
+            filename = os.path.basename(journal_path)[:-len(JOURNAL_SUFFIX)]
+            if self.compact(filename):
+                compacted.append(filename)
+        return compacted
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+            self._sorted.clear()
+
+
+
+# ============================================================================
+# SQLite Backend
+# ============================================================================
+
+class SQLiteTransaction:
+    """Row-level operations on one collection inside an SQLite transaction"""
+
+    def __init__(self, conn, table, filename):
+        self.conn = conn
+        self.table = table
+        self.filename = filename
+        self.changes = []  # (id, old, new) tuples for subscribers
+        self.replaced = False
+
+    @property
+    def changed(self):
+        return self.replaced or bool(self.changes)
+
+    def _row_values(self, record):
+        date_field = get_date_field(self.filename)
+        date_value = record.get(date_field) if date_field else None
+        return (record['id'], date_value, json.dumps(record, default=str))
+
+    def all(self):
+        rows = self.conn.execute(f'SELECT data FROM "{self.table}" ORDER BY id')
+        return [json.loads(data) for (data,) in rows]
+
+    def get(self, record_id):
+        row = self.conn.execute(
+            f'SELECT data FROM "{self.table}" WHERE id = ?', (record_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _max_id(self):
+        (max_id,) = self.conn.execute(
+            f'SELECT COALESCE(MAX(id), 0) FROM "{self.table}"'
+        ).fetchone()
+        return max_id
+
+    def allocate_id(self):
+        """Take the next id from the collection's sequence"""
+        row = self.conn.execute(
+            'SELECT next_id FROM _meta WHERE collection = ?', (self.table,)
+        ).fetchone()
+        next_id = row[0] if row else self._max_id() + 1
+        self.conn.execute(
+            'INSERT INTO _meta (collection, next_id) VALUES (?, ?) '
+            'ON CONFLICT(collection) DO UPDATE SET next_id = excluded.next_id',
+            (self.table, next_id + 1)
+        )
+        return next_id
+
+    def allocate_ids(self, count):
+        """Take `count` consecutive ids from the sequence; returns a range"""
+        first = self.allocate_id()
+        self.conn.execute(
+            'UPDATE _meta SET next_id = ? WHERE collection = ?', (first + count, self.table)
+        )
+        return range(first, first + count)
+
+    def insert(self, record):
+        record = dict(record)
+        record['id'] = self.allocate_id()
+        self.conn.execute(
+            f'INSERT INTO "{self.table}" (id, date, data) VALUES (?, ?, ?)',
+            self._row_values(record)
+        )
+        self.changes.append((record['id'], None, record))
+        return dict(record)
+
+    def insert_many(self, records):
+        records = list(records)
+        if not records:
+            return []
+        ids = self.allocate_ids(len(records))
+        inserted = []
+        for record_id, record in zip(ids, records):
+            record = dict(record)
+            record['id'] = record_id
+            inserted.append(record)
+        self.conn.executemany(
+            f'INSERT INTO "{self.table}" (id, date, data) VALUES (?, ?, ?)',
+            (self._row_values(record) for record in inserted)
+        )
+        self.changes.extend((record['id'], None, record) for record in inserted)
+        return list(ids)
+
+    def update(self, record_id, fields):
+        old = self.get(record_id)
+        if old is None:
+            return None
+        record = dict(old, **fields)
+        record['id'] = record_id
+        _, date_value, data = self._row_values(record)
+        self.conn.execute(
+            f'UPDATE "{self.table}" SET date = ?, data = ? WHERE id = ?',
+            (date_value, data, record_id)
+        )
+        self.changes.append((record_id, old, record))
+        return dict(record)
+
+    def delete(self, record_id):
+        old = self.get(record_id)
+        if old is None:
+            return False
+        self.conn.execute(f'DELETE FROM "{self.table}" WHERE id = ?', (record_id,))
+        self.changes.append((record_id, old, None))
+        return True
+
+    def replace(self, records):
+        self.conn.execute(f'DELETE FROM "{self.table}"')
+        self.conn.executemany(
+            f'INSERT INTO "{self.table}" (id, date, data) VALUES (?, ?, ?)',
+            (self._row_values(record) for record in records)
+        )
+        self.conn.execute(
+            'INSERT INTO _meta (collection, next_id) VALUES (?, ?) '
+            'ON CONFLICT(collection) DO UPDATE SET next_id = MAX(next_id, excluded.next_id)',
+            (self.table, self._max_id() + 1)
+        )
+        self.replaced = True
+
+    def bump_version(self):
+        """Increment and return the collection's version counter"""
+        self.conn.execute(
+            'INSERT INTO _meta (collection, next_id, version, modified) VALUES (?, ?, 1, ?) '
+            'ON CONFLICT(collection) DO UPDATE SET version = version + 1, modified = excluded.modified',
+            (self.table, self._max_id() + 1, time.time())
+        )
+        (version,) = self.conn.execute(
+            'SELECT version FROM _meta WHERE collection = ?', (self.table,)
+        ).fetchone()
+        return version
+
+
+class SQLiteStorage(Storage):
+    """Stores each collection as a table in one SQLite database (WAL mode)
+
+    Every table has an integer primary key, an indexed date column and the
+    record itself as a JSON document, so single-row writes touch one row.
+    """
+
+    def __init__(self, db_path):
+        super().__init__()
+        self.db_path = db_path
+        self._local = threading.local()
+        self._known_tables = set()
+        self._schema_lock = threading.Lock()
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _table(filename):
+        """Map a data file name to a table name"""
+        name = filename[:-5] if filename.endswith('.json') else filename
+        if not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', name):
+            raise ValueError(f"Invalid collection name: {filename}")
+        return name
+
+    def _ensure_table(self, conn, filename):
+        table = self._table(filename)
+        if table in self._known_tables:
+            return table
+        with self._schema_lock:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS _meta ('
+                'collection TEXT PRIMARY KEY, next_id INTEGER NOT NULL, '
+                'version INTEGER NOT NULL DEFAULT 0, modified REAL)'
+            )
+            if not self._known_tables:
+                # Databases created before 'modified' was tracked
+                columns = [row[1] for row in conn.execute('PRAGMA table_info(_meta)')]
+                if 'modified' not in columns:
+                    conn.execute('ALTER TABLE _meta ADD COLUMN modified REAL')
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}" ('
+                'id INTEGER PRIMARY KEY, date TEXT, data TEXT NOT NULL)'
+            )
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_date_idx" ON "{table}" (date)')
+            self._known_tables.add(table)
+        return table
+
+    def version(self, filename):
+        conn = self._connect()
+        table = self._ensure_table(conn, filename)
+        row = conn.execute('SELECT version FROM _meta WHERE collection = ?', (table,)).fetchone()
+        return row[0] if row else 0
+
+    def version_info(self, filename):
+        conn = self._connect()
+        table = self._ensure_table(conn, filename)
+        row = conn.execute(
+            'SELECT version, modified FROM _meta WHERE collection = ?', (table,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+
+    def load(self, filename):
+        conn = self._connect()
+        table = self._ensure_table(conn, filename)
+        with STORAGE_READ_SECONDS.labels(filename).time():
+            return SQLiteTransaction(conn, table, filename).all()
+
+    def get(self, filename, record_id):
+        conn = self._connect()
+        table = self._ensure_table(conn, filename)
+        return SQLiteTransaction(conn, table, filename).get(record_id)
+
+    def get_many(self, filename, record_ids):
+        """Fetch several records with one IN query per batch of ids"""
+        conn = self._connect()
+        table = self._ensure_table(conn, filename)
+        record_ids = list(record_ids)
+        found = {}
+        for start in range(0, len(record_ids), 500):
+            batch = record_ids[start:start + 500]
+            placeholders = ', '.join('?' * len(batch))
+            rows = conn.execute(
+                f'SELECT id, data FROM "{table}" WHERE id IN ({placeholders})', batch
+            )
+            found.update((record_id, json.loads(data)) for record_id, data in rows)
+        return [found[record_id] for record_id in record_ids if record_id in found]
+
+    def iter_records(self, filename, batch_size=1000):
+        """Iterate over a collection in id order, one batch of rows at a time"""
+        conn = self._connect()
+        table = self._ensure_table(conn, filename)
+        last_id = None
+        while True:
+            if last_id is None:
+                rows = conn.execute(
+                    f'SELECT id, data FROM "{table}" ORDER BY id LIMIT ?', (batch_size,)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f'SELECT id, data FROM "{table}" WHERE id > ? ORDER BY id LIMIT ?',
+                    (last_id, batch_size)
+                ).fetchall()
+            for _, data in rows:
+                yield json.loads(data)
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def query(self, filename, sort=None, descending=False, offset=0, limit=None):
+        """Return one page of a collection, using the date index when sorting by date"""
+        conn = self._connect()
+        table = self._ensure_table(conn, filename)
+        direction = 'DESC' if descending else 'ASC'
+        if sort is None or sort == 'id':
+            order = f'id {direction}'
+        elif sort == get_date_field(filename):
+            order = f'date {direction}, id {direction}'
+        elif re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', sort):
+            order = f"json_extract(data, '$.{sort}') {direction}, id {direction}"
+        else:
+            raise ValueError(f"Invalid sort field: {sort}")
+
+        (total,) = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()
+        rows = conn.execute(
+            f'SELECT data FROM "{table}" ORDER BY {order} LIMIT ? OFFSET ?',
+            (-1 if limit is None else limit, offset)
+        )
+        return [json.loads(data) for (data,) in rows], total
+
+    @contextmanager
+    def transaction(self, filename):
+        """Run a BEGIN IMMEDIATE transaction, committing on success"""
+        conn = self._connect()
+        table = self._ensure_table(conn, filename)
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            started = time.perf_counter()
+            txn = SQLiteTransaction(conn, table, filename)
+            yield txn
+            if txn.changed:
+                version = txn.bump_version()
+        if txn.changed:
+            STORAGE_WRITE_SECONDS.labels(filename).observe(time.perf_counter() - started)
+            self._notify(filename, version, None if txn.replaced else txn.changes)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Return the storage backend selected by Config.STORAGE_BACKEND"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage(Config.STORAGE_BACKEND)
+    return _storage
+
+
+def create_storage(backend):
+    """Build a storage backend by name"""
+    if backend == 'json':
+        return JSONStorage(Config.DATA_DIR, Config.JOURNAL_ENABLED, Config.JOURNAL_COMPACT_BYTES,
+                           Config.JOURNAL_ARCHIVES)
+    if backend == 'sqlite':
+        return SQLiteStorage(Config.SQLITE_PATH)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def migrate_json_to_sqlite(data_dir=None, db_path=None):
+    """Import every data/*.json collection into the SQLite database"""
+    source = JSONStorage(data_dir or Config.DATA_DIR)
+    target = SQLiteStorage(db_path or Config.SQLITE_PATH)
+    counts = {}
+    # A collection only has a journal until its first compaction
+    filenames = {os.path.basename(path) for path in glob.glob(os.path.join(source.data_dir, '*.json'))}
+    filenames.update(os.path.basename(path)[:-len(JOURNAL_SUFFIX)]
+                     for path in glob.glob(os.path.join(source.data_dir, '*.json' + JOURNAL_SUFFIX)))
+    for filename in sorted(filenames):
+        try:
+            records = source.load(filename)
+        except StorageError as e:
+            # Not a collection (or unreadable): leave it out rather than abort the migration
+            print(f"Skipping {filename}: {e}")
+            continue
+        target.save(filename, records)
+        counts[filename] = len(records)
+    return counts
+
+
+def compact_journals():
+    """Fold every JSON collection's journal into its snapshot (scheduled job)"""
+    storage = get_storage()
+    if isinstance(storage, JSONStorage):
+        return storage.compact_all()
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Team Dashboard storage tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate = subparsers.add_parser('migrate', help='Import data/*.json into SQLite')
+    migrate.add_argument('--data-dir', default=Config.DATA_DIR)
+    migrate.add_argument('--db', default=Config.SQLITE_PATH)
+    compact = subparsers.add_parser('compact', help='Fold the journals into data/*.json')
+    compact.add_argument('--data-dir', default=Config.DATA_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        counts = migrate_json_to_sqlite(args.data_dir, args.db)
+        for filename, count in counts.items():
+            print(f"Imported {count} records from {filename}")
+        print(f"Migration complete: {args.db}")
+    elif args.command == 'compact':
+        storage = JSONStorage(args.data_dir, journal_archives=Config.JOURNAL_ARCHIVES)
+        for filename in storage.compact_all():
+            print(f"Compacted {filename}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Shared fixtures for the test suite; run `python -m pytest` from team_dashboard/
+"""
+import os
+import shutil
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from storage import JSONStorage  # noqa: E402
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """A JSON storage backend on an empty data directory"""
+    return JSONStorage(str(tmp_path))
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """The app on a copy of the bundled data directory, shared by the whole session"""
+    import storage as storage_module
+    from config import Config
+
+    data_dir = tmp_path_factory.mktemp('app') / 'data'
+    shutil.copytree(os.path.join(APP_DIR, 'data'), data_dir)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(Config, 'DATA_DIR', str(data_dir))
+        patch.setattr(Config, 'SCHEDULER_MODE', 'off')
+        patch.setattr(storage_module, '_storage', None)
+        from app import create_app
+        yield create_app(start_services=False)
+
+
+@pytest.fixture
+def admin_client(app):
+    """A test client logged in as the bundled admin account"""
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin'})
+    return client
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from aggregates import DashboardAggregates
+
+
+class InsertDuringRebuild:
+    """Storage proxy that commits an insert from another thread between version() and load()"""
+
+    def __init__(self, storage, filename, record):
+        self.storage = storage
+        self.filename = filename
+        self.record = record
+        self.fired = False
+
+    def version(self, filename):
+        version = self.storage.version(filename)
+        if not self.fired:
+            self.fired = True
+            writer = threading.Thread(target=self.storage.insert, args=(self.filename, self.record))
+            writer.start()
+            # The commit is visible before its change callback runs (which waits for rebuild)
+            deadline = time.monotonic() + 5
+            while self.storage.version(filename) == version and time.monotonic() < deadline:
+                time.sleep(0.001)
+            self.writer = writer
+        return version
+
+    def load(self, filename):
+        return self.storage.load(filename)
+
+
+def test_insert_committed_during_rebuild_is_counted_once(storage):
+    for n in range(4):
+        storage.insert('inventory.json', {'device_name': f'device {n}'})
+    aggregates = DashboardAggregates()
+    storage.subscribe(aggregates.apply)
+
+    proxy = InsertDuringRebuild(storage, 'inventory.json', {'device_name': 'late'})
+    aggregates.rebuild(proxy, 'inventory.json')
+    proxy.writer.join(5)
+
+    assert len(storage.load('inventory.json')) == 5
+    assert aggregates.snapshot('2026-01-01')['total_devices'] == 5
+    assert aggregates.versions['inventory.json'] == storage.version('inventory.json')
+
+
+def test_changes_are_applied_incrementally(storage):
+    aggregates = DashboardAggregates()
+    storage.subscribe(aggregates.apply)
+    aggregates.rebuild(storage, 'leaves.json')
+
+    leave = storage.insert('leaves.json', {'name': 'Ann', 'date': '2026-01-01', 'approval_status': 'pending'})
+    assert aggregates.snapshot('2026-01-01')['pending_approvals'] == 1
+
+    storage.update('leaves.json', leave['id'], {'approval_status': 'approved'})
+    stats = aggregates.snapshot('2026-01-01')
+    assert stats['pending_approvals'] == 0
+    assert stats['on_leave_names'] == ['Ann']
+
+    storage.delete('leaves.json', leave['id'])
+    assert aggregates.snapshot('2026-01-01')['on_leave_today'] == 0
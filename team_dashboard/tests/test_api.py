@@ -0,0 +1,26 @@
+def test_create_sets_posted_by_from_the_session(admin_client):
+    response = admin_client.post('/api/v1/announcements', json={
+        'date': '2026-01-05', 'title': 'Release', 'message': 'Shipped', 'posted_by': 'Someone Else'
+    })
+
+    assert response.status_code == 201
+    item = response.get_json()['item']
+    assert item['posted_by'] != 'Someone Else'
+    with admin_client.session_transaction() as session:
+        assert item['posted_by'] == session['name']
+
+
+def test_update_cannot_rewrite_posted_by(admin_client):
+    created = admin_client.post('/api/v1/announcements', json={
+        'date': '2026-01-05', 'title': 'Release', 'message': 'Shipped'
+    }).get_json()['item']
+
+    response = admin_client.patch(f"/api/v1/announcements/{created['id']}", json={'posted_by': 'Someone Else'})
+
+    assert response.status_code == 400
+    assert 'posted_by' in response.get_json()['error']
+    item = admin_client.get(f"/api/v1/announcements/{created['id']}").get_json()['item']
+    assert item['posted_by'] == created['posted_by']
+
+    response = admin_client.patch(f"/api/v1/announcements/{created['id']}", json={'title': 'Released'})
+    assert response.get_json()['item']['title'] == 'Released'
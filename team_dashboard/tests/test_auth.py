@@ -0,0 +1,54 @@
+import pytest
+
+import auth
+from auth import TokenBucketLimiter
+from config import Config
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Fresh login limits: 4 attempts per IP, 2 per username from one IP"""
+    monkeypatch.setattr(auth, 'ip_limiter', TokenBucketLimiter(4, 300))
+    monkeypatch.setattr(auth, 'user_limiter', TokenBucketLimiter(2, 300))
+
+
+def login(client, password, ip, username='admin'):
+    return client.post('/login', data={'username': username, 'password': password},
+                       environ_base={'REMOTE_ADDR': ip}).status_code
+
+
+def test_successful_logins_are_not_counted(app, limits):
+    client = app.test_client()
+    for _ in range(6):
+        assert login(client, 'admin', '10.0.0.1') == 302
+
+
+def test_failed_logins_lock_out_only_the_guessing_client(app, limits):
+    client = app.test_client()
+    assert [login(client, 'wrong', '10.0.0.2') for _ in range(3)] == [200, 200, 429]
+    assert login(client, 'admin', '10.0.0.2') == 429
+
+    # The account still works from another address
+    assert login(client, 'admin', '10.0.0.3') == 302
+
+    # And the guessing client is capped across usernames too
+    assert login(client, 'wrong', '10.0.0.2', username='ann') == 200
+    assert login(client, 'wrong', '10.0.0.2', username='bob') == 200
+    assert login(client, 'wrong', '10.0.0.2', username='cat') == 429
+
+
+def test_forwarded_client_address_is_used_behind_a_proxy(app, limits):
+    from app import create_app
+
+    class ProxiedConfig(Config):
+        PROXY_FIX_HOPS = 1
+
+    client = create_app(ProxiedConfig, start_services=False).test_client()
+
+    def forwarded_login(client_ip):
+        return client.post('/login', data={'username': 'admin', 'password': 'wrong'},
+                           headers={'X-Forwarded-For': client_ip},
+                           environ_base={'REMOTE_ADDR': '10.0.0.9'}).status_code
+
+    assert [forwarded_login('192.0.2.1') for _ in range(3)] == [200, 200, 429]
+    assert forwarded_login('192.0.2.2') == 200
@@ -0,0 +1,22 @@
+from digests import partition_by_member
+
+
+def test_members_sharing_a_name_do_not_get_each_others_records():
+    members = [
+        {'id': 2, 'name': 'Alex Kim', 'email': 'alex.kim@example.com'},
+        {'id': 3, 'name': 'Alex Kim', 'email': 'akim@example.com'},
+        {'name': 'Sam Lee', 'email': 'sam@example.com'},  # account without an id
+    ]
+    tasks = [
+        {'member_name': 'Alex Kim', 'task_description': 'Review', 'status': 'pending'},
+        {'member_name': 'Sam Lee', 'task_description': 'Deploy', 'status': 'pending', 'due_date': '2026-01-03'},
+        {'member_name': 'Sam Lee', 'task_description': 'Done', 'status': 'completed'},
+    ]
+    leaves = [{'name': 'Sam Lee', 'date': '2026-01-02'}, {'name': 'Sam Lee', 'date': '2026-03-01'}]
+
+    groups = partition_by_member(members, tasks, leaves, [], '2026-01-01', '2026-01-08')
+
+    assert set(groups) == {2, 3, 'sam@example.com'}
+    assert groups[2]['tasks'] == [] and groups[3]['tasks'] == []
+    assert [task['task_description'] for task in groups['sam@example.com']['tasks']] == ['Deploy']
+    assert [leave['date'] for leave in groups['sam@example.com']['leaves']] == ['2026-01-02']
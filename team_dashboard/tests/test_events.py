@@ -0,0 +1,69 @@
+import threading
+
+import events
+from config import Config
+from events import Broadcaster, ChangeFeed
+
+
+def test_writes_are_published_outside_the_storage_lock(storage, monkeypatch):
+    calls = []
+    monkeypatch.setattr(events, 'live_stats', lambda: calls.append(threading.current_thread()) or {'total_devices': len(calls)})
+    broadcaster = Broadcaster(16)
+    feed = ChangeFeed(storage, broadcaster)
+    assert broadcaster.connect(10)
+
+    storage.insert('inventory.json', {'item_name': 'Laptop'})
+    storage.insert('inventory.json', {'item_name': 'Phone'})
+    storage.insert('links.json', {'title': 'Docs', 'url': 'https://example.com'})
+
+    # Nothing is built or published by the writer itself
+    assert calls == []
+    assert broadcaster.wait(0, 0) == ([], 0)
+
+    feed.flush()
+    published, position = broadcaster.wait(0, 0)
+    assert position == 3
+    assert len(calls) == 1  # one set of figures for the whole batch
+    assert b'"op": "add"' in published[0] and b'"total_devices": 1' in published[0]
+    assert b'"collection": "links"' in published[2] and b'stats' not in published[2]
+
+
+def test_nothing_is_queued_without_listeners(storage, monkeypatch):
+    monkeypatch.setattr(events, 'live_stats', lambda: {})
+    broadcaster = Broadcaster(16)
+    feed = ChangeFeed(storage, broadcaster)
+
+    storage.insert('inventory.json', {'item_name': 'Laptop'})
+    feed.flush()
+
+    assert broadcaster.wait(0, 0) == ([], 0)
+    # Known to the feed, so the version poll does not report it as another process's write
+    broadcaster.connect(10)
+    feed.check()
+    assert broadcaster.wait(0, 0) == ([], 0)
+
+
+def test_dashboard_only_subscribes_where_streams_can_be_served(admin_client):
+    # The test client is not multithreaded, like gunicorn's sync workers
+    assert b'data-live-updates' not in admin_client.get('/dashboard').data
+
+
+def test_threaded_server_without_reserved_slots_refuses_streams(admin_client, monkeypatch):
+    monkeypatch.setattr(Config, 'SSE_THREADED_MAX_CLIENTS', 0)
+
+    assert admin_client.get('/api/stream', multithread=True).status_code == 204
+    assert b'data-live-updates' not in admin_client.get('/dashboard', multithread=True).data
+
+
+def test_threaded_server_streams_only_up_to_its_reserved_slots(admin_client, monkeypatch):
+    monkeypatch.setattr(Config, 'SSE_THREADED_MAX_CLIENTS', 1)
+    assert b'data-live-updates' in admin_client.get('/dashboard', multithread=True).data
+
+    broadcaster = events.get_broadcaster()
+    assert broadcaster.connect(1)  # an open stream holds the only slot
+    try:
+        response = admin_client.get('/api/stream', multithread=True)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '60'
+    finally:
+        broadcaster.disconnect()
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import jira_client
+from config import Config
+from jira_client import JiraCache, fetch_jira_issues
+
+
+def make_issue(number, status='Open', updated='2026-01-01T10:00:00.000+0000'):
+    return {
+        'key': f'QA-{number}',
+        'fields': {
+            'summary': f'Issue {number}',
+            'status': {'name': status},
+            'assignee': {'displayName': 'Ann'},
+            'priority': {'name': 'High'},
+            'created': '2026-01-01T09:00:00.000+0000',
+            'updated': updated
+        }
+    }
+
+
+class StubJira:
+    """A Jira search endpoint serving self.issues (or self.updated for incremental queries)"""
+
+    def __init__(self):
+        self.issues = []
+        self.updated = []
+        self.max_results = None  # cap the server applies to maxResults
+        self.delay = 0
+        self.status = 200
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def handle(self, handler):
+        query = {key: values[0] for key, values in parse_qs(urlparse(handler.path).query).items()}
+        with self._lock:
+            self.requests.append(query)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if self.status != 200:
+                handler.send_response(self.status)
+                handler.send_header('Content-Length', '0')
+                handler.end_headers()
+                return
+            issues = self.updated if 'updated >= -' in query['jql'] else self.issues
+            start = int(query['startAt'])
+            page_size = int(query['maxResults'])
+            if self.max_results:
+                page_size = min(page_size, self.max_results)
+            body = json.dumps({
+                'startAt': start, 'maxResults': page_size, 'total': len(issues),
+                'issues': issues[start:start + page_size]
+            }).encode()
+            handler.send_response(200)
+            handler.send_header('Content-Type', 'application/json')
+            handler.send_header('Content-Length', str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def stub_jira(monkeypatch):
+    stub = StubJira()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            stub.handle(self)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    monkeypatch.setattr(Config, 'JIRA_ENABLED', True)
+    monkeypatch.setattr(Config, 'JIRA_URL', f'http://127.0.0.1:{server.server_port}')
+    monkeypatch.setattr(Config, 'JIRA_USERNAME', 'bot@example.com')
+    monkeypatch.setattr(Config, 'JIRA_API_TOKEN', 'token')
+    monkeypatch.setattr(jira_client, '_session', None)
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_all_requests_remaining_pages_concurrently(stub_jira, monkeypatch):
+    monkeypatch.setattr(Config, 'JIRA_PAGE_SIZE', 10)
+    stub_jira.issues = [make_issue(n) for n in range(1, 46)]
+    stub_jira.delay = 0.05
+
+    issues = fetch_jira_issues()
+
+    assert [issue['key'] for issue in issues] == [f'QA-{n}' for n in range(1, 46)]
+    assert sorted(int(query['startAt']) for query in stub_jira.requests) == [0, 10, 20, 30, 40]
+    assert stub_jira.max_in_flight > 1
+    assert all(query['jql'].endswith('ORDER BY key ASC') for query in stub_jira.requests)
+
+
+def test_fetch_all_follows_a_server_capped_page_size(stub_jira):
+    stub_jira.issues = [make_issue(n) for n in range(1, 26)]
+    stub_jira.max_results = 10
+
+    issues = fetch_jira_issues()
+
+    assert len(issues) == 25
+    assert sorted(int(query['startAt']) for query in stub_jira.requests) == [0, 10, 20]
+
+
+def test_fetch_returns_none_when_jira_fails(stub_jira):
+    stub_jira.status = 500
+    assert fetch_jira_issues() is None
+
+
+def test_sync_is_incremental_after_the_first_full_sync(stub_jira, tmp_path):
+    stub_jira.issues = [make_issue(1), make_issue(2), make_issue(3)]
+    cache = JiraCache(ttl=300, store_path=str(tmp_path / 'jira_issues.store'))
+
+    cache.refresh()
+    assert 'status != Done' in stub_jira.requests[-1]['jql']
+    assert {issue['key'] for issue in cache.get()} == {'QA-1', 'QA-2', 'QA-3'}
+
+    stub_jira.updated = [
+        make_issue(2, status='Done'),
+        make_issue(3, updated='2026-01-02T10:00:00.000+0000'),
+        make_issue(4)
+    ]
+    cache.refresh()
+    assert 'updated >= -' in stub_jira.requests[-1]['jql']
+    assert [issue['key'] for issue in cache.get()][0] == 'QA-3'
+    assert {issue['key'] for issue in cache.get()} == {'QA-1', 'QA-3', 'QA-4'}
+
+    # The merged issues survive a restart
+    reloaded = JiraCache(ttl=300, store_path=str(tmp_path / 'jira_issues.store'))
+    reloaded._ensure_loaded()
+    assert {issue['key'] for issue in reloaded.issues} == {'QA-1', 'QA-3', 'QA-4'}
+    assert reloaded.store.last_sync == cache.store.last_sync
+
+
+def test_failed_sync_keeps_serving_previous_issues(stub_jira, tmp_path):
+    stub_jira.issues = [make_issue(1)]
+    cache = JiraCache(ttl=300, store_path=str(tmp_path / 'jira_issues.store'))
+    cache.refresh()
+
+    stub_jira.status = 500
+    cache.refresh(full=True)
+
+    assert [issue['key'] for issue in cache.get()] == ['QA-1']
+    assert cache.status()['error'] == 'Jira request failed'
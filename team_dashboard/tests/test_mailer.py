@@ -0,0 +1,176 @@
+import base64
+import socketserver
+import threading
+import time
+
+import pytest
+
+import mailer
+import storage as storage_module
+from config import Config
+from mailer import OUTBOX, claim_due_messages, drain_outbox
+
+
+class StubSMTP:
+    """A minimal SMTP server that records logins and delivered messages"""
+
+    def __init__(self):
+        self.password = 'secret'
+        self.reject = set()  # recipients refused at RCPT TO
+        self.connections = 0
+        self.logins = []
+        self.delivered = []  # (recipients, message text)
+
+    def handle(self, handler):
+        self.connections += 1
+        reply = lambda line: handler.wfile.write(line.encode() + b'\r\n')  # noqa: E731
+        reply('220 stub ESMTP')
+        recipients = []
+        while True:
+            line = handler.rfile.readline().decode().rstrip('\r\n')
+            command = line.split(' ', 1)[0].upper()
+            if not line or command == 'QUIT':
+                reply('221 bye')
+                return
+            if command in ('EHLO', 'HELO'):
+                reply('250-stub')
+                reply('250 AUTH PLAIN')
+            elif command == 'AUTH':
+                _, user, password = base64.b64decode(line.split()[2]).decode().split('\0')
+                self.logins.append(user)
+                reply('235 ok' if password == self.password else '535 bad credentials')
+            elif command == 'MAIL':
+                recipients = []
+                reply('250 ok')
+            elif command == 'RCPT':
+                address = line.split(':', 1)[1].strip('<> ')
+                if address in self.reject:
+                    reply('550 no such user')
+                else:
+                    recipients.append(address)
+                    reply('250 ok')
+            elif command == 'DATA':
+                reply('354 go ahead')
+                lines = []
+                while True:
+                    data = handler.rfile.readline().decode()
+                    if data in ('.\r\n', ''):
+                        break
+                    lines.append(data)
+                self.delivered.append((recipients, ''.join(lines)))
+                reply('250 queued')
+            else:
+                reply('250 ok')
+
+
+@pytest.fixture
+def stub_smtp(monkeypatch):
+    stub = StubSMTP()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            stub.handle(self)
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    monkeypatch.setattr(Config, 'SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setattr(Config, 'SMTP_PORT', server.server_address[1])
+    monkeypatch.setattr(Config, 'SMTP_USE_TLS', False)
+    monkeypatch.setattr(Config, 'SMTP_AUTH', True)
+    monkeypatch.setattr(Config, 'SMTP_TIMEOUT', 5)
+    monkeypatch.setattr(Config, 'EMAIL_PASSWORD', 'secret')
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def outbox(storage, monkeypatch):
+    """Route the mailer's storage to an empty data directory"""
+    monkeypatch.setattr(storage_module, '_storage', storage)
+    return storage
+
+
+def queue(outbox, count, to='ann@example.com'):
+    return [outbox.insert(OUTBOX, mailer._new_message(f'Subject {n}', '<p>Hi</p>', to))
+            for n in range(count)]
+
+
+def test_batch_is_sent_over_one_authenticated_session(stub_smtp, outbox):
+    queue(outbox, 3)
+
+    assert drain_outbox() == 3
+
+    assert stub_smtp.connections == 1
+    assert stub_smtp.logins == [Config.EMAIL_SENDER]
+    assert [recipients for recipients, _ in stub_smtp.delivered] == [['ann@example.com']] * 3
+    assert 'Subject: Subject 0' in stub_smtp.delivered[0][1]
+    for message in outbox.load(OUTBOX):
+        assert (message['status'], message['attempts']) == ('sent', 1)
+
+
+def test_bad_password_stops_the_batch_without_using_attempts(stub_smtp, outbox):
+    stub_smtp.password = 'changed'
+    queue(outbox, 5)
+
+    assert drain_outbox() == 0
+
+    assert len(stub_smtp.logins) == 1
+    for message in outbox.load(OUTBOX):
+        assert message['status'] == 'queued'
+        assert message['attempts'] == 0
+        assert 'bad credentials' in message['last_error']
+        assert message['claimed_at'] is None
+
+    # Delivered once the password is fixed
+    stub_smtp.password = 'secret'
+    assert drain_outbox() == 5
+
+
+def test_unreachable_server_releases_the_batch(stub_smtp, outbox, monkeypatch):
+    monkeypatch.setattr(Config, 'SMTP_PORT', 1)
+    queue(outbox, 2)
+
+    assert drain_outbox() == 0
+
+    assert stub_smtp.connections == 0
+    assert [(m['status'], m['attempts']) for m in outbox.load(OUTBOX)] == [('queued', 0)] * 2
+
+
+def test_rejected_message_is_retried_with_backoff_then_failed(stub_smtp, outbox, monkeypatch):
+    monkeypatch.setattr(Config, 'EMAIL_MAX_ATTEMPTS', 2)
+    stub_smtp.reject.add('nobody@example.com')
+    good = queue(outbox, 1)[0]
+    bad = queue(outbox, 1, to='nobody@example.com')[0]
+
+    before = time.time()
+    assert drain_outbox() == 1
+    assert outbox.get(OUTBOX, good['id'])['status'] == 'sent'
+    retry = outbox.get(OUTBOX, bad['id'])
+    assert (retry['status'], retry['attempts']) == ('queued', 1)
+    assert retry['next_attempt_at'] >= before + Config.EMAIL_RETRY_BACKOFF
+
+    # Not due yet
+    assert drain_outbox() == 0
+    assert outbox.get(OUTBOX, bad['id'])['attempts'] == 1
+
+    outbox.update(OUTBOX, bad['id'], {'next_attempt_at': 0})
+    drain_outbox()
+    failed = outbox.get(OUTBOX, bad['id'])
+    assert (failed['status'], failed['attempts']) == ('failed', 2)
+
+
+def test_claimed_messages_are_not_claimed_twice(outbox, monkeypatch):
+    queue(outbox, 3)
+
+    first = claim_due_messages(2)
+    second = claim_due_messages(10)
+
+    assert len(first) == 2 and len(second) == 1
+    assert {m['id'] for m in first}.isdisjoint(m['id'] for m in second)
+    assert claim_due_messages(10) == []
+
+    # A claim abandoned by a crashed process is picked up after the timeout
+    monkeypatch.setattr(Config, 'EMAIL_CLAIM_TIMEOUT', -1)
+    assert len(claim_due_messages(10)) == 3
@@ -0,0 +1,19 @@
+from config import Config
+
+
+def test_metrics_are_off_unless_enabled(admin_client, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_ENABLED', False)
+    assert admin_client.get('/metrics').status_code == 404
+
+
+def test_metrics_need_the_token_when_one_is_set(app, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_ENABLED', True)
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', 's3cret')
+    client = app.test_client()
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    response = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert b'# TYPE dashboard_request_duration_seconds histogram' in response.data
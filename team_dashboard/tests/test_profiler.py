@@ -0,0 +1,51 @@
+import pytest
+
+from app import create_app
+from config import Config
+from profiler import get_profile_store
+
+
+class ProfilerConfig(Config):
+    PROFILER_ENABLED = True
+
+
+@pytest.fixture
+def profiled_client(app):
+    client = create_app(ProfilerConfig, start_services=False).test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin'})
+    return client
+
+
+def test_profiler_is_off_by_default(admin_client):
+    response = admin_client.get('/links?profile=1')
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response.headers
+
+
+def test_page_profile_is_stored(profiled_client):
+    response = profiled_client.get('/links?profile=1')
+
+    profile = get_profile_store().get(int(response.headers['X-Profile-Id']))
+    assert profile['endpoint'] == 'links'
+    assert profile['status'] == 200
+    assert 'cumulative' in profile['summary']
+
+
+def test_streamed_page_keeps_streaming_while_profiled(profiled_client):
+    response = profiled_client.get('/leaves?profile=1', buffered=False)
+    profile_id = int(response.headers['X-Profile-Id'])
+
+    assert response.is_streamed
+    assert next(response.response)
+    assert get_profile_store().get(profile_id) is None
+
+    assert b'</html>' in b''.join(response.response)
+    profile = get_profile_store().get(profile_id)
+    assert profile['endpoint'] == 'leaves'
+    # Rendering the body is in the profile, not just the view that set it up
+    assert 'generate (fragments.py' in profile['collapsed']
+
+
+def test_live_stream_is_not_profiled(profiled_client):
+    response = profiled_client.get('/api/stream?profile=1')
+    assert 'X-Profile-Id' not in response.headers
@@ -0,0 +1,24 @@
+import json
+
+from scheduler import JobState
+from storage import migrate_json_to_sqlite
+
+
+def test_state_of_older_releases_is_renamed_and_kept(tmp_path):
+    (tmp_path / 'scheduler_state.json').write_text(json.dumps({'daily_summary': 1700000000}))
+
+    state = JobState(str(tmp_path / 'scheduler_state.store'))
+
+    assert state.get('daily_summary') == 1700000000
+    assert not (tmp_path / 'scheduler_state.json').exists()
+    state.record('daily_summary', 1700086400)
+    assert JobState(str(tmp_path / 'scheduler_state.store')).get('daily_summary') == 1700086400
+
+
+def test_migrate_skips_json_files_that_are_not_collections(tmp_path, storage):
+    storage.insert('leaves.json', {'name': 'Ann', 'date': '2026-01-01'})
+    (tmp_path / 'scheduler_state.json').write_text(json.dumps({'daily_summary': 1700000000}))
+
+    counts = migrate_json_to_sqlite(str(tmp_path), str(tmp_path / 'dashboard.db'))
+
+    assert counts == {'leaves.json': 1}
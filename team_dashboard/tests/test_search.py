@@ -0,0 +1,37 @@
+import pytest
+
+import search
+import storage as storage_module
+from storage import JSONStorage, SQLiteStorage
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def backend(request, tmp_path, monkeypatch):
+    """Route search to an empty storage backend with fresh search indexes"""
+    if request.param == 'json':
+        backend = JSONStorage(str(tmp_path))
+    else:
+        backend = SQLiteStorage(str(tmp_path / 'dashboard.db'))
+    monkeypatch.setattr(storage_module, '_storage', backend)
+    monkeypatch.setattr(search, '_indexes', {})
+    return backend
+
+
+def test_search_page_is_read_in_one_call(backend, monkeypatch):
+    backend.insert_many('links.json', [
+        {'title': f'link {n}', 'category': 'docs' if n % 2 else 'tools'} for n in range(10)
+    ])
+    monkeypatch.setattr(backend, 'get', lambda *args: pytest.fail('search read records one by one'))
+
+    records, total = search.search('links.json', filters={'category': 'docs'},
+                                   sort='id', descending=True, offset=1, limit=3)
+
+    assert total == 5
+    assert [record['id'] for record in records] == [8, 6, 4]
+
+
+def test_get_many_keeps_order_and_skips_missing(backend):
+    backend.insert_many('links.json', [{'title': f'link {n}'} for n in range(3)])
+
+    assert [record['id'] for record in backend.get_many('links.json', [3, 99, 1])] == [3, 1]
+    assert backend.get_many('links.json', []) == []
@@ -0,0 +1,32 @@
+import json
+
+from storage import JSONStorage
+
+
+def test_query_pages_in_id_order_whatever_the_file_order(tmp_path):
+    records = [{'id': record_id, 'name': f'r{record_id}'} for record_id in (3, 10, 1, 2, 25)]
+    (tmp_path / 'links.json').write_text(json.dumps(records))
+    storage = JSONStorage(str(tmp_path))
+
+    def ids(**kwargs):
+        page, total = storage.query('links.json', **kwargs)
+        assert total == 5
+        return [record['id'] for record in page]
+
+    assert ids(limit=3) == [1, 2, 3]
+    assert ids(offset=3, limit=3) == [10, 25]
+    assert ids(sort='id', descending=True, limit=2) == [25, 10]
+    assert ids(descending=True, offset=4, limit=2) == [1]
+    assert ids(descending=True, offset=9, limit=2) == []
+
+
+def test_presorted_id_keys_follow_writes(storage):
+    for n in range(12):
+        storage.insert('links.json', {'title': f'link {n}'})
+    assert [r['id'] for r in storage.query('links.json', descending=True, limit=3)[0]] == [12, 11, 10]
+
+    storage.delete('links.json', 11)
+    storage.insert('links.json', {'title': 'new'})
+
+    assert [r['id'] for r in storage.query('links.json', descending=True, limit=3)[0]] == [13, 12, 10]
+    assert [r['id'] for r in storage.query('links.json', offset=9)[0]] == [10, 12, 13]
@@ -1,19 +1,22 @@
 """
 Utility functions for Team Management Dashboard
 """
-import json
+import math
 import os
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from functools import wraps
-from flask import session, redirect, url_for, flash
-import hashlib
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import requests
-from requests.auth import HTTPBasicAuth
+from flask import session, redirect, url_for, flash, request, has_request_context
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 from config import Config
+from storage import get_storage
+from search import FILTER_FIELDS, search
+from aggregates import get_dashboard_aggregates
+
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+_email_environment = None
 
 
 def login_required(f):
@@ -27,6 +30,11 @@ def login_required(f):
     return decorated_function
 
 
+def is_admin():
+    """True if the logged-in user has the admin role"""
+    return 'user' in session and session.get('role') == 'admin'
+
+
 def admin_required(f):
     """Decorator to require admin role"""
     @wraps(f)
@@ -34,42 +42,173 @@ def admin_required(f):
         if 'user' not in session:
             flash('Please log in to access this page.', 'warning')
             return redirect(url_for('login'))
-        if session.get('role') != 'admin':
+        if not is_admin():
             flash('You do not have permission to access this page.', 'danger')
             return redirect(url_for('dashboard'))
         return f(*args, **kwargs)
     return decorated_function
 
 
-def hash_password(password):
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+def current_username():
+    """Name of the logged-in user, or None outside a request (e.g. scheduled jobs)"""
+    return session.get('user') if has_request_context() else None
 
 
 def load_json_file(filename):
-    """Load data from JSON file"""
-    filepath = os.path.join(Config.DATA_DIR, filename)
-    try:
-        with open(filepath, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
-    except json.JSONDecodeError:
-        return []
+    """Load a collection from the configured storage backend"""
+    return get_storage().load(filename)
 
 
 def save_json_file(filename, data):
-    """Save data to JSON file"""
-    filepath = os.path.join(Config.DATA_DIR, filename)
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2, default=str)
+    """Replace a whole collection in the configured storage backend"""
+    get_storage().save(filename, data)
+
+
+def iter_records(filename):
+    """Iterate over a collection one record at a time (for streamed pages)"""
+    return get_storage().iter_records(filename)
+
+
+def get_record(filename, record_id):
+    """Return one record of a collection by id, or None"""
+    return get_storage().get(filename, record_id)
+
+
+def transaction(filename):
+    """Lock a collection for a read-modify-write cycle (use as a context manager)"""
+    return get_storage().transaction(filename)
+
+
+def add_record(filename, record):
+    """Insert a record into a collection and return it with its new id"""
+    return get_storage().insert(filename, record)
+
+
+def update_record(filename, record_id, fields):
+    """Update fields of a record by id; returns None if it does not exist"""
+    return get_storage().update(filename, record_id, fields)
+
+
+def delete_record(filename, record_id):
+    """Delete a record by id; returns True if it existed"""
+    return get_storage().delete(filename, record_id)
+
+
+def clear_json_cache():
+    """Drop all cached collections (e.g. after editing data files by hand)"""
+    get_storage().clear_cache()
+
+
+def get_next_id(filename):
+    """Reserve the next id of a collection from its persisted sequence"""
+    return get_storage().allocate_id(filename)
+
+
+class Page:
+    """One page of a sorted collection, as passed to list templates"""
+
+    def __init__(self, items, page, per_page, total, sort, params=None):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.sort = sort
+        self.params = params or {}  # search arguments to keep in page links
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total / self.per_page))
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+    def iter_pages(self, window=2):
+        """Page numbers to show, with None marking a gap"""
+        last = 0
+        for num in range(1, self.pages + 1):
+            if num <= 1 or num >= self.pages or abs(num - self.page) <= window:
+                if num - last > 1:
+                    yield None
+                yield num
+                last = num
+
+
+def get_page_args(default_sort='-date', sort_fields=('date',)):
+    """Read page, per_page and sort from the query string"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = request.args.get('per_page', Config.ITEMS_PER_PAGE, type=int)
+    per_page = min(max(per_page, 1), Config.MAX_ITEMS_PER_PAGE)
+    sort = request.args.get('sort', default_sort)
+    if sort.lstrip('-') not in sort_fields:
+        sort = default_sort
+    return page, per_page, sort
 
 
-def get_next_id(data_list):
-    """Get next available ID for a list of items"""
-    if not data_list:
-        return 1
-    return max(item.get('id', 0) for item in data_list) + 1
+def get_search_args(filename):
+    """Read free text (q), field filters and date range from the query string"""
+    params = {}
+    for name in ('q', 'date_from', 'date_to') + FILTER_FIELDS.get(filename, ()):
+        value = request.args.get(name, '').strip()
+        if value:
+            params[name] = value
+    return params
+
+
+def paginate(filename, default_sort='-date', sort_fields=('date',), always_search=False):
+    """Return the requested Page of a collection ('-field' sorts descending)
+
+    Requests carrying search arguments are answered from the search index.
+    """
+    page, per_page, sort = get_page_args(default_sort, sort_fields)
+    params = get_search_args(filename) if filename in FILTER_FIELDS else {}
+    window = {
+        'sort': sort.lstrip('-'),
+        'descending': sort.startswith('-'),
+        'offset': (page - 1) * per_page,
+        'limit': per_page
+    }
+    if params or always_search:
+        filters = {k: v for k, v in params.items() if k in FILTER_FIELDS[filename]}
+        items, total = search(
+            filename, params.get('q', ''), filters,
+            params.get('date_from'), params.get('date_to'), **window
+        )
+    else:
+        items, total = get_storage().query(filename, **window)
+    return Page(items, page, per_page, total, sort, params)
+
+
+def collection_validators(filename):
+    """Return (etag, last_modified) derived from a collection's version"""
+    version, modified = get_storage().version_info(filename)
+    etag = f"{filename[:-5]}-v{version}"
+    if modified:
+        etag += f"-{int(modified * 1000):x}"
+    last_modified = datetime.fromtimestamp(int(modified), timezone.utc) if modified else None
+    return etag, last_modified
+
+
+def is_not_modified(etag, last_modified):
+    """True if the request's If-None-Match / If-Modified-Since match the current version"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def set_validators(response, etag, last_modified):
+    """Add ETag/Last-Modified headers; clients must revalidate before reuse"""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 def format_date(date_str):
@@ -89,37 +228,40 @@ def get_today():
 
 
 def send_email(subject, body, to_email=None):
-    """Send email via Gmail SMTP"""
+    """Queue an email in the outbox; returns the queued message or None"""
     if not Config.EMAIL_ENABLED:
         print(f"Email disabled. Would have sent: {subject}")
-        return False
+        return None
     
-    if not Config.EMAIL_PASSWORD:
-        print("Email password not configured")
-        return False
+    from mailer import email_configured, enqueue_email
+    if not email_configured():
+        return None
     
     try:
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = Config.EMAIL_SENDER
-        msg['To'] = to_email or Config.MANAGER_EMAIL
-        
-        # Attach HTML body
-        html_part = MIMEText(body, 'html')
-        msg.attach(html_part)
-        
-        # Send email
-        with smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT) as server:
-            server.starttls()
-            server.login(Config.EMAIL_SENDER, Config.EMAIL_PASSWORD)
-            server.send_message(msg)
-        
-        print(f"Email sent successfully: {subject}")
-        return True
+        return enqueue_email(subject, body, to_email)
     except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
+        print(f"Error queueing email: {e}")
+        return None
+
+
+def get_email_environment():
+    """Return the Jinja environment for email templates (parsed templates are cached)"""
+    global _email_environment
+    if _email_environment is None:
+        environment = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False
+        )
+        environment.filters['format_date'] = format_date
+        _email_environment = environment
+    return _email_environment
+
+
+def render_email_template(template_name, **context):
+    """Render an email template by streaming its chunks into one string"""
+    template = get_email_environment().get_template(template_name)
+    return ''.join(template.generate(**context))
 
 
 def generate_daily_summary():
@@ -138,199 +280,26 @@ def generate_daily_summary():
     recent_announcements = sorted(announcements, key=lambda x: x.get('date', ''), reverse=True)[:3]
     active_builds = [b for b in builds if b.get('status') in ['testing', 'release']]
     
-    # Generate HTML email
-    html = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; }}
-            h2 {{ color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }}
-            h3 {{ color: #34495e; margin-top: 20px; }}
-            .section {{ margin-bottom: 30px; }}
-            .item {{ background: #f8f9fa; padding: 10px; margin: 10px 0; border-left: 4px solid #3498db; }}
-            .empty {{ color: #7f8c8d; font-style: italic; }}
-        </style>
-    </head>
-    <body>
-        <h2>📊 Daily Team Summary - {format_date(today)}</h2>
-        
-        <div class="section">
-            <h3>🏖️ Leave & Attendance</h3>
-            {_format_leaves_html(today_leaves)}
-        </div>
-        
-        <div class="section">
-            <h3>🎯 Accomplishments</h3>
-            {_format_accomplishments_html(today_accomplishments)}
-        </div>
-        
-        <div class="section">
-            <h3>📢 Recent Announcements</h3>
-            {_format_announcements_html(recent_announcements)}
-        </div>
-        
-        <div class="section">
-            <h3>🔧 Active Builds</h3>
-            {_format_builds_html(active_builds)}
-        </div>
-        
-        <hr>
-        <p style="color: #7f8c8d; font-size: 12px;">
-            This is an automated summary from Team Management Dashboard.<br>
-            Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-        </p>
-    </body>
-    </html>
-    """
-    
-    return html
-
-
-def _format_leaves_html(leaves):
-    """Format leaves for email"""
-    if not leaves:
-        return '<p class="empty">No leaves today</p>'
-    
-    html = ''
-    for leave in leaves:
-        html += f"""
-        <div class="item">
-            <strong>{leave.get('name')}</strong> - {leave.get('type')}<br>
-            Reason: {leave.get('reason', 'N/A')}<br>
-            Status: {leave.get('approval_status', 'pending')}
-        </div>
-        """
-    return html
-
-
-def _format_accomplishments_html(accomplishments):
-    """Format accomplishments for email"""
-    if not accomplishments:
-        return '<p class="empty">No accomplishments logged today</p>'
-    
-    html = ''
-    for acc in accomplishments:
-        html += f"""
-        <div class="item">
-            <strong>{acc.get('member_name')}</strong> - {acc.get('type')}<br>
-            {acc.get('description')}<br>
-            <em>Impact: {acc.get('impact', 'N/A')}</em>
-        </div>
-        """
-    return html
-
-
-def _format_announcements_html(announcements):
-    """Format announcements for email"""
-    if not announcements:
-        return '<p class="empty">No recent announcements</p>'
-    
-    html = ''
-    for ann in announcements:
-        html += f"""
-        <div class="item">
-            <strong>{ann.get('title')}</strong> - {format_date(ann.get('date'))}<br>
-            {ann.get('message')}<br>
-            <em>Posted by: {ann.get('posted_by')}</em>
-        </div>
-        """
-    return html
-
-
-def _format_builds_html(builds):
-    """Format builds for email"""
-    if not builds:
-        return '<p class="empty">No active builds</p>'
-    
-    html = ''
-    for build in builds:
-        html += f"""
-        <div class="item">
-            <strong>{build.get('build_name')}</strong> v{build.get('version')}<br>
-            Environment: {build.get('environment')} | Status: {build.get('status')}<br>
-            Date: {format_date(build.get('date'))}
-        </div>
-        """
-    return html
-
-
-def fetch_jira_issues(assignee=None):
-    """Fetch issues from Jira"""
-    if not Config.JIRA_ENABLED:
-        return []
-    
-    if not Config.JIRA_API_TOKEN or not Config.JIRA_USERNAME:
-        print("Jira credentials not configured")
-        return []
-    
-    try:
-        # Build JQL query
-        if assignee:
-            jql = f'assignee="{assignee}" AND status != Done'
-        else:
-            jql = f'project={Config.JIRA_PROJECT_KEY} AND status != Done'
-        
-        # API endpoint
-        url = f"{Config.JIRA_URL}/rest/api/3/search"
-        params = {
-            'jql': jql,
-            'maxResults': 50,
-            'fields': 'summary,status,assignee,priority,created'
-        }
-        
-        # Make request
-        auth = HTTPBasicAuth(Config.JIRA_USERNAME, Config.JIRA_API_TOKEN)
-        response = requests.get(url, params=params, auth=auth, timeout=10)
-        response.raise_for_status()
-        
-        # Parse response
-        data = response.json()
-        issues = []
-        for issue in data.get('issues', []):
-            issues.append({
-                'key': issue['key'],
-                'summary': issue['fields']['summary'],
-                'status': issue['fields']['status']['name'],
-                'assignee': issue['fields']['assignee']['displayName'] if issue['fields'].get('assignee') else 'Unassigned',
-                'priority': issue['fields']['priority']['name'] if issue['fields'].get('priority') else 'None',
-                'created': issue['fields']['created'][:10]
-            })
-        
-        return issues
-    except Exception as e:
-        print(f"Error fetching Jira issues: {e}")
-        return []
+    return render_email_template(
+        'email/summary.html',
+        today=today,
+        leaves=today_leaves,
+        accomplishments=today_accomplishments,
+        announcements=recent_announcements,
+        builds=active_builds,
+        generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    )
+
+
+def send_daily_summary():
+    """Send daily summary email"""
+    summary_html = generate_daily_summary()
+    return send_email(
+        subject=f"Daily Team Summary - {format_date(get_today())}",
+        body=summary_html
+    )
 
 
 def get_dashboard_stats():
-    """Get statistics for dashboard"""
-    today = get_today()
-    
-    # Load all data
-    users = load_json_file('users.json')
-    leaves = load_json_file('leaves.json')
-    accomplishments = load_json_file('accomplishments.json')
-    inventory = load_json_file('inventory.json')
-    servers = load_json_file('servers.json')
-    builds = load_json_file('builds.json')
-    
-    # Calculate stats
-    team_members = [u for u in users if u.get('role') != 'admin']
-    on_leave_today = [l for l in leaves if l.get('date') == today and l.get('approval_status') == 'approved']
-    pending_approvals = [l for l in leaves if l.get('approval_status') == 'pending']
-    total_devices = len(inventory)
-    available_servers = [s for s in servers if s.get('status') == 'available']
-    active_builds = [b for b in builds if b.get('status') in ['testing', 'release']]
-    recent_accomplishments = [a for a in accomplishments if a.get('date') == today]
-    
-    return {
-        'total_team_members': len(team_members),
-        'on_leave_today': len(on_leave_today),
-        'pending_approvals': len(pending_approvals),
-        'total_devices': total_devices,
-        'available_servers': len(available_servers),
-        'active_builds': len(active_builds),
-        'today_accomplishments': len(recent_accomplishments),
-        'on_leave_names': [l.get('name') for l in on_leave_today],
-        'recent_accomplishments_list': recent_accomplishments[:5]
-    }
+    """Get statistics for dashboard from the incrementally maintained aggregates"""
+    return get_dashboard_aggregates().snapshot(get_today())